@@ -6,6 +6,9 @@ This module provides API endpoints for:
 - Fetching record details for modal display
 - Getting document counts based on filters
 - Getting format breakdowns for a country
+- Reporting hit/miss counters of the count preview cache
+- Reporting retry and throttling metrics of the ReliefWeb transport
+- Full-text search over stored assessments and extracted documents
 - Testing API connectivity
 
 All endpoints are documented and include error handling and logging.
@@ -15,15 +18,14 @@ from flask import Blueprint, jsonify, render_template, request, flash, redirect,
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from utils.reliefweb_api import get_available_fields, get_document_count, get_all_format_counts_for_country
-from utils.db_utils import get_record_by_id
+from utils.reliefweb_api import get_available_fields, get_document_count, get_all_format_counts_for_country, count_cache, reliefweb_api
+from utils.db_utils import get_record_by_id, search_full_text
+from utils.db_connection import DB_PATH
 import logging
 
 api_bp = Blueprint('api', __name__)
 logger = logging.getLogger(__name__)
 
-# Database path
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'database', 'humanitarian_assessments.db')
 
 @api_bp.route("/api/fields")
 def api_fields():
@@ -173,6 +175,86 @@ def get_format_counts(country):
         logger.error(f"Error in format counts endpoint: {e}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/api/count/cache')
+def get_count_cache_stats():
+    """
+    GET /api/count/cache
+
+    Description:
+        Returns hit, miss and coalesced-request counters for the in-memory
+        cache behind /api/count and /api/format-counts.
+
+    Returns:
+        JSON object with cache statistics.
+    """
+    return jsonify({
+        'success': True,
+        'data': count_cache.stats()
+    })
+
+@api_bp.route('/api/transport')
+def get_transport_metrics():
+    """
+    GET /api/transport
+
+    Description:
+        Returns per-endpoint request, retry, throttling (HTTP 429) and
+        failure counters for ReliefWeb API calls and document downloads.
+
+    Returns:
+        JSON object keyed by "METHOD host/path".
+    """
+    return jsonify({
+        'success': True,
+        'data': reliefweb_api.transport_metrics()
+    })
+
+@api_bp.route('/api/search')
+def search():
+    """
+    GET /api/search?q=<terms>&scope=all|assessments|documents&limit=20&offset=0
+
+    Description:
+        Ranked keyword search over stored assessment titles/bodies and
+        extracted document text, backed by the SQLite FTS5 index.
+        Terms are prefix matched, so "chol" finds "cholera".
+
+    Args:
+        q (str): Search terms (query string)
+        scope (str): Which index to search (default 'all')
+        limit (int): Maximum hits per result set (default 20, max 100)
+        offset (int): Hits to skip, for paging (default 0)
+
+    Returns:
+        JSON object with ranked assessment and document hits, snippets and totals.
+
+    Errors:
+        400 if the query or scope is missing/invalid.
+        500 if an error occurs during processing.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        scope = request.args.get('scope', 'all')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+
+        if not query:
+            return jsonify({'error': 'Missing search query (q)'}), 400
+        if scope not in ('all', 'assessments', 'documents'):
+            return jsonify({'error': f'Invalid scope: {scope}'}), 400
+
+        results = search_full_text(DB_PATH, query, scope=scope, limit=limit, offset=offset)
+        return jsonify({
+            'success': True,
+            'scope': scope,
+            'limit': limit,
+            'offset': offset,
+            'data': results
+        })
+    except Exception as e:
+        logger.error(f"Error in search endpoint: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/api/test', methods=['GET', 'POST'])
 def test_api():
     """
@@ -11,6 +11,7 @@ from flask import Blueprint, request, jsonify, render_template, flash, redirect,
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from utils.db_connection import DB_PATH
 
 content_extraction_bp = Blueprint('content_extraction', __name__, url_prefix='/content_extraction')
 logger = logging.getLogger(__name__)
@@ -27,7 +28,7 @@ def extraction():
         # Import here to avoid circular imports
         from utils.db_utils import get_document_downloads, get_extracted_content_simple
         
-        db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db')
+        db_path = DB_PATH
         logger.debug(f"📍 Database path: {db_path}")
         logger.debug(f"📁 DB exists: {os.path.exists(db_path)}")
         
@@ -90,7 +91,7 @@ def api_stats():
     try:
         from utils.db_utils import get_document_downloads, get_content_metadata
         
-        db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db')
+        db_path = DB_PATH
         
         downloads = get_document_downloads(db_path)
         extracted_content = get_content_metadata(db_path, limit=1000)
@@ -109,57 +110,18 @@ def api_stats():
 
 @content_extraction_bp.route('/process_document/<int:document_id>', methods=['POST'])
 def process_document(document_id):
-    """Extract content synchronously (no Celery, no Redis)"""
+    """Extract content synchronously (no Celery, no Redis)
+    
+    Unchanged files are served from the extraction cache and re-runs update
+    the document's existing content row.
+    """
     try:
-        from utils.db_utils import get_document_downloads, record_content_extraction
-        from utils.content_extractors import ContentExtractorFactory
-        import os
-
-        db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db')
-        downloads = get_document_downloads(db_path)
-        document = next((d for d in downloads if d['id'] == document_id), None)
-        
-        if not document:
-            return jsonify({'success': False, 'error': 'Document not found'})
-        
-        file_path = document.get('file_path')
-        if not file_path or not os.path.exists(file_path):
-            return jsonify({'success': False, 'error': 'File not found'})
-        
-        extractor = ContentExtractorFactory.get_extractor(file_path)
-        if not extractor:
-            return jsonify({'success': False, 'error': 'No extractor for file type'})
-        
-        # Extract content
-        extracted_content = extractor.extract(file_path)
-        
-        if not extracted_content.text.strip():
-            return jsonify({'success': False, 'error': 'No text content extracted'})
-        
-        # Prepare simplified metadata (matching database schema)
-        content_metadata = {
-            'document_id': document_id,
-            'assessment_id': document.get('assessment_id'),
-            'language': 'Unknown',  # Basic placeholder
-            'word_count': len(extracted_content.text.split()),
-            'page_count': extracted_content.page_count or 1,
-            'key_topics': '',  # Placeholder for future AI processing
-            'named_entities': '',  # Placeholder for future AI processing
-            'admin_districts': '',  # Placeholder for future geo processing
-            'sentiment_score': 0.0,  # Placeholder
-            'readability_score': 0.0,  # Placeholder
-            'extraction_confidence': extracted_content.confidence or 0.95,
-            'processing_status': 'completed',
-            'vector_ids': ''  # Placeholder for future vector processing
-        }
-        
-        # Record extraction
-        success = record_content_extraction(db_path, content_metadata)
+        from utils.extraction_queue import extract_document
         
-        if success:
-            return jsonify({'success': True, 'message': f'Successfully extracted {content_metadata["word_count"]} words from document'})
-        else:
-            return jsonify({'success': False, 'error': 'Failed to save extraction results'})
+        result = extract_document(DB_PATH, document_id, extraction_method='automated')
+        if result['success']:
+            result['message'] = f"Successfully {'reused' if result['cached'] else 'extracted'} {result['word_count']} words from document"
+        return jsonify(result)
             
     except Exception as e:
         logger.error(f"Error extracting document: {e}")
@@ -168,8 +130,12 @@ def process_document(document_id):
 
 @content_extraction_bp.route('/bulk_process', methods=['POST'])
 def bulk_process():
-    """Process multiple documents for content extraction"""
-    logger.debug("🚀 Starting bulk document processing")
+    """Queue multiple documents for background content extraction
+    
+    Returns a job id straight away; poll /content_extraction/jobs/<job_id>
+    for progress and per-document results.
+    """
+    logger.debug("🚀 Queueing bulk document processing")
     
     try:
         data = request.get_json()
@@ -178,126 +144,56 @@ def bulk_process():
         if not document_ids:
             return jsonify({'success': False, 'error': 'No documents selected'}), 400
         
-        logger.debug(f"📥 Processing {len(document_ids)} documents: {document_ids}")
-        
-        from utils.db_utils import get_document_downloads, record_content_extraction
-        from utils.content_extractors import ContentExtractorFactory
-        import os
+        from utils.db_utils import enqueue_processing_jobs
+        from utils.extraction_queue import get_worker_pool
         
-        db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db')
+        db_path = DB_PATH
         
-        # Get all downloads
-        downloads = get_document_downloads(db_path)
-        downloads_dict = {d['id']: d for d in downloads}
-        
-        results = []
-        successful = 0
-        failed = 0
-        
-        for doc_id in document_ids:
-            try:
-                document = downloads_dict.get(doc_id)
-                if not document:
-                    results.append({
-                        'document_id': doc_id,
-                        'status': 'error',
-                        'error': 'Document not found'
-                    })
-                    failed += 1
-                    continue
-                
-                file_path = document.get('file_path')
-                if not file_path or not os.path.exists(file_path):
-                    results.append({
-                        'document_id': doc_id,
-                        'status': 'error',
-                        'error': 'File not found on disk'
-                    })
-                    failed += 1
-                    continue
-                
-                # Extract content
-                extractor = ContentExtractorFactory.get_extractor(file_path)
-                if not extractor:
-                    results.append({
-                        'document_id': doc_id,
-                        'status': 'error',
-                        'error': 'Unsupported file format'
-                    })
-                    failed += 1
-                    continue
-                
-                extracted_content = extractor.extract(file_path)
-                if not extracted_content or not extracted_content.text:
-                    results.append({
-                        'document_id': doc_id,
-                        'status': 'error',
-                        'error': 'No text content found'
-                    })
-                    failed += 1
-                    continue
-                
-                # Record extraction
-                content_metadata = {
-                    'document_id': doc_id,
-                    'assessment_id': document.get('assessment_id'),
-                    'content_text': extracted_content.text,
-                    'word_count': len(extracted_content.text.split()),
-                    'page_count': extracted_content.page_count or 1,
-                    'extraction_method': 'bulk_extraction',
-                    'processing_status': 'completed',
-                    'extraction_confidence': extracted_content.confidence or 0.95
-                }
-                
-                success = record_content_extraction(db_path, content_metadata)
-                
-                if success:
-                    results.append({
-                        'document_id': doc_id,
-                        'status': 'success',
-                        'message': f'Extracted {len(extracted_content.text.split())} words'
-                    })
-                    successful += 1
-                else:
-                    results.append({
-                        'document_id': doc_id,
-                        'status': 'error',
-                        'error': 'Failed to save extraction results'
-                    })
-                    failed += 1
-                    
-            except Exception as e:
-                logger.error(f"❌ Error processing document {doc_id}: {e}")
-                results.append({
-                    'document_id': doc_id,
-                    'status': 'error',
-                    'error': str(e)
-                })
-                failed += 1
+        job_id = enqueue_processing_jobs(db_path, document_ids)
+        get_worker_pool(db_path).notify()
         
         return jsonify({
             'success': True,
-            'message': f'Bulk processing completed: {successful} successful, {failed} failed',
-            'results': results,
-            'summary': {
-                'total': len(document_ids),
-                'successful': successful,
-                'failed': failed
-            }
-        })
+            'job_id': job_id,
+            'status_url': url_for('content_extraction.job_status', job_id=job_id),
+            'message': f'Queued {len(document_ids)} documents for extraction'
+        }), 202
         
     except Exception as e:
         logger.error(f"❌ Bulk processing error: {e}")
         logger.debug(f"📍 Full error details: ", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@content_extraction_bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Progress and per-document results of a queued bulk extraction"""
+    try:
+        from utils.db_utils import get_processing_batch_status
+        
+        status = get_processing_batch_status(DB_PATH, job_id)
+        if not status:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        
+        counts = status['counts']
+        status.update({
+            'success': True,
+            'message': f"Bulk processing {'completed' if status['done'] else 'running'}: "
+                       f"{counts['completed']} successful, {counts['failed']} failed, "
+                       f"{counts['pending'] + counts['running']} remaining"
+        })
+        return jsonify(status)
+        
+    except Exception as e:
+        logger.error(f"Error getting job status: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @content_extraction_bp.route('/api/detailed_stats')
 def get_detailed_stats():
     """Get detailed content extraction statistics"""
     try:
         from utils.db_utils import get_document_downloads, get_content_metadata
         
-        db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db')
+        db_path = DB_PATH
         
         downloads = get_document_downloads(db_path)
         extracted_content = get_content_metadata(db_path, limit=None)
@@ -321,21 +217,22 @@ def get_detailed_stats():
 def semantic_search():
     """Perform semantic search across extracted content"""
     try:
-        data = request.get_json()
-        query = data.get('query', '').strip()
-        limit = data.get('limit', 10)
+        from utils.semantic_search import semantic_search as search_documents
+        
+        data = request.get_json(silent=True) or {}
+        query = str(data.get('query', '')).strip()
         
         if not query:
             return jsonify({'error': 'Search query is required'}), 400
         
-        # TODO: Implement semantic search using vector database
-        # For now, return placeholder results
-        results = {
-            'query': query,
-            'results': [],
-            'total_results': 0,
-            'message': 'Semantic search feature coming soon'
-        }
+        try:
+            limit = max(1, min(int(data.get('limit', 10)), 50))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'limit must be an integer'}), 400
+        
+        results = search_documents(query, limit=limit, db_path=DB_PATH)
+        if 'error' in results:
+            return jsonify(results), 503
         
         return jsonify(results)
         
@@ -349,7 +246,7 @@ def view_content(document_id):
     try:
         from utils.db_utils import get_content_metadata
         
-        db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db')
+        db_path = DB_PATH
         
         # Get content metadata
         content_data = get_content_metadata(db_path, document_id=document_id)
@@ -367,75 +264,13 @@ def view_content(document_id):
         flash(f'Error loading content: {e}', 'error')
         return redirect(url_for('content_extraction.extraction'))
 
-def process_single_document_internal(document_id):
-    """Internal function for processing a single document (used by bulk processing)"""
-    try:
-        from utils.db_utils import get_document_downloads, record_content_extraction
-        from utils.content_extractors import ContentExtractorFactory
-        from utils.content_processing import process_content_pipeline
-        from utils.admin_geo_utils import extract_admin_geo_from_content
-        
-        db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db')
-        
-        # Get document info
-        downloads = get_document_downloads(db_path)
-        document = next((d for d in downloads if d['id'] == document_id), None)
-        
-        if not document:
-            return {'success': False, 'error': 'Document not found'}
-        
-        file_path = document.get('file_path')
-        if not file_path or not os.path.exists(file_path):
-            return {'success': False, 'error': 'Document file not found'}
-        
-        # Extract and process content
-        extractor = ContentExtractorFactory.get_extractor(file_path)
-        if not extractor:
-            return {'success': False, 'error': 'No suitable extractor'}
-        
-        extracted_content = extractor.extract(file_path)
-        if not extracted_content.text.strip():
-            return {'success': False, 'error': 'No text content extracted'}
-        
-        processing_result = process_content_pipeline(extracted_content.text)
-        geo_info = extract_admin_geo_from_content(processing_result['cleaned_text'])
-        
-        # Prepare and save metadata
-        content_metadata = {
-            'document_id': document_id,
-            'assessment_id': document.get('assessment_id'),
-            'original_text': extracted_content.text,
-            'cleaned_text': processing_result['cleaned_text'],
-            'extraction_method': extracted_content.metadata.get('extraction_method', 'unknown'),
-            'extraction_confidence': extracted_content.confidence,
-            'page_count': extracted_content.page_count,
-            'word_count': len(processing_result['cleaned_text'].split()),
-            'char_count': len(processing_result['cleaned_text']),
-            'chunks': processing_result['chunks'],
-            'metadata': processing_result['metadata'],
-            'admin_districts': geo_info.get('admin_districts', []),
-            'primary_country': geo_info.get('primary_country'),
-            'embeddings': processing_result.get('embeddings', [])
-        }
-        
-        extraction_id = record_content_extraction(db_path, content_metadata)
-        
-        return {
-            'success': True,
-            'extraction_id': extraction_id,
-            'message': f'Successfully processed {document["filename"]}'
-        }
-        
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
-
 @content_extraction_bp.route('/debug/info')
 def debug_info():
     """Debug endpoint to check system status"""
     try:
         from utils.db_utils import get_document_downloads, get_extracted_content_simple
         
-        db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db')
+        db_path = DB_PATH
         
         debug_data = {
             'database': {
@@ -10,6 +10,7 @@ import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from utils.db_utils import get_all_metadata, get_document_downloads, get_document_registry_status
+from utils.db_connection import DB_PATH
 
 
 document_registry_bp = Blueprint('document_registry', __name__)
@@ -19,7 +20,7 @@ DOCUMENTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 # Helper to get registry info for all downloaded documents
 def get_document_registry():
-    db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db'))
+    db_path = DB_PATH
     records = get_all_metadata(db_path)
     registry = []
     for rec in records:
@@ -79,7 +80,7 @@ def registry():
     Show the document registry page with all downloaded documents and their status.
     """
     try:
-        db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db'))
+        db_path = DB_PATH
         registry_data = get_document_registry_status(db_path)
         downloads_data = get_document_downloads(db_path)
         
@@ -111,7 +112,7 @@ def get_registry_api():
     API endpoint - Returns a list of all records with their downloaded files and metadata.
     """
     try:
-        db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db'))
+        db_path = DB_PATH
         registry_data = get_document_registry_status(db_path)
         return jsonify({'registry': registry_data})
     except Exception as e:
@@ -4,13 +4,14 @@ Download-RW Blueprint: Download ReliefWeb documents for selected records.
 import os
 import sys
 import logging
-from flask import Blueprint, request, jsonify, current_app, render_template, flash, redirect, url_for
 import threading
-import requests
+from flask import Blueprint, request, jsonify, current_app, render_template, flash, redirect, url_for
 import re
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from utils.db_utils import get_all_metadata, get_assessment_with_downloads, record_document_download
+from utils.db_utils import get_record_by_id, get_assessment_with_downloads
+from utils.reliefweb_async import get_sync_client
+from utils.db_connection import DB_PATH
 
 download_rw_bp = Blueprint('download_rw', __name__)
 logger = logging.getLogger(__name__)
@@ -18,6 +19,10 @@ logger = logging.getLogger(__name__)
 DOCUMENTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'documents'))
 os.makedirs(DOCUMENTS_DIR, exist_ok=True)
 
+# Progress of the latest download batch, served by /download_rw/progress
+download_progress = {'completed': 0, 'total': 0, 'downloaded': 0, 'failed': 0, 'last_file': None, 'running': False}
+_progress_lock = threading.Lock()
+
 # Helper to extract URLs from file_info (same logic as test script)
 def extract_urls(file_info):
     urls = []
@@ -46,29 +51,57 @@ def extract_urls(file_info):
                 urls.append(url)
     return urls
 
-def download_document(url, filename, assessment_id):
+def build_download_jobs(ids):
+    """Build one download job per file URL of the given record IDs
+    
+    Returns:
+        tuple: (jobs, statuses) where statuses lists records that were
+        not found or have no files
+    """
+    jobs = []
+    statuses = []
+    for rid in ids:
+        rec = get_record_by_id(DB_PATH, rid)
+        if not rec:
+            statuses.append({"id": rid, "status": "not_found"})
+            continue
+        title = rec.get('title', '') or ''
+        urls = extract_urls(rec.get('file_info'))
+        if not urls:
+            statuses.append({"id": rid, "status": "no_files"})
+            continue
+        for url in urls:
+            ext = os.path.splitext(url)[1] or '.bin'
+            safe_title = ''.join(c for c in title if c.isalnum() or c in (' ', '_', '-')).rstrip()
+            jobs.append({
+                "assessment_id": rid,
+                "url": url,
+                "filename": f"record_{rid}_{safe_title[:30]}{ext}"
+            })
+    return jobs, statuses
+
+def download_jobs(jobs):
+    """Download all jobs concurrently, streaming to DOCUMENTS_DIR and recording each file
+    
+    Downloads run on the shared async client's event loop, so this request
+    thread just waits instead of fanning out a thread pool of its own.
+    Per-file progress is kept in download_progress as files finish.
+    """
+    with _progress_lock:
+        download_progress.update(completed=0, total=len(jobs), downloaded=0, failed=0, last_file=None, running=True)
+    
+    def report(completed, total, result):
+        with _progress_lock:
+            download_progress['completed'] = completed
+            download_progress['downloaded' if result['status'] == 'downloaded' else 'failed'] += 1
+            download_progress['last_file'] = {'filename': result['filename'], 'status': result['status'],
+                                              'error': result['error']}
+    
     try:
-        logger.info(f"Downloading: {url} -> {filename}")
-        resp = requests.get(url, timeout=30)
-        if resp.status_code == 200:
-            file_path = os.path.join(DOCUMENTS_DIR, filename)
-            with open(file_path, 'wb') as f:
-                f.write(resp.content)
-            
-            # Record download in database
-            file_size = len(resp.content)
-            mime_type = resp.headers.get('content-type', 'application/octet-stream')
-            db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db'))
-            record_document_download(db_path, assessment_id, filename, url, file_path, file_size, mime_type)
-            
-            logger.info(f"Downloaded successfully: {filename}")
-            return True, None
-        else:
-            logger.error(f"Failed to download {url}: HTTP {resp.status_code}")
-            return False, f"HTTP {resp.status_code}"
-    except Exception as e:
-        logger.error(f"Exception downloading {url}: {e}")
-        return False, str(e)
+        return get_sync_client().download_all(jobs, DOCUMENTS_DIR, DB_PATH, progress_callback=report)
+    finally:
+        with _progress_lock:
+            download_progress['running'] = False
 
 @download_rw_bp.route('/download_rw/documents', methods=['GET'])
 def download_documents():
@@ -77,7 +110,7 @@ def download_documents():
     Show the download documents page with assessments that can be downloaded.
     """
     try:
-        db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db'))
+        db_path = DB_PATH
         assessments = get_assessment_with_downloads(db_path, limit=100)
         
         # Add file info analysis for each assessment
@@ -106,38 +139,30 @@ def download_documents_api():
         if not data or 'ids' not in data or not isinstance(data['ids'], list):
             return jsonify({"error": "Missing or invalid 'ids' list in request."}), 400
         ids = set(data['ids'])
-        db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db'))
-        records = get_all_metadata(db_path)
-        id_to_record = {rec['id']: rec for rec in records if rec.get('id') in ids}
-        results = []
-        for rid in ids:
-            rec = id_to_record.get(rid)
-            if not rec:
-                results.append({"id": rid, "status": "not_found"})
-                continue
-            file_info = rec.get('file_info')
-            title = rec.get('title', '')
-            urls = extract_urls(file_info)
-            if not urls:
-                results.append({"id": rid, "status": "no_files"})
-                continue
-            for url in urls:
-                ext = os.path.splitext(url)[1] or '.bin'
-                safe_title = ''.join(c for c in title if c.isalnum() or c in (' ', '_', '-')).rstrip()
-                fname = f"record_{rid}_{safe_title[:30]}{ext}"
-                success, err = download_document(url, fname, rid)
-                results.append({
-                    "id": rid,
-                    "url": url,
-                    "filename": fname,
-                    "status": "downloaded" if success else "failed",
-                    "error": err
-                })
+        jobs, statuses = build_download_jobs(ids)
+        results = statuses + [{
+            "id": r['assessment_id'],
+            "url": r['url'],
+            "filename": r['filename'],
+            "status": r['status'],
+            "file_size": r['file_size'],
+            "checksum": r['checksum'],
+            "error": r['error']
+        } for r in download_jobs(jobs)]
         return jsonify({"results": results})
     except Exception as e:
         logger.error(f"Error in download_documents_api: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+@download_rw_bp.route('/download_rw/progress', methods=['GET'])
+def download_progress_api():
+    """
+    GET /download_rw/progress
+    Per-file progress of the latest download batch.
+    """
+    with _progress_lock:
+        return jsonify(dict(download_progress))
+
 @download_rw_bp.route('/download_rw/bulk_download', methods=['POST'])
 def bulk_download():
     """
@@ -153,30 +178,11 @@ def bulk_download():
         # Convert to integers
         ids = [int(id_str) for id_str in selected_ids]
         
-        db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'humanitarian_assessments.db'))
-        records = get_all_metadata(db_path)
-        id_to_record = {rec['id']: rec for rec in records if rec.get('id') in ids}
-        
-        download_count = 0
-        error_count = 0
+        jobs, _ = build_download_jobs(ids)
+        results = download_jobs(jobs)
         
-        for rid in ids:
-            rec = id_to_record.get(rid)
-            if not rec:
-                continue
-            file_info = rec.get('file_info')
-            title = rec.get('title', '')
-            urls = extract_urls(file_info)
-            
-            for url in urls:
-                ext = os.path.splitext(url)[1] or '.bin'
-                safe_title = ''.join(c for c in title if c.isalnum() or c in (' ', '_', '-')).rstrip()
-                fname = f"record_{rid}_{safe_title[:30]}{ext}"
-                success, err = download_document(url, fname, rid)
-                if success:
-                    download_count += 1
-                else:
-                    error_count += 1
+        download_count = sum(1 for r in results if r['status'] == 'downloaded')
+        error_count = len(results) - download_count
         
         if download_count > 0:
             flash(f'Successfully downloaded {download_count} documents!', 'success')
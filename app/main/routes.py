@@ -2,18 +2,33 @@ from flask import Blueprint, render_template, request, jsonify, current_app, red
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from utils.reliefweb_api import fetch_assessments, get_filter_options
-from utils.db_utils import save_metadata, get_database_stats
+from utils.reliefweb_api import fetch_assessments, get_filter_options, HarvestError
+from utils.db_utils import bulk_upsert_metadata, get_database_stats
+from utils.reliefweb_sync import sync_reliefweb
+from utils.db_connection import DB_PATH, get_connection
 import traceback
-import sqlite3
 
 # Create the blueprint - this is what needs to be imported
 main = Blueprint('main', __name__)
 
-# Database path
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'database', 'humanitarian_assessments.db')
 DOCUMENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'documents')
 
+def partial_harvest_result(error, counts):
+    """Result for a harvest that failed part-way, after saving the records that arrived"""
+    # Keep the pages that arrived, but don't report the harvest as complete
+    current_app.logger.error(f"❌ {error}; saved {counts['inserted']} new records from {len(error.assessments)} fetched")
+    return {
+        'success': False,
+        'message': f"{error}. Saved {counts['inserted']} new and {counts['updated']} updated assessments from the {len(error.assessments)} records that were fetched; run the extraction again to complete it.",
+        'data': {
+            'total_fetched': len(error.assessments),
+            'new_saved': counts['inserted'],
+            'updated': counts['updated'],
+            'existing_skipped': counts['unchanged'],
+            'failed_offsets': error.failed_offsets
+        }
+    }
+
 def extract_rw(filters, download_files=False):
     """
     Extract metadata from ReliefWeb API
@@ -36,8 +51,37 @@ def extract_rw(filters, download_files=False):
                 'data': None
             }
         
+        # Incremental sync: only fetch records changed since the stored mark
+        if filters.get('sync'):
+            try:
+                sync_result = sync_reliefweb(DB_PATH, filters, DOCUMENTS_DIR)
+            except HarvestError as e:
+                # sync_reliefweb has already saved the records that arrived
+                return partial_harvest_result(e, e.counts)
+            current_app.logger.info(f"✅ {sync_result['mode'].title()} sync fetched {sync_result['total_fetched']}, saved {sync_result['new_saved']} new records")
+            message = f"{sync_result['mode'].title()} sync complete: {sync_result['new_saved']} new and {sync_result['updated']} updated assessments from {sync_result['total_fetched']} changed records."
+            if 'backfill' in sync_result:
+                message += f" Back-filled {sync_result['backfill']['fetched']} full records."
+            return {
+                'success': True,
+                'message': message,
+                'data': {
+                    'total_fetched': sync_result['total_fetched'],
+                    'new_saved': sync_result['new_saved'],
+                    'updated': sync_result['updated'],
+                    'existing_skipped': sync_result['unchanged'],
+                    'sync_mode': sync_result['mode'],
+                    'last_changed': sync_result['last_changed'],
+                    'backfill': sync_result.get('backfill')
+                }
+            }
+        
         # Fetch assessments from ReliefWeb
-        assessments = fetch_assessments(filters, DOCUMENTS_DIR)
+        try:
+            assessments = fetch_assessments(filters, DOCUMENTS_DIR)
+        except HarvestError as e:
+            counts = bulk_upsert_metadata(DB_PATH, e.assessments) if e.assessments else {'inserted': 0, 'updated': 0, 'unchanged': 0}
+            return partial_harvest_result(e, counts)
         
         if not assessments:
             return {
@@ -46,18 +90,20 @@ def extract_rw(filters, download_files=False):
                 'data': None
             }
         
-        # Save to database
-        saved_count = save_metadata(DB_PATH, assessments)
+        # Save to database in one transaction, refreshing changed records
+        counts = bulk_upsert_metadata(DB_PATH, assessments)
+        saved_count = counts['inserted']
         
-        current_app.logger.info(f"✅ Successfully extracted {len(assessments)} assessments, saved {saved_count} new records")
+        current_app.logger.info(f"✅ Successfully extracted {len(assessments)} assessments, saved {saved_count} new records, refreshed {counts['updated']}")
         
         return {
             'success': True,
-            'message': f'Successfully extracted and saved {saved_count} new assessments from {len(assessments)} total!',
+            'message': f'Successfully extracted and saved {saved_count} new assessments ({counts["updated"]} updated) from {len(assessments)} total!',
             'data': {
                 'total_fetched': len(assessments),
                 'new_saved': saved_count,
-                'existing_skipped': len(assessments) - saved_count
+                'updated': counts['updated'],
+                'existing_skipped': counts['unchanged']
             }
         }
         
@@ -93,6 +139,9 @@ def index():
                 date_to = request.form.get('date_to', '')
                 limit = int(request.form.get('limit', 1000))
                 download_docs = 'download_docs' in request.form
+                harvest = 'harvest' in request.form
+                sync = 'sync' in request.form
+                field_profile = request.form.get('field_profile', '')
                 country_filter_type = request.form.get('country_filter_type', 'all')
                 
                 # Build filters for API
@@ -116,6 +165,14 @@ def index():
                 # Set country filter type
                 filters['country_filter_type'] = country_filter_type
                 
+                # Harvest every page instead of a single capped page
+                if harvest:
+                    filters['harvest'] = True
+                if sync:
+                    filters['sync'] = True
+                if field_profile:
+                    filters['field_profile'] = field_profile
+                
                 # Extract from ReliefWeb
                 result = extract_rw(filters, download_docs)
                 
@@ -177,6 +234,13 @@ def extract_assessments():
         
         filters['country_filter_type'] = data.get('country_filter_type', 'all')
         
+        if data.get('harvest'):
+            filters['harvest'] = True
+        if data.get('sync'):
+            filters['sync'] = True
+        if data.get('field_profile'):
+            filters['field_profile'] = data['field_profile']
+        
         # Extract from ReliefWeb
         download_docs = data.get('download_docs', False)
         result = extract_rw(filters, download_docs)
@@ -191,7 +255,8 @@ def extract_assessments():
 def api_extract_rw():
     """
     API endpoint specifically for ReliefWeb extraction
-    Can be called from any module
+    Can be called from any module; filters may include field_profile
+    ('ids', 'listing' or 'full')
     """
     try:
         data = request.get_json()
@@ -216,13 +281,11 @@ def api_extract_rw():
 def get_record_details(record_id):
     """Get detailed information for a specific record"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(DB_PATH)
         c = conn.cursor()
         
         c.execute("SELECT * FROM assessments WHERE id = ?", (record_id,))
         record = c.fetchone()
-        conn.close()
         
         if not record:
             return jsonify({'error': 'Record not found'}), 404
@@ -5,6 +5,8 @@ This module provides all routes for database management, including:
 - Viewing and filtering records
 - Sorting and searching
 - Deleting single or multiple records
+- Rebuilding the dashboard statistics
+- Back-filling records ingested with a lighter field profile
 - Fetching record details for modals or detail views
 
 All endpoints are documented and include error handling and logging.
@@ -15,130 +17,31 @@ from flask import Blueprint, render_template, request, jsonify, current_app
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from utils.db_utils import get_all_metadata, get_database_stats, get_record_by_id, delete_records
+from utils.db_utils import get_database_stats, get_record_by_id, delete_records, query_manage_records, get_country_facet_counts, rebuild_dashboard_stats
+from utils.db_connection import DB_PATH
+from utils.reliefweb_sync import backfill_assessments
 import traceback
 from datetime import datetime, timedelta
 import sqlite3
+from types import SimpleNamespace
 
 manage = Blueprint('manage', __name__)
 
-# Database path
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'database', 'humanitarian_assessments.db')
+# Rows per page on the management table
+DEFAULT_PAGE_SIZE = 50
 
-def safe_get_sort_value(record, field):
-    """Safely get a sortable value from a record field, handling various data types."""
-    try:
-        # Handle dictionary access for record data
-        if isinstance(record, dict):
-            value = record.get(field, None)
-        else:
-            value = getattr(record, field, None)
-        
-        if value is None:
-            # Return appropriate default values for different field types
-            if field in ['date_created', 'created_at']:
-                return datetime.min.replace(tzinfo=None)  # Ensure timezone-naive
-            elif field in ['id', 'report_id']:
-                return 0
-            else:
-                return ''
-        
-        # Handle datetime fields specifically
-        if field in ['date_created', 'created_at']:
-            if isinstance(value, str):
-                try:
-                    # Parse string dates and ensure they're timezone-naive
-                    parsed_date = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                    # Convert to naive datetime (remove timezone info)
-                    if parsed_date.tzinfo is not None:
-                        parsed_date = parsed_date.replace(tzinfo=None)
-                    return parsed_date
-                except (ValueError, AttributeError):
-                    return datetime.min.replace(tzinfo=None)
-            elif hasattr(value, 'replace') and hasattr(value, 'tzinfo'):
-                # It's a datetime object - make it timezone-naive
-                if value.tzinfo is not None:
-                    return value.replace(tzinfo=None)
-                return value
-            else:
-                return datetime.min.replace(tzinfo=None)
-        
-        # Handle numeric fields
-        if field in ['id', 'report_id']:
-            try:
-                return int(value) if value is not None else 0
-            except (ValueError, TypeError):
-                return 0
-        
-        # Handle string fields
-        return str(value).lower() if value is not None else ''
-        
-    except Exception as e:
-        # Fallback for any unexpected errors
-        if field in ['date_created', 'created_at']:
-            return datetime.min.replace(tzinfo=None)
-        elif field in ['id', 'report_id']:
-            return 0
-        else:
-            return ''
 
 def get_filter_options():
-    """Get all unique values for filter dropdowns using existing data."""
+    """Get all unique values for filter dropdowns from the country link table."""
     try:
-        # Get all records from database
-        all_records = get_all_metadata(DB_PATH)
+        country_counts, secondary_country_counts, all_country_counts = get_country_facet_counts(DB_PATH)
         
         options = {
-            'primary_countries': [],
-            'secondary_countries': [],
-            'all_countries': []
+            'primary_countries': sorted(country_counts),
+            'secondary_countries': sorted(secondary_country_counts),
+            'all_countries': sorted(all_country_counts)
         }
         
-        # Initialize country count dictionaries
-        country_counts = {}
-        secondary_country_counts = {}
-        all_country_counts = {}
-        
-        if not all_records:
-            return options, country_counts, secondary_country_counts, all_country_counts
-        
-        # Extract unique values and count occurrences
-        primary_countries = set()
-        secondary_countries = set()
-        
-        for record in all_records:
-            # Primary countries - ensure proper capitalization
-            primary_country = record.get('primary_country', '').strip()
-            if primary_country:
-                # Ensure proper capitalization (first letter capital)
-                primary_country = primary_country.title()
-                primary_countries.add(primary_country)
-                country_counts[primary_country] = country_counts.get(primary_country, 0) + 1
-                all_country_counts[primary_country] = all_country_counts.get(primary_country, 0) + 1
-            
-            # Secondary countries (from country field) - parse comma-separated and remove duplicates
-            all_countries_str = record.get('country', '').strip()
-            if all_countries_str:
-                # Split by comma and clean up
-                countries = [c.strip().title() for c in all_countries_str.split(',') if c.strip()]
-                # Remove duplicates and primary country
-                unique_countries = set(countries)
-                if primary_country:
-                    unique_countries.discard(primary_country)
-                
-                for country in unique_countries:
-                    if country:  # Additional check for non-empty countries
-                        secondary_countries.add(country)
-                        secondary_country_counts[country] = secondary_country_counts.get(country, 0) + 1
-                        all_country_counts[country] = all_country_counts.get(country, 0) + 1
-        
-        # Combine all countries
-        all_countries = primary_countries.union(secondary_countries)
-        
-        options['primary_countries'] = sorted(list(primary_countries))
-        options['secondary_countries'] = sorted(list(secondary_countries))
-        options['all_countries'] = sorted(list(all_countries))
-        
         return options, country_counts, secondary_country_counts, all_country_counts
         
     except Exception as e:
@@ -149,73 +52,6 @@ def get_filter_options():
             'all_countries': []
         }, {}, {}, {}
 
-def apply_filters(records, filters):
-    """Apply client-side filtering to records."""
-    filtered_records = []
-    
-    for record in records:
-        include_record = True
-        
-        # Title search
-        if filters.get('searchTitle'):
-            title = record.get('title', '').lower()
-            if filters['searchTitle'].lower() not in title:
-                include_record = False
-                continue
-        
-        # Body search
-        if filters.get('searchBody'):
-            body = record.get('body', '').lower()
-            if filters['searchBody'].lower() not in body:
-                include_record = False
-                continue
-        
-        # Primary country filter
-        if filters.get('filterPrimaryCountry'):
-            primary_country = record.get('primary_country', '').strip().title()
-            if filters['filterPrimaryCountry'] != primary_country:
-                include_record = False
-                continue
-        
-        # Secondary country filter (multi-select)
-        if filters.get('filterSecondaryCountry'):
-            selected_secondary_countries = [c.strip() for c in filters['filterSecondaryCountry'].split(',') if c.strip()]
-            if selected_secondary_countries:
-                all_countries = record.get('country', '')
-                record_countries = [c.strip().title() for c in all_countries.split(',') if c.strip()]
-                # Check if any of the selected secondary countries are in the record's countries
-                has_any_selected = any(selected in record_countries for selected in selected_secondary_countries)
-                if not has_any_selected:
-                    include_record = False
-                    continue
-        
-        # Any country filter
-        if filters.get('filterCountry'):
-            primary_country = record.get('primary_country', '')
-            all_countries = record.get('country', '')
-            target_country = filters['filterCountry']
-            if target_country not in primary_country and target_country not in all_countries:
-                include_record = False
-                continue
-        
-        # Date filters
-        if filters.get('filterDateFrom'):
-            record_date = record.get('date_created', '')
-            if record_date and record_date < filters['filterDateFrom']:
-                include_record = False
-                continue
-        
-        if filters.get('filterDateTo'):
-            record_date = record.get('date_created', '')
-            if record_date and record_date > filters['filterDateTo']:
-                include_record = False
-                continue
-        
-        if include_record:
-            filtered_records.append(record)
-    
-    return filtered_records
-
 @manage.route('/manage')
 def manage_database():
     """Main database management page with advanced filtering."""
@@ -226,9 +62,6 @@ def manage_database():
         # Get filter options and country counts
         filter_options, country_counts, secondary_country_counts, all_country_counts = get_filter_options()
         
-        # Get all records using existing utility
-        all_records = get_all_metadata(DB_PATH)
-        
         # Get query parameters
         filters = {
             'searchTitle': request.args.get('searchTitle', '').strip(),
@@ -242,28 +75,25 @@ def manage_database():
         
         sort_by = request.args.get('sort', 'date_created')
         sort_order = request.args.get('order', 'desc')
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int)
+        
+        # Filter, sort and paginate in SQLite so only one page is loaded
+        result = query_manage_records(DB_PATH, filters, sort_by, sort_order, page, per_page)
+        
+        pagination = {
+            'page': result['page'],
+            'per_page': result['per_page'],
+            'pages': result['pages'],
+            'total': result['total'],
+            'first': (result['page'] - 1) * result['per_page'] + 1 if result['total'] else 0,
+            'last': (result['page'] - 1) * result['per_page'] + len(result['records'])
+        }
         
-        # Apply filters
-        filtered_records = apply_filters(all_records, filters)
-        
-        # Sort records with safe comparison
-        reverse_order = sort_order.lower() == 'desc'
-        
-        try:
-            # Try to sort by the requested field
-            filtered_records.sort(key=lambda x: safe_get_sort_value(x, sort_by), reverse=reverse_order)
-        except Exception as sort_error:
-            current_app.logger.warning(f"Error sorting by {sort_by}: {sort_error}")
-            # Fallback to sorting by date_created
-            filtered_records.sort(key=lambda x: safe_get_sort_value(x, "date_created"), reverse=True)
-        
-        # Convert records to objects for template compatibility
-        class Record:
-            def __init__(self, **kwargs):
-                for key, value in kwargs.items():
-                    setattr(self, key, value)
+        # Query string without the page number, for building page links
+        page_args = {k: v for k, v in request.args.items() if k != 'page'}
         
-        data = [Record(**record) for record in filtered_records]
+        data = [SimpleNamespace(**record) for record in result['records']]
         
         return render_template('manage.html', 
                              data=data,
@@ -272,6 +102,8 @@ def manage_database():
                              country_counts=country_counts,
                              secondary_country_counts=secondary_country_counts,
                              all_country_counts=all_country_counts,
+                             pagination=pagination,
+                             page_args=page_args,
                              request=request)
         
     except Exception as e:
@@ -296,6 +128,8 @@ def manage_database():
                              country_counts={},
                              secondary_country_counts={},
                              all_country_counts={},
+                             pagination=None,
+                             page_args={},
                              request=request,
                              error="An error occurred while loading the database management page.")
 
@@ -349,6 +183,35 @@ def delete_selected():
         current_app.logger.error(f"Error deleting selected records: {e}")
         return jsonify({'success': False, 'message': str(e)})
 
+@manage.route('/rebuild_stats', methods=['POST'])
+def rebuild_stats():
+    """Recompute the materialised dashboard statistics from all records."""
+    try:
+        if rebuild_dashboard_stats(DB_PATH):
+            return jsonify({'success': True, 'message': 'Statistics rebuilt successfully'})
+        return jsonify({'success': False, 'message': 'Statistics rebuild failed'})
+        
+    except Exception as e:
+        current_app.logger.error(f"Error rebuilding statistics: {e}")
+        return jsonify({'success': False, 'message': str(e)})
+
+@manage.route('/backfill', methods=['POST'])
+def backfill():
+    """Fetch full records for assessments ingested with the 'ids' or 'listing' profile."""
+    try:
+        data = request.get_json(silent=True) or {}
+        limit = int(data['limit']) if data.get('limit') else None
+        summary = backfill_assessments(DB_PATH, limit=limit)
+        return jsonify({
+            'success': True,
+            'message': f"Back-filled {summary['fetched']} of {summary['requested']} partial records",
+            'data': summary
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f"Error back-filling records: {e}")
+        return jsonify({'success': False, 'message': str(e)})
+
 @manage.route('/record/<int:record_id>')
 def get_record_details(record_id):
     """Get detailed information about a specific record using existing utility."""
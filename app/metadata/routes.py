@@ -13,6 +13,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from utils.db_utils import get_all_metadata
+from utils.db_connection import DB_PATH
 import pandas as pd
 from io import StringIO, BytesIO
 import logging
@@ -21,8 +22,6 @@ import json
 metadata = Blueprint('metadata', __name__)
 logger = logging.getLogger(__name__)
 
-# Database path
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'database', 'humanitarian_assessments.db')
 
 @metadata.route("/metadata")
 def view_metadata():
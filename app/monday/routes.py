@@ -17,6 +17,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from utils.db_schema_update import update_database_schema
 from utils.monday_utils import fetch_monday_assessments, check_duplicates
 from utils.db_utils import save_metadata
+from utils.db_connection import DB_PATH
 import logging
 import traceback
 
@@ -24,8 +25,6 @@ import traceback
 monday = Blueprint('monday', __name__)
 logger = logging.getLogger(__name__)
 
-# Database path
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'database', 'humanitarian_assessments.db')
 
 @monday.route("/monday/update", methods=["GET", "POST"])
 def update_ar_monday():
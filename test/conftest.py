@@ -0,0 +1,67 @@
+"""
+Shared fixtures for the test scripts: a temporary database and a fake ReliefWeb HTTP session.
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_utils import init_db
+from utils.db_connection import close_connection
+
+class FakeResponse:
+    """Just enough of requests.Response for the ReliefWeb client"""
+
+    def __init__(self, data, status_code=200, text=''):
+        self._data = data
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return self._data
+
+class FakeSession:
+    """Records every POST payload and answers it with respond(payload)
+
+    Clear release to hold requests open, or set fail to make them raise.
+    Subclasses override respond() to serve their own data.
+    """
+
+    def __init__(self):
+        self.payloads = []
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def post(self, url, json=None, params=None, timeout=None):
+        self.payloads.append(json)
+        self.release.wait(5)
+        if self.fail:
+            raise ConnectionError('ReliefWeb unreachable')
+        return FakeResponse(self.respond(json))
+
+    def respond(self, payload):
+        return {'totalCount': 0, 'data': []}
+
+def find_condition(node, field):
+    """The filter condition on field anywhere in a ReliefWeb filter tree"""
+    if not node:
+        return None
+    if node.get('field') == field:
+        return node
+    for child in node.get('conditions', []):
+        found = find_condition(child, field)
+        if found:
+            return found
+    return None
+
+@pytest.fixture
+def db_path(tmp_path):
+    """An initialised database in the test's temporary directory"""
+    path = str(tmp_path / 'test.db')
+    init_db(path)
+    yield path
+    close_connection(path)
@@ -0,0 +1,87 @@
+"""
+Test script for the bulk upsert ingest path in db_utils.
+Runs against a temporary SQLite database, no API access needed.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_utils import bulk_upsert_metadata, save_metadata, get_all_metadata, delete_records
+from utils.db_connection import get_connection
+
+def make_record(report_id, title='Sudan Rapid Needs Assessment', **overrides):
+    record = {
+        'report_id': str(report_id),
+        'title': title,
+        'date_created': '2024-05-01T00:00:00+00:00',
+        'source': 'OCHA, WFP',
+        'format': 'Assessment',
+        'theme': 'Health',
+        'country': 'Sudan, Chad',
+        'primary_country': 'Sudan',
+        'language': 'English',
+        'status': 'published',
+        'url': f'https://reliefweb.int/node/{report_id}',
+        'url_alias': '',
+        'body': 'Body text',
+        'body_html': '<p>Body text</p>',
+        'file': [{'url': f'https://reliefweb.int/files/{report_id}.pdf'}],
+        'headline': ''
+    }
+    record.update(overrides)
+    return record
+
+def test_bulk_upsert_counts(db_path):
+    """Inserted, updated and unchanged records are counted separately"""
+    print("\n🧪 Testing bulk upsert counts")
+
+    counts = bulk_upsert_metadata(db_path, [make_record(i) for i in range(1, 6)])
+    print(f"First batch: {counts}")
+    assert counts == {'inserted': 5, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+
+    batch = [make_record(i) for i in range(1, 6)]
+    batch[0]['title'] = 'Revised title'
+    batch.append(make_record(6))
+    batch.append({'title': 'No report id'})
+    counts = bulk_upsert_metadata(db_path, batch)
+    print(f"Second batch: {counts}")
+    assert counts == {'inserted': 1, 'updated': 1, 'unchanged': 4, 'skipped': 1}
+
+    records = {r['report_id']: r for r in get_all_metadata(db_path)}
+    assert len(records) == 6
+    assert records[1]['title'] == 'Revised title'
+    assert records[1]['file_urls'] == 'https://reliefweb.int/files/1.pdf'
+
+def test_save_metadata_returns_new_count(db_path):
+    """save_metadata keeps returning the number of new records"""
+    print("\n🧪 Testing save_metadata wrapper")
+
+    assert save_metadata(db_path, make_record(10)) == 1
+    assert save_metadata(db_path, [make_record(10), make_record(11)]) == 1
+
+def test_ingest_runs_no_schema_statements(db_path):
+    """Ingest is DML only, even after the registry has been emptied"""
+    print("\n🧪 Testing ingest statements")
+    save_metadata(db_path, make_record(20))
+    delete_records(db_path, {})
+
+    statements = []
+    conn = get_connection(db_path)
+    conn.set_trace_callback(statements.append)
+    try:
+        counts = bulk_upsert_metadata(db_path, [make_record(21), make_record(22)])
+    finally:
+        conn.set_trace_callback(None)
+
+    assert counts['inserted'] == 2
+    schema = [sql for sql in statements
+              if sql.lstrip().upper().startswith(('CREATE', 'ALTER', 'PRAGMA', 'DROP'))
+              or 'dashboard_stats (stat_type, key, value) SELECT' in sql]
+    print(f"{len(statements)} statements, {len(schema)} schema/rebuild")
+    assert schema == []
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
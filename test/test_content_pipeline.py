@@ -0,0 +1,73 @@
+"""
+Test script for the batched single-pass content processing pipeline.
+Uses a blank spaCy pipeline, so no model download is needed.
+"""
+import os
+import sys
+
+import pytest
+import spacy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.content_processing import ContentProcessor
+from utils.embedding_service import EmbeddingService
+import utils.content_processing as content_processing
+import utils.embedding_service as embedding_service
+
+class CountingNLP:
+    """Wraps a spaCy pipeline and records every text it parses"""
+
+    def __init__(self, nlp):
+        self.nlp = nlp
+        self.parses = []
+
+    def __getattr__(self, name):
+        return getattr(self.nlp, name)
+
+    def __call__(self, text):
+        self.parses.append(text)
+        return self.nlp(text)
+
+    def pipe(self, texts, **kwargs):
+        for doc in self.nlp.pipe(texts, **kwargs):
+            self.parses.append(doc.text)
+            yield doc
+
+def make_processor():
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    nlp.add_pipe('entity_ruler').add_patterns([{'label': 'GPE', 'pattern': 'Darfur'}])
+
+    counting = CountingNLP(nlp)
+    processor = ContentProcessor()
+    processor._models.update({'nlp': counting, 'embedding_model': None})
+    return processor, counting.parses
+
+def test_each_document_parsed_once(db_path, monkeypatch):
+    """Chunking, entities and metadata share one Doc per document"""
+    print("\n🧪 Testing single-pass batch pipeline")
+    processor, parses = make_processor()
+    monkeypatch.setattr(content_processing, 'content_processor', processor)
+    monkeypatch.setattr(embedding_service, '_service', EmbeddingService(db_path))
+
+    texts = ["Fighting in Darfur displaced families. Needs are high. " * 40,
+             "",
+             "Another report on Darfur. Food is short."]
+    results = content_processing.process_content_batch(texts, max_chunk_size=300)
+
+    print(f"Chunks per document: {[len(r['chunks']) for r in results]}")
+    assert len(parses) == 2
+    assert len(results[0]['chunks']) > 1
+    assert results[0]['chunks'][1]['start_pos'] > 0
+    assert results[0]['metadata']['entities'] == {'GPE': ['Darfur']}
+    assert results[1]['chunks'] == [] and results[1]['metadata'] == {}
+    assert results[1]['embeddings'].size == 0
+    assert {r['embedding_model'] for r in results} == {content_processing.EMBEDDING_MODEL}
+    assert results[2]['metadata']['entities'] == {'GPE': ['Darfur']}
+
+    single = content_processing.process_content_pipeline(texts[2], max_chunk_size=300)
+    assert single['chunks'] == results[2]['chunks']
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
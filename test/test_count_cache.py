@@ -0,0 +1,94 @@
+"""
+Test script for the memoised document count previews behind /api/count and /api/format-counts.
+Uses a fake HTTP session, no API access needed.
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.reliefweb_api as reliefweb_api
+from utils.reliefweb_api import ResponseCache, get_document_count, get_all_format_counts_for_country
+from conftest import FakeSession
+
+class CountSession(FakeSession):
+    """Returns a fixed count response"""
+
+    def respond(self, payload):
+        return {
+            'totalCount': 42,
+            'facets': {'format.name': {'data': [{'value': 'Assessment', 'count': 30},
+                                                {'value': 'Situation Report', 'count': 12}]}}
+        }
+
+def use_fake_session(monkeypatch, ttl=600):
+    session = CountSession()
+    monkeypatch.setattr(reliefweb_api.reliefweb_api, 'session', session)
+    monkeypatch.setattr(reliefweb_api, 'count_cache', ResponseCache(ttl=ttl))
+    return session
+
+def test_repeated_previews_hit_cache(monkeypatch):
+    """Identical filter combinations, after normalisation, share one upstream call"""
+    print("\n🧪 Testing count cache hits")
+    session = use_fake_session(monkeypatch)
+
+    first = get_document_count('Sudan', 'Assessment', 'primary', '2024-01-01', None)
+    repeat = get_document_count(' Sudan ', 'Assessment', 'PRIMARY', '2024-01-01', '')
+    assert first == repeat and first['total_count'] == 42
+    assert len(session.payloads) == 1
+
+    # Callers get copies, so mutating a response doesn't poison the cache
+    repeat['breakdown']['by_format'].clear()
+    assert get_document_count('Sudan', 'Assessment', 'primary', '2024-01-01')['breakdown']['by_format']
+
+    assert get_all_format_counts_for_country('Sudan') == {'Assessment': 30, 'Situation Report': 12}
+    assert get_all_format_counts_for_country('Sudan')
+    assert len(session.payloads) == 2
+
+    stats = reliefweb_api.count_cache.stats()
+    print(f"Stats: {stats}")
+    assert (stats['hits'], stats['misses'], stats['entries']) == (3, 2, 2)
+
+def test_concurrent_previews_coalesce(monkeypatch):
+    """Concurrent identical previews wait on a single upstream request"""
+    print("\n🧪 Testing in-flight coalescing")
+    session = use_fake_session(monkeypatch)
+    session.release.clear()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_document_count('Chad')))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while reliefweb_api.count_cache.stats()['coalesced'] < 4:
+        time.sleep(0.01)
+    session.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(session.payloads) == 1
+    assert len(results) == 5 and all(r == results[0] for r in results)
+    assert reliefweb_api.count_cache.stats()['misses'] == 1
+
+def test_failures_and_expiry_refetch(monkeypatch):
+    """Failed requests aren't cached and expired entries are fetched again"""
+    print("\n🧪 Testing count cache failures and TTL")
+    session = use_fake_session(monkeypatch, ttl=0)
+    session.fail = True
+    try:
+        get_document_count('Sudan')
+        assert False, "expected the upstream error to propagate"
+    except Exception as e:
+        assert 'unreachable' in str(e)
+
+    session.fail = False
+    get_document_count('Sudan')
+    get_document_count('Sudan')
+    assert len(session.payloads) == 3
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
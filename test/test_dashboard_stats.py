@@ -0,0 +1,54 @@
+"""
+Test script for the materialised dashboard statistics in db_utils.
+Runs against a temporary SQLite database, no API access needed.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_utils import bulk_upsert_metadata, delete_records, get_database_stats, rebuild_dashboard_stats
+from utils.db_connection import get_connection
+
+def make_record(report_id, country, source, days_ago=30):
+    date_created = (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%dT00:00:00+00:00')
+    return {'report_id': str(report_id), 'title': f'Report {report_id}', 'primary_country': country.split(',')[0],
+            'country': country, 'source': source, 'date_created': date_created}
+
+def stats_rows(db_path):
+    conn = get_connection(db_path)
+    return sorted(tuple(r) for r in conn.execute("SELECT stat_type, key, value FROM dashboard_stats"))
+
+def test_incremental_stats_match_rebuild(db_path):
+    """Counters maintained on ingest/delete equal a full recomputation"""
+    print("\n🧪 Testing incremental dashboard stats")
+
+    bulk_upsert_metadata(db_path, [
+        make_record(1, 'Sudan', 'OCHA, WFP'),
+        make_record(2, 'Sudan, Chad', 'OCHA'),
+        make_record(3, 'Chad', 'UNHCR')
+    ])
+    stats = get_database_stats(db_path)
+    print(f"Stats: {stats}")
+    assert stats['total_records'] == 3
+    assert stats['unique_countries'] == 2
+    assert stats['top_sources'][0] == ('OCHA', 2)
+    # created_at is the ingest time, so fresh records count as recent
+    assert stats['records_last_7_days'] == 3
+
+    bulk_upsert_metadata(db_path, [make_record(3, 'Ethiopia', 'UNHCR')])
+    delete_records(db_path, {'report_id': 1})
+    stats = get_database_stats(db_path)
+    assert stats['total_records'] == 2
+    assert dict(stats['top_countries']) == {'Sudan': 1, 'Chad': 1, 'Ethiopia': 1}
+    assert ('WFP', 1) not in stats['top_sources']
+
+    incremental = stats_rows(db_path)
+    assert rebuild_dashboard_stats(db_path)
+    assert stats_rows(db_path) == incremental
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,59 @@
+"""
+Test script for the batched, cached embedding service.
+Uses a small deterministic model, no model download needed.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_connection import get_connection
+from utils.embedding_service import EmbeddingService
+
+class FakeModel:
+    """Hashes characters into an 8-dimensional vector and records what it encodes"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        vectors = np.array([[sum(ord(c) for c in text[i::8]) + 1 for i in range(8)] for text in texts], dtype=np.float64)
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+def test_only_changed_chunks_are_encoded(db_path):
+    """Cached chunks are reused; duplicates and unchanged chunks are never re-encoded"""
+    print("\n🧪 Testing embedding cache")
+    model = FakeModel()
+    service = EmbeddingService(db_path, model_name='fake-model', batch_size=4, model=model)
+
+    chunks = ['Needs in Darfur', 'Food insecurity', 'Needs in Darfur', 'Displacement']
+    first = service.embed(chunks)
+    assert first.dtype == np.float32 and first.shape == (4, 8)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+    assert np.array_equal(first[0], first[2])
+    assert model.encoded == ['Needs in Darfur', 'Food insecurity', 'Displacement']
+
+    # Re-chunking changed one chunk; only that one reaches the model
+    model.encoded = []
+    second = service.embed(['Needs in Darfur', 'Food insecurity rising', 'Displacement'])
+    print(f"Re-encoded: {model.encoded}")
+    assert model.encoded == ['Food insecurity rising']
+    assert np.array_equal(second[0], first[0])
+    assert np.array_equal(second[2], first[3])
+
+    # The cache is per model
+    other = FakeModel()
+    EmbeddingService(db_path, model_name='other-model', model=other).embed(['Needs in Darfur'])
+    assert other.encoded == ['Needs in Darfur']
+
+    assert get_connection(db_path).execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0] == 5
+    assert service.embed([]).size == 0
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
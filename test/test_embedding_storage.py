@@ -0,0 +1,86 @@
+"""
+Test script for binary chunk embedding storage in db_utils.
+Runs against a temporary SQLite database, no model needed.
+"""
+import os
+import sys
+import json
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_utils import store_chunk_embeddings, load_embedding_matrix, ensure_embedding_blob_columns
+from utils.db_connection import get_connection, transaction
+
+def make_chunks(count):
+    return [{'chunk_id': i, 'text': f'chunk {i}', 'start_pos': i * 10} for i in range(count)]
+
+def make_vectors(count, seed):
+    vectors = np.random.default_rng(seed).standard_normal((count, 384)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def test_blob_round_trip(db_path):
+    """float32 is exact, float16 and int8 are close, and rows replace on re-store"""
+    print("\n🧪 Testing binary embedding storage")
+
+    first, second = make_vectors(5, 1), make_vectors(3, 2)
+    assert store_chunk_embeddings(db_path, 1, make_chunks(5), first, model='m') == 5
+    assert store_chunk_embeddings(db_path, 2, make_chunks(3), second, model='m') == 3
+
+    ids, matrix = load_embedding_matrix(db_path, model='m')
+    assert matrix.dtype == np.float32 and matrix.shape == (8, 384)
+    assert np.array_equal(matrix, np.vstack([first, second]))
+    assert len(ids) == 8
+
+    for dtype, tolerance in [('float16', 1e-3), ('int8', 1e-2)]:
+        store_chunk_embeddings(db_path, 2, make_chunks(3), second, model='m', dtype=dtype)
+        _, matrix = load_embedding_matrix(db_path, content_ids=[2])
+        print(f"{dtype} max error: {np.abs(matrix - second).max():.5f}")
+        assert matrix.shape == (3, 384)
+        assert np.abs(matrix - second).max() < tolerance
+
+    conn = get_connection(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM document_embeddings WHERE content_id = 2").fetchone()[0] == 3
+    sizes = dict(conn.execute("SELECT embedding_dtype, MAX(LENGTH(embedding_blob)) FROM document_embeddings GROUP BY embedding_dtype").fetchall())
+    assert sizes == {'float32': 384 * 4, 'int8': 384}
+
+def test_legacy_json_vectors_are_converted(db_path):
+    """JSON text vectors written by older versions become float32 blobs"""
+    print("\n🧪 Testing JSON embedding migration")
+    vector = make_vectors(1, 3)[0]
+
+    with transaction(db_path) as conn:
+        conn.execute("INSERT INTO document_embeddings (content_id, chunk_id, embedding_vector, embedding_dimension) VALUES (1, 0, ?, 384)",
+                     (json.dumps(vector.tolist()),))
+        ensure_embedding_blob_columns(conn.cursor())
+
+    _, matrix = load_embedding_matrix(db_path)
+    assert np.array_equal(matrix[0], vector)
+    assert get_connection(db_path).execute("SELECT embedding_vector FROM document_embeddings").fetchone()[0] is None
+
+def test_restore_keeps_embedding_ids(db_path):
+    """Re-storing a document updates rows in place, keyed by chunk"""
+    print("\n🧪 Testing stable embedding ids")
+
+    store_chunk_embeddings(db_path, 1, make_chunks(4), make_vectors(4, 1))
+    store_chunk_embeddings(db_path, 2, make_chunks(2), make_vectors(2, 2))
+    first_ids, _ = load_embedding_matrix(db_path, content_ids=[1])
+
+    # Three chunks this time: the first three keep their ids, the fourth is deleted
+    updated = make_vectors(3, 3)
+    assert store_chunk_embeddings(db_path, 1, make_chunks(3), updated) == 3
+    ids, matrix = load_embedding_matrix(db_path, content_ids=[1])
+    assert ids.tolist() == first_ids[:3].tolist()
+    assert np.array_equal(matrix, updated)
+
+    # A new chunk gets a fresh id above every existing one
+    store_chunk_embeddings(db_path, 1, make_chunks(4), make_vectors(4, 4))
+    ids, _ = load_embedding_matrix(db_path, content_ids=[1])
+    all_ids, _ = load_embedding_matrix(db_path)
+    assert ids[:3].tolist() == first_ids[:3].tolist()
+    assert ids[3] == all_ids.max() and ids[3] not in first_ids
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,75 @@
+"""
+Test script for the content-addressed extraction cache.
+Builds PDFs locally with PyMuPDF, no API access needed.
+"""
+import os
+import sys
+import shutil
+
+import fitz
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.embedding_service as embedding_service
+from utils.db_utils import record_document_download, get_document_download_by_id
+from utils.db_connection import get_connection
+from utils.document_downloader import file_checksum
+from utils.embedding_service import EmbeddingService
+from utils.extraction_queue import extract_document
+
+class LengthModel:
+    """Tiny deterministic stand-in for the sentence transformer"""
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, convert_to_numpy=True):
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+def make_pdf(file_path, text):
+    doc = fitz.open()
+    for page_number in range(3):
+        doc.new_page().insert_text((72, 72), f"{text} page {page_number}")
+    doc.save(file_path)
+    doc.close()
+
+def test_identical_files_extract_once(db_path, tmp_path, monkeypatch):
+    """Identical files share one cached extraction and re-runs upsert"""
+    print("\n🧪 Testing extraction cache")
+    monkeypatch.setattr(embedding_service, '_service', EmbeddingService(db_path, model_name='length-model',
+                                                                         model=LengthModel()))
+    directory = str(tmp_path)
+
+    first = os.path.join(directory, 'record_1_hno.pdf')
+    make_pdf(first, 'Sudan needs overview')
+    second = os.path.join(directory, 'record_2_hno.pdf')
+    shutil.copy(first, second)
+
+    # The first download predates checksums, the second was hashed while streaming
+    first_id = record_document_download(db_path, 1, 'record_1_hno.pdf', 'http://x/1', first)
+    second_id = record_document_download(db_path, 2, 'record_2_hno.pdf', 'http://x/2', second,
+                                         checksum=file_checksum(second))
+
+    result = extract_document(db_path, first_id)
+    print(f"First run: {result}")
+    assert result['success'] and not result['cached'] and result['chunk_count'] == 1
+    assert get_document_download_by_id(db_path, first_id)['checksum'] == file_checksum(first)
+
+    assert extract_document(db_path, second_id)['cached']
+
+    rerun = extract_document(db_path, first_id)
+    assert rerun['cached']
+    assert rerun['content_id'] == result['content_id']
+
+    conn = get_connection(db_path)
+    rows = conn.execute("SELECT document_id, COUNT(*) FROM document_content GROUP BY document_id").fetchall()
+    assert sorted(tuple(r) for r in rows) == [(first_id, 1), (second_id, 1)]
+    assert conn.execute("SELECT COUNT(*) FROM content_metadata").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0] == 1
+    text = conn.execute("SELECT cleaned_text FROM document_content WHERE document_id = ?", (second_id,)).fetchone()[0]
+    assert 'Sudan needs overview page 2' in text
+    # Cached re-runs still chunk and embed, tagging vectors with the model
+    models = conn.execute("SELECT content_id, embedding_model FROM document_embeddings").fetchall()
+    assert len(models) == 2 and {model for _, model in models} == {'length-model'}
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
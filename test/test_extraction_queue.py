@@ -0,0 +1,101 @@
+"""
+Test script for the SQLite-backed content extraction job queue.
+Runs against a temporary SQLite database, no API access needed.
+"""
+import os
+import sys
+import time
+import threading
+import subprocess
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_utils import (enqueue_processing_jobs, claim_processing_job, finish_processing_job,
+                            requeue_stale_jobs, get_processing_batch_status)
+from utils.db_connection import transaction
+from utils.extraction_queue import ExtractionWorkerPool, worker_is_alive
+
+def test_concurrent_claims_are_exclusive(db_path):
+    """Each queued job is claimed by exactly one worker"""
+    print("\n🧪 Testing atomic job claims")
+    batch_id = enqueue_processing_jobs(db_path, list(range(1, 41)))
+
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(name):
+        while True:
+            job = claim_processing_job(db_path, name)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job['id'])
+            finish_processing_job(db_path, job['id'], 'completed', results_summary={'message': 'ok'})
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"Claimed {len(claimed)} jobs")
+    assert len(claimed) == 40
+    assert len(set(claimed)) == 40
+
+    status = get_processing_batch_status(db_path, batch_id)
+    assert status['done'] and status['progress'] == 100.0
+    assert status['counts']['completed'] == 40
+    assert status['jobs'][0]['results_summary'] == {'message': 'ok'}
+
+def test_requeue_and_worker_pool(db_path):
+    """Interrupted jobs are requeued and the pool records failures"""
+    print("\n🧪 Testing worker pool")
+    batch_id = enqueue_processing_jobs(db_path, [101, 102, 103])
+
+    # Simulate a crash mid-job
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    assert claim_processing_job(db_path, f"{dead.pid}:extraction-worker-0")['document_id'] == 101
+
+    pool = ExtractionWorkerPool(db_path, num_workers=2, poll_interval=0.1)
+    pool.start()
+    try:
+        deadline = time.time() + 10
+        while not get_processing_batch_status(db_path, batch_id)['done'] and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop(timeout=5)
+
+    status = get_processing_batch_status(db_path, batch_id)
+    assert status['counts']['failed'] == 3
+    assert {job['error_message'] for job in status['jobs']} == {'Document not found'}
+    assert all(job['processing_time'] is not None for job in status['jobs'])
+
+def test_requeue_leaves_live_jobs(db_path):
+    """Only jobs from exited workers or past their lease are requeued"""
+    print("\n🧪 Testing stale job requeue")
+    enqueue_processing_jobs(db_path, [201, 202, 203])
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+
+    live = claim_processing_job(db_path, f"{os.getpid()}:extraction-worker-0")
+    crashed = claim_processing_job(db_path, f"{dead.pid}:extraction-worker-0")
+    expired = claim_processing_job(db_path, 'other-host')
+    with transaction(db_path) as conn:
+        conn.execute("UPDATE content_processing_jobs SET start_time = ? WHERE id = ?",
+                     ((datetime.now() - timedelta(hours=7)).isoformat(), expired['id']))
+
+    assert worker_is_alive(live['worker']) and not worker_is_alive(crashed['worker'])
+    assert requeue_stale_jobs(db_path) == 1
+    assert requeue_stale_jobs(db_path, is_worker_alive=worker_is_alive) == 1
+
+    # A second process starting up must not steal the live job
+    with transaction(db_path) as conn:
+        statuses = dict(conn.execute("SELECT document_id, status FROM content_processing_jobs").fetchall())
+    assert statuses == {201: 'running', 202: 'pending', 203: 'pending'}
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,87 @@
+"""
+Test script for the ReliefWeb facet cache (TTL, stale-while-revalidate, SQLite persistence).
+Uses a fake HTTP session and a temporary database, no API access needed.
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.reliefweb_api import ReliefWebAPI
+from conftest import FakeSession
+
+class FacetSession(FakeSession):
+    """Answers facet requests with the next value of a counter"""
+
+    @property
+    def calls(self):
+        return [payload['facets'][0]['field'] for payload in self.payloads]
+
+    def respond(self, payload):
+        field = payload['facets'][0]['field']
+        values = [{'value': f'{field} {len(self.payloads)}'}, {'value': 'Assessment'}]
+        return {'facets': {field: {'data': values}}}
+
+def make_api(db_path, session, facet_ttl=3600):
+    api = ReliefWebAPI(facet_ttl=facet_ttl, db_path=db_path)
+    api.session = session
+    return api
+
+def wait_for_refreshes():
+    for thread in threading.enumerate():
+        if thread.name.startswith('facet-refresh-'):
+            thread.join(5)
+
+def test_fresh_facets_served_from_cache(db_path):
+    """Facets are fetched once, then served from memory and, after a restart, from SQLite"""
+    print("\n🧪 Testing facet cache")
+    session = FacetSession()
+    api = make_api(db_path, session)
+
+    first = api.get_filter_options()
+    second = api.get_filter_options()
+    print(f"Formats: {first['formats']}")
+    assert first == second
+    assert sorted(session.calls) == ['format.name', 'primary_country.name']
+
+    cold_start = make_api(db_path, FacetSession())
+    assert cold_start.get_available_formats() == first['formats']
+    assert cold_start.session.calls == []
+
+def test_stale_facets_revalidate_in_background(db_path):
+    """Stale facets are returned at once while a single refresh runs behind them"""
+    print("\n🧪 Testing stale-while-revalidate")
+    session = FacetSession()
+    api = make_api(db_path, session, facet_ttl=0)
+    stale = api.get_available_formats()
+
+    session.release.clear()
+    assert api.get_available_formats() == stale
+    assert api.get_available_formats() == stale
+    session.release.set()
+    wait_for_refreshes()
+    assert session.calls == ['format.name', 'format.name']
+    assert api.get_available_formats() != stale
+
+    # A failed refresh keeps serving the last good values
+    session.fail = True
+    values = api.get_available_formats()
+    wait_for_refreshes()
+    assert api.get_available_formats() == values
+
+def test_failure_without_cache_uses_fallback(db_path):
+    """With nothing cached, an API failure returns the verified list and caches nothing"""
+    print("\n🧪 Testing facet fallback")
+    session = FacetSession()
+    session.fail = True
+    api = make_api(db_path, session)
+
+    assert api.get_available_countries() == api._get_verified_countries()
+    session.fail = False
+    assert api.get_available_countries() == ['Assessment', 'primary_country.name 2']
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,71 @@
+"""
+Test script for the normalised country/source/theme/format link tables.
+Runs against a temporary SQLite database, no API access needed.
+"""
+import os
+import sys
+import sqlite3
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_utils import (init_db, bulk_upsert_metadata, delete_records, get_country_facet_counts,
+                            get_database_stats, split_facet_values)
+from utils.db_connection import close_connection
+
+def make_record(report_id, primary_country, country, source='OCHA, WFP'):
+    return {'report_id': str(report_id), 'title': f'Report {report_id}', 'primary_country': primary_country,
+            'country': country, 'source': source, 'theme': 'Health; Food and Nutrition',
+            'format': 'Assessment', 'language': 'English'}
+
+@pytest.fixture
+def db_path(db_path):
+    """The shared temporary database, seeded with this module's records"""
+    bulk_upsert_metadata(db_path, [
+        make_record(1, 'Sudan', 'Sudan, Chad, South Sudan'),
+        make_record(2, 'Chad', 'Chad, Sudan'),
+        make_record(3, 'Sudan', 'sudan', source='UNICEF')
+    ])
+    return db_path
+
+def test_split_facet_values():
+    """Both separators are handled and case-insensitive duplicates dropped"""
+    assert split_facet_values('Sudan, Chad;  sudan ,') == ['Sudan', 'Chad']
+    assert split_facet_values(None) == []
+
+def test_country_counts_and_stats(db_path):
+    """Facet counts and dashboard stats come from the link tables"""
+    print("\n🧪 Testing facet link counts")
+
+    primary, secondary, all_counts = get_country_facet_counts(db_path)
+    print(f"Primary: {primary}, secondary: {secondary}, all: {all_counts}")
+    assert primary == {'Sudan': 2, 'Chad': 1}
+    assert secondary == {'Chad': 1, 'South Sudan': 1, 'Sudan': 1}
+    assert all_counts == {'Sudan': 3, 'Chad': 2, 'South Sudan': 1}
+
+    stats = get_database_stats(db_path)
+    assert stats['unique_countries'] == 3
+    assert stats['unique_sources'] == 3
+    assert stats['top_countries'][0] == ('Sudan', 3)
+
+    # Updates replace links and deletes remove them
+    bulk_upsert_metadata(db_path, [make_record(2, 'Chad', 'Chad')])
+    delete_records(db_path, {'report_id': 1})
+    assert get_country_facet_counts(db_path)[2] == {'Sudan': 1, 'Chad': 1}
+
+def test_backfill_existing_rows(db_path):
+    """Rows written before the link tables existed are backfilled on init"""
+    print("\n🧪 Testing facet link backfill")
+    close_connection(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE assessment_country")
+    conn.commit()
+    conn.close()
+
+    init_db(db_path)
+    assert get_country_facet_counts(db_path)[2] == {'Sudan': 3, 'Chad': 2, 'South Sudan': 1}
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
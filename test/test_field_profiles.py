@@ -0,0 +1,119 @@
+"""
+Test script for harvest field profiles and back-filling partial assessments.
+Uses a fake HTTP session and a temporary database, no API access needed.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.reliefweb_api as reliefweb_api
+from utils.reliefweb_api import parse_report_item, fetch_assessments
+from utils.reliefweb_sync import backfill_assessments, sync_reliefweb
+from utils.db_utils import bulk_upsert_metadata, get_report_ids_needing_backfill
+from utils.db_connection import get_connection
+from conftest import FakeSession
+
+def make_item(report_id, title='Sudan Rapid Needs Assessment', body='Full body text'):
+    return {'id': report_id, 'fields': {
+        'title': title,
+        'body': body,
+        'body-html': f'<p>{body}</p>',
+        'date': {'created': '2024-05-01T00:00:00+00:00', 'changed': '2024-05-02T00:00:00+00:00'},
+        'source': [{'name': 'OCHA'}],
+        'format': [{'name': 'Assessment'}],
+        'primary_country': {'name': 'Sudan'},
+        'country': [{'name': 'Sudan'}],
+        'url': f'https://reliefweb.int/node/{report_id}',
+        'file': [{'url': f'https://reliefweb.int/files/{report_id}.pdf'}]
+    }}
+
+class ProjectingSession(FakeSession):
+    """Serves stored items, honouring the id filter and fields.include projection"""
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = items
+
+    def respond(self, payload):
+        include = set(payload['fields']['include'])
+        wanted = set(payload.get('filter', {}).get('value', [])) or {item['id'] for item in self.items}
+        data = [{'id': item['id'], 'fields': {k: v for k, v in item['fields'].items() if k in include}}
+                for item in self.items if item['id'] in wanted]
+        return {'totalCount': len(data), 'data': data}
+
+def stored(db_path, report_id):
+    conn = get_connection(db_path)
+    return dict(conn.execute("SELECT * FROM assessments WHERE report_id = ?", (report_id,)).fetchone())
+
+def test_profiles_project_fields():
+    """Profiles map to fields.include and parsing leaves unrequested keys out"""
+    print("\n🧪 Testing field profile payloads")
+    api = reliefweb_api.reliefweb_api
+    assert 'body' in api._build_payload({})['fields']['include']
+    listing = api._build_payload({'field_profile': 'listing'})['fields']['include']
+    assert 'body' not in listing and 'body-html' not in listing and 'file' in listing
+    assert api._build_payload({'field_profile': 'ids'})['fields']['include'][0] == 'id'
+    try:
+        api._build_payload({'field_profile': 'everything'})
+        assert False, "expected an unknown profile to be rejected"
+    except ValueError:
+        pass
+
+    metadata = parse_report_item(make_item(1), 'listing')
+    assert 'body' not in metadata and 'body_html' not in metadata
+    assert metadata['title'] and metadata['field_profile'] == 'listing'
+    assert parse_report_item(make_item(1))['body'] == 'Full body text'
+
+def test_partial_records_keep_and_backfill_body(db_path, monkeypatch):
+    """Listing refreshes keep stored bodies; new partial records are back-filled by id"""
+    print("\n🧪 Testing partial ingest and back-fill")
+    session = ProjectingSession([make_item(1), make_item(2)])
+    monkeypatch.setattr(reliefweb_api.reliefweb_api, 'session', session)
+
+    bulk_upsert_metadata(db_path, fetch_assessments({}, None))
+    session.items = [make_item(1, title='Sudan Rapid Needs Assessment (revised)'), make_item(2), make_item(3)]
+
+    counts = bulk_upsert_metadata(db_path, fetch_assessments({}, None, field_profile='listing'))
+    print(f"Listing refresh: {counts}")
+    assert counts == {'inserted': 1, 'updated': 1, 'unchanged': 1, 'skipped': 0}
+    assert stored(db_path, 1)['title'].endswith('(revised)')
+    assert stored(db_path, 1)['body'] == 'Full body text'
+    assert stored(db_path, 3)['body'] == '' and stored(db_path, 3)['file_urls']
+    assert get_report_ids_needing_backfill(db_path) == [3]
+
+    summary = backfill_assessments(db_path)
+    print(f"Back-fill: {summary}")
+    assert session.payloads[-1]['filter'] == {'field': 'id', 'value': [3], 'operator': 'OR'}
+    assert summary == {'requested': 1, 'fetched': 1, 'updated': 1}
+    assert stored(db_path, 3)['body'] == 'Full body text'
+    assert get_report_ids_needing_backfill(db_path) == []
+
+def test_listing_sync_backfills_new_reports(db_path, monkeypatch):
+    """A sync with a lighter profile is followed by a back-fill of the reports it flagged"""
+    print("\n🧪 Testing sync with a listing profile")
+    session = ProjectingSession([make_item(1), make_item(2)])
+    monkeypatch.setattr(reliefweb_api.reliefweb_api, 'session', session)
+    filters = {'country': 'Sudan', 'format': 'Assessment', 'field_profile': 'listing'}
+
+    result = sync_reliefweb(db_path, filters)
+    print(f"Sync: {result}")
+    assert 'body' not in session.payloads[0]['fields']['include']
+    assert session.payloads[-1]['filter'] == {'field': 'id', 'value': [1, 2], 'operator': 'OR'}
+    assert result['new_saved'] == 2 and result['backfill']['fetched'] == 2
+    assert stored(db_path, 2)['body'] == 'Full body text'
+    assert get_report_ids_needing_backfill(db_path) == []
+
+    assert 'backfill' not in sync_reliefweb(db_path, dict(filters, field_profile='full'), force_full=True)
+
+def test_plain_dicts_are_not_partial(db_path):
+    """Hand-built records without a profile still default missing keys to empty"""
+    print("\n🧪 Testing plain metadata dicts")
+    bulk_upsert_metadata(db_path, [{'report_id': '7', 'title': 'Manual entry'}])
+    assert stored(db_path, 7)['needs_backfill'] == 0
+    assert get_report_ids_needing_backfill(db_path) == []
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
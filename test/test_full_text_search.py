@@ -0,0 +1,70 @@
+"""
+Test script for the FTS5 full-text index in db_utils.
+Runs against a temporary SQLite database, no API access needed.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_utils import (bulk_upsert_metadata, delete_records, search_full_text,
+                            build_fts_query, query_manage_records)
+from utils.db_connection import transaction
+
+def make_record(report_id, title, body):
+    return {'report_id': str(report_id), 'title': title, 'body': body,
+            'date_created': '2024-05-01T00:00:00+00:00', 'primary_country': 'Sudan'}
+
+@pytest.fixture
+def db_path(db_path):
+    """The shared temporary database, seeded with this module's records"""
+    bulk_upsert_metadata(db_path, [
+        make_record(1, 'Cholera outbreak in Kassala', 'Cases rising across the state.'),
+        make_record(2, 'Flood response update', 'Cholera risk after flooding in Darfur.'),
+        make_record(3, 'Market monitoring', 'Prices of staple foods.')
+    ])
+    return db_path
+
+def test_build_fts_query():
+    """User input is reduced to quoted prefix terms"""
+    assert build_fts_query('cholera "OR" kass-') == '"cholera"* "OR"* "kass"*'
+    assert build_fts_query('flood', column='title') == 'title : ("flood"*)'
+    assert build_fts_query('  *** ') == ''
+
+def test_ranked_search_and_triggers(db_path):
+    """Search is ranked, prefix matched and follows updates and deletes"""
+    print("\n🧪 Testing full-text search")
+
+    results = search_full_text(db_path, 'chol')
+    print(f"Hits: {[(r['report_id'], r['snippet']) for r in results['assessments']]}")
+    assert results['total_assessments'] == 2
+    # Title match outranks body match
+    assert [r['report_id'] for r in results['assessments']] == [1, 2]
+    assert '<mark>' in results['assessments'][1]['snippet']
+
+    bulk_upsert_metadata(db_path, [make_record(3, 'Market monitoring', 'Cholera affects market access.')])
+    assert search_full_text(db_path, 'cholera')['total_assessments'] == 3
+
+    delete_records(db_path, {'report_id': 1})
+    assert search_full_text(db_path, 'kassala')['total_assessments'] == 0
+
+def test_document_content_search(db_path):
+    """Extracted text is searchable and feeds the manage body filter"""
+    print("\n🧪 Testing document content search")
+
+    with transaction(db_path) as conn:
+        conn.execute("INSERT INTO document_content (document_id, assessment_id, cleaned_text) VALUES (?, ?, ?)",
+                     (10, 3, 'Acute malnutrition screening in El Fasher'))
+
+    results = search_full_text(db_path, 'malnutrition', scope='documents')
+    assert results['total_documents'] == 1
+    assert results['documents'][0]['assessment_id'] == 3
+    assert results['documents'][0]['title'] == 'Market monitoring'
+
+    page = query_manage_records(db_path, {'searchBody': 'malnutrition'})
+    assert [r['report_id'] for r in page['records']] == [3]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,90 @@
+"""
+Test script for harvest mode in fetch_assessments.
+Uses a fake HTTP session, no API access needed.
+"""
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.reliefweb_api import ReliefWebAPI, HarvestError, fetch_assessments
+import utils.reliefweb_api as reliefweb_api
+from conftest import FakeSession
+
+class PagedSession(FakeSession):
+    """Serves total reports in offset order; failures maps offset -> calls left to fail"""
+
+    def __init__(self, total, failures=None, shift_at=None):
+        super().__init__()
+        self.total = total
+        self.failures = dict(failures or {})
+        self.shift_at = shift_at
+
+    @property
+    def offsets(self):
+        return [payload.get('offset', 0) for payload in self.payloads]
+
+    def respond(self, json):
+        offset = json.get('offset', 0)
+        if self.failures.get(offset):
+            self.failures[offset] -= 1
+            raise requests.exceptions.ConnectionError(f"offset {offset} dropped")
+        start = offset
+        # Simulate a record shifting pages mid-harvest: this page repeats the previous page's last id
+        if self.shift_at is not None and offset == self.shift_at:
+            start -= 1
+        ids = range(start, min(offset + json['limit'], self.total))
+        data = [{'id': i, 'fields': {'title': f'Report {i}', 'date': {'created': '2024-01-01T00:00:00+00:00'}}}
+                for i in ids]
+        return {'totalCount': self.total, 'data': data}
+
+def harvest(session, params, db_path):
+    api = ReliefWebAPI(db_path=db_path, max_workers=3)
+    api.session = session
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(reliefweb_api, 'reliefweb_api', api)
+        return fetch_assessments(params, None, harvest=True)
+
+def test_offsets_cover_result_set(db_path):
+    """One request per MAX_LIMIT page, all records returned once"""
+    print("\n🧪 Testing harvest offsets")
+    session = PagedSession(2500, shift_at=2000)
+    assessments = harvest(session, {}, db_path)
+    print(f"Offsets requested: {sorted(session.offsets)}")
+    assert sorted(session.offsets) == [0, 1000, 2000]
+    assert len(assessments) == 2500
+    assert len({a['report_id'] for a in assessments}) == 2500
+
+def test_harvest_limit_caps_pages(db_path):
+    """harvest_limit stops paging once the cap is covered"""
+    print("\n🧪 Testing harvest_limit")
+    session = PagedSession(5000)
+    assessments = harvest(session, {'harvest_limit': 1500}, db_path)
+    assert sorted(session.offsets) == [0, 1000]
+    assert len(assessments) == 2000
+
+    session = PagedSession(5000)
+    harvest(session, {'harvest_limit': 1000}, db_path)
+    assert session.offsets == [0]
+
+def test_failed_page_is_retried_then_raised(db_path):
+    """A page that fails once is retried; one that keeps failing raises with the partial harvest"""
+    print("\n🧪 Testing failed harvest pages")
+    session = PagedSession(3000, failures={1000: 1})
+    assert len(harvest(session, {}, db_path)) == 3000
+    assert session.offsets.count(1000) == 2
+
+    session = PagedSession(3000, failures={2000: 5})
+    try:
+        harvest(session, {}, db_path)
+        assert False, "expected HarvestError"
+    except HarvestError as e:
+        print(f"Raised: {e}")
+        assert e.failed_offsets == [2000]
+        assert len(e.assessments) == 2000
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,123 @@
+"""
+Test script for the retrying, rate-limited HTTP transport.
+Runs against a local HTTP server, no API access needed.
+"""
+import os
+import sys
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.http_transport import TokenBucket, create_session
+
+# path -> statuses returned on successive calls (the last one repeats)
+SCRIPTS = {
+    '/flaky': [503, 502, 200],
+    '/throttled': [429, 200],
+    '/down': [503],
+    '/missing': [404]
+}
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    calls = Counter()
+
+    def _respond(self):
+        script = SCRIPTS[self.path]
+        status = script[min(self.calls[self.path], len(script) - 1)]
+        self.calls[self.path] += 1
+        body = b'{"ok": true}' if status == 200 else b'{}'
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ScriptedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def make_session(**options):
+    session = create_session(2, **options)
+    adapter = session.get_adapter('http://')
+    adapter.delays = []
+    adapter._sleep = adapter.delays.append
+    return session, adapter
+
+def test_retries_and_retry_after():
+    """Transient statuses are retried; Retry-After sets the wait and pauses the bucket"""
+    print("\n🧪 Testing retries with backoff")
+    server, base_url = start_server()
+    bucket = TokenBucket(rate=100)
+    session, adapter = make_session(rate_limiter=bucket)
+    try:
+        assert session.post(f"{base_url}/flaky", json={}).status_code == 200
+        assert len(adapter.delays) == 2
+        assert all(0 <= delay <= adapter.BACKOFF_BASE * 2 for delay in adapter.delays)
+
+        # The retry sleep is faked, so the wait comes from the paused bucket
+        started = time.monotonic()
+        assert session.get(f"{base_url}/throttled").status_code == 200
+        assert adapter.delays[-1] >= 1
+        assert time.monotonic() - started >= 0.9
+
+        assert session.get(f"{base_url}/down").status_code == 503
+        assert ScriptedHandler.calls['/down'] == adapter.retries + 1
+
+        assert session.get(f"{base_url}/missing").status_code == 404
+        assert ScriptedHandler.calls['/missing'] == 1
+    finally:
+        server.shutdown()
+
+    metrics = adapter.metrics()
+    print(f"Metrics: {metrics}")
+    port = server.server_address[1]
+    assert metrics[f"POST 127.0.0.1:{port}/flaky"]['retries'] == 2
+    assert metrics[f"GET 127.0.0.1:{port}/throttled"]['throttled'] == 1
+    assert metrics[f"GET 127.0.0.1:{port}/throttled"]['rate_limited_seconds'] >= 0.9
+    assert metrics[f"GET 127.0.0.1:{port}/down"]['failures'] == 1
+    assert metrics[f"GET 127.0.0.1:{port}/missing"]['requests'] == 1
+
+def test_connection_errors_exhaust_retries():
+    """Connection failures are retried, then raised"""
+    print("\n🧪 Testing connection error retries")
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    session, adapter = make_session(retries=2, group_by_path=False)
+    try:
+        session.get(f"http://127.0.0.1:{port}/anything", timeout=1)
+        assert False, "expected ConnectionError"
+    except requests.exceptions.ConnectionError:
+        pass
+    stats = adapter.metrics()[f"GET 127.0.0.1:{port}"]
+    assert (stats['requests'], stats['errors'], stats['retries'], stats['failures']) == (3, 3, 2, 1)
+
+def test_token_bucket_paces_requests():
+    """Bursts beyond capacity wait for tokens to refill"""
+    print("\n🧪 Testing token bucket")
+    bucket = TokenBucket(rate=50, capacity=2)
+    started = time.monotonic()
+    for _ in range(7):
+        bucket.acquire()
+    elapsed = time.monotonic() - started
+    print(f"7 requests took {elapsed:.3f}s")
+    assert elapsed >= 0.09
+
+if __name__ == "__main__":
+    test_retries_and_retry_after()
+    test_connection_errors_exhaust_retries()
+    test_token_bucket_paces_requests()
+    print("\n✅ HTTP transport tests passed")
@@ -0,0 +1,61 @@
+"""
+Test script for the /manage SQL query builder in db_utils.
+Runs against a temporary SQLite database, no API access needed.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_utils import bulk_upsert_metadata, query_manage_records
+
+@pytest.fixture
+def db_path(db_path):
+    """The shared temporary database, seeded with this module's records"""
+    records = []
+    for i in range(1, 26):
+        records.append({
+            'report_id': str(i),
+            'title': f'Assessment {i}' if i % 5 else f'Flood Assessment {i}',
+            'date_created': f'2024-01-{i:02d}T10:00:00+00:00',
+            'primary_country': 'Sudan' if i % 2 else 'Chad',
+            'country': 'Sudan, South Sudan' if i % 2 else 'Chad, Sudan',
+            'source': 'OCHA',
+            'format': 'Assessment',
+            'body': ('cholera ' if i == 7 else '') + 'x' * 1000
+        })
+    bulk_upsert_metadata(db_path, records)
+    return db_path
+
+def test_pagination_and_sort(db_path):
+    """Pages are sliced in SQL and carry the total count"""
+    print("\n🧪 Testing manage pagination")
+
+    result = query_manage_records(db_path, {}, 'date_created', 'desc', page=2, per_page=10)
+    print(f"Page 2: {[r['report_id'] for r in result['records']]}")
+    assert result['total'] == 25
+    assert result['pages'] == 3
+    assert [r['report_id'] for r in result['records']] == list(range(15, 5, -1))
+    assert len(result['records'][0]['body']) <= 200
+    assert 'body_html' not in result['records'][0]
+
+    # Unknown sort columns fall back to date_created instead of reaching SQL
+    result = query_manage_records(db_path, {}, 'title; DROP TABLE assessments', 'asc', page=99, per_page=10)
+    assert result['page'] == 3
+    assert result['records'][0]['report_id'] == 21
+
+def test_filters(db_path):
+    """Title, body, country and date filters narrow the result set"""
+    print("\n🧪 Testing manage filters")
+
+    assert query_manage_records(db_path, {'searchTitle': 'flood'})['total'] == 5
+    assert query_manage_records(db_path, {'searchBody': 'cholera'})['total'] == 1
+    assert query_manage_records(db_path, {'filterPrimaryCountry': 'Chad'})['total'] == 12
+    assert query_manage_records(db_path, {'filterSecondaryCountry': 'South Sudan'})['total'] == 13
+    assert query_manage_records(db_path, {'filterSecondaryCountry': 'Sudan'})['total'] == 25
+    assert query_manage_records(db_path, {'filterDateFrom': '2024-01-10', 'filterDateTo': '2024-01-12'})['total'] == 3
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,100 @@
+"""
+Test script for page-level PDF extraction and the parallel extraction engine.
+Builds PDFs locally with PyMuPDF, no API access needed.
+"""
+import os
+import sys
+import time
+import tempfile
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.content_extractors import PDFExtractor, ParallelExtractionEngine, assemble_pdf_content
+
+BLANK_PAGES = {3, 17, 40}
+
+def make_pdf(directory, name, page_count):
+    file_path = os.path.join(directory, name)
+    doc = fitz.open()
+    for page_number in range(page_count):
+        page = doc.new_page()
+        if page_number not in BLANK_PAGES:
+            page.insert_text((72, 72), f"{name} page {page_number}")
+    doc.save(file_path)
+    doc.close()
+    return file_path
+
+def test_engine_matches_serial_extraction():
+    """Page ranges extracted in parallel reassemble in page order"""
+    print("\n🧪 Testing parallel PDF extraction")
+    directory = tempfile.mkdtemp()
+    large = make_pdf(directory, 'hno.pdf', 57)
+    small = make_pdf(directory, 'brief.pdf', 2)
+    notes = os.path.join(directory, 'notes.txt')
+    with open(notes, 'w') as f:
+        f.write('field notes')
+
+    engine = ParallelExtractionEngine(max_workers=3, pages_per_task=10)
+    try:
+        results = engine.extract_many([large, small, notes, os.path.join(directory, 'missing.pdf')])
+    finally:
+        engine.close()
+
+    content = results[large]
+    print(f"Metadata: {content.metadata}")
+    expected = [f"hno.pdf page {n}" for n in range(57) if n not in BLANK_PAGES]
+    assert [line for line in content.text.splitlines() if line.strip()] == expected
+    assert content.page_count == 57
+    assert content.metadata['empty_pages'] == len(BLANK_PAGES)
+    assert content.metadata['page_methods'] == {'pymupdf': 57 - len(BLANK_PAGES)}
+    assert content.text == PDFExtractor().extract(large).text
+
+    assert results[small].page_count == 2
+    assert results[notes].text == 'field notes'
+    assert results[os.path.join(directory, 'missing.pdf')].confidence == 0.0
+
+def test_fallback_only_fills_empty_pages():
+    """Fallback text is used for empty pages and weighted into confidence"""
+    print("\n🧪 Testing page-level fallback assembly")
+    file_path = make_pdf(tempfile.mkdtemp(), 'scan.pdf', 1)
+    content = assemble_pdf_content(file_path, ['first', '', 'third', ''],
+                                   {1: ('second', 'pdfplumber'), 2: ('ignored', 'pypdf2')})
+    assert content.text == 'first\nsecond\nthird'
+    assert content.metadata['page_methods'] == {'pymupdf': 2, 'pdfplumber': 1}
+    assert content.metadata['empty_pages'] == 1
+    assert content.confidence == round((0.95 * 2 + 0.9) / 3, 3)
+
+def test_engine_recovers_from_crashed_worker():
+    """A dead worker breaks the pool once; the engine replaces it and retries"""
+    print("\n🧪 Testing worker crash recovery")
+    directory = tempfile.mkdtemp()
+    report = make_pdf(directory, 'report.pdf', 12)
+    notes = os.path.join(directory, 'notes.txt')
+    with open(notes, 'w') as f:
+        f.write('field notes')
+
+    engine = ParallelExtractionEngine(max_workers=2, pages_per_task=5)
+    try:
+        assert engine.extract(notes).text == 'field notes'
+        broken = engine._executor
+        for process in list(broken._processes.values()):
+            process.kill()
+        deadline = time.time() + 10
+        while not broken._broken and time.time() < deadline:
+            time.sleep(0.05)
+
+        results = engine.extract_many([report, notes])
+        assert engine._executor is not broken
+        assert results[notes].text == 'field notes'
+        assert results[report].page_count == 12
+        assert engine.extract(notes).text == 'field notes'
+    finally:
+        engine.close()
+
+if __name__ == "__main__":
+    test_engine_matches_serial_extraction()
+    test_fallback_only_fills_empty_pages()
+    test_engine_recovers_from_crashed_worker()
+    print("\n✅ Parallel extraction tests passed")
@@ -0,0 +1,202 @@
+"""
+Test script for the asyncio ReliefWeb client and its sync facade.
+Uses an in-process httpx mock transport and a temporary database, no API access needed.
+"""
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import tempfile
+import threading
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_connection import get_connection
+from utils.reliefweb_api import ReliefWebAPI, HarvestError
+import utils.reliefweb_async as reliefweb_async
+from utils.reliefweb_async import AsyncReliefWebClient, SyncReliefWebClient
+
+TOTAL_REPORTS = 3500
+FILES = {f'/files/report_{i}.pdf': os.urandom(100_000 + i) for i in range(5)}
+
+class BrokenBody(httpx.AsyncByteStream):
+    """A response body that drops the connection after the first chunk"""
+
+    async def __aiter__(self):
+        yield b'%PDF-1.4 partial'
+        raise httpx.ReadError("connection reset")
+
+class FakeReliefWeb:
+    """Async mock transport handler: paged reports, facets, files, and one throttled page
+
+    failures maps a report offset to how many more times it answers HTTP 500.
+    """
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.files_in_flight = 0
+        self.max_files_in_flight = 0
+        self.requests = []
+        self.throttled = False
+
+    async def __call__(self, request):
+        self.requests.append(request.url.path)
+        is_file = request.url.path.startswith('/files/')
+        self.in_flight += 1
+        self.files_in_flight += is_file
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.max_files_in_flight = max(self.max_files_in_flight, self.files_in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return self.respond(request)
+        finally:
+            self.in_flight -= 1
+            self.files_in_flight -= is_file
+
+    def respond(self, request):
+        if request.url.path in FILES:
+            return httpx.Response(200, content=FILES[request.url.path], headers={'content-type': 'application/pdf'})
+        if request.url.path == '/files/broken.pdf':
+            return httpx.Response(200, stream=BrokenBody())
+        if request.url.path != '/v1/reports':
+            return httpx.Response(404)
+
+        payload = json.loads(request.content)
+        if 'facets' in payload:
+            field = payload['facets'][0]['field']
+            return httpx.Response(200, json={'facets': {field: {'data': [{'value': 'Assessment'}, {'value': 'Appeal'}]}}})
+
+        offset = payload.get('offset', 0)
+        if self.failures.get(offset):
+            self.failures[offset] -= 1
+            return httpx.Response(500)
+        if offset == 2000 and not self.throttled:
+            self.throttled = True
+            return httpx.Response(429, headers={'Retry-After': '0'})
+        data = [{'id': i, 'fields': {'title': f'Report {i}', 'primary_country': {'name': 'Chad'}}}
+                for i in range(offset, min(offset + payload['limit'], TOTAL_REPORTS))]
+        return httpx.Response(200, json={'totalCount': TOTAL_REPORTS, 'data': data})
+
+def make_api(db_path):
+    return ReliefWebAPI(db_path=db_path, rate_limit=1000)
+
+def test_async_harvest_and_facets(db_path):
+    """Pages are fetched concurrently within the limit; 429s are retried; facets are cached"""
+    print("\n🧪 Testing async harvest")
+    api = make_api(db_path)
+    server = FakeReliefWeb()
+
+    async def run():
+        async with AsyncReliefWebClient(api, max_concurrency=2, transport=httpx.MockTransport(server)) as client:
+            client.backoff_base = 0
+            assessments = await client.fetch_assessments({})
+            formats = await client.get_available_formats()
+            requests_before = len(server.requests)
+            assert await client.get_available_formats() == formats
+            assert len(server.requests) == requests_before
+            return assessments, formats
+
+    assessments, formats = asyncio.run(run())
+    print(f"Harvested {len(assessments)} records, max {server.max_in_flight} in flight")
+    assert len(assessments) == TOTAL_REPORTS
+    assert len({a['report_id'] for a in assessments}) == TOTAL_REPORTS
+    assert server.max_in_flight == 2
+    assert server.throttled and server.requests.count('/v1/reports') == 4 + 1 + 1
+    assert formats == ['Appeal', 'Assessment']
+    assert api.get_available_formats() == formats
+
+def test_failed_pages_are_retried_then_raised(db_path):
+    """A page that fails is retried once; one that keeps failing raises with the partial harvest"""
+    print("\n🧪 Testing async harvest failures")
+    api = make_api(db_path)
+    server = FakeReliefWeb(failures={1000: 1, 3000: 5})
+
+    async def run():
+        async with AsyncReliefWebClient(api, transport=httpx.MockTransport(server)) as client:
+            client.retries = 0
+            return await client.fetch_assessments({})
+
+    with pytest.raises(HarvestError) as raised:
+        asyncio.run(run())
+    print(f"Raised: {raised.value}")
+    assert raised.value.failed_offsets == [3000]
+    assert len(raised.value.assessments) == 3000
+    assert server.requests.count('/v1/reports') == 4 + 1 + 1 + 1
+
+    server = FakeReliefWeb(failures={0: 1})
+    with pytest.raises(HarvestError) as raised:
+        asyncio.run(run())
+    assert raised.value.failed_offsets == [0] and raised.value.assessments == []
+
+def test_sync_facade_downloads(db_path, monkeypatch):
+    """Threads share one loop and client; files are streamed, hashed and recorded off the loop"""
+    print("\n🧪 Testing sync facade downloads")
+    api = make_api(db_path)
+    server = FakeReliefWeb()
+    facade = SyncReliefWebClient(lambda: AsyncReliefWebClient(api, transport=httpx.MockTransport(server), per_host_limit=2))
+    target_dir = tempfile.mkdtemp()
+
+    recording_threads = set()
+    record = reliefweb_async.record_document_download
+    monkeypatch.setattr(reliefweb_async, 'record_document_download',
+                        lambda *args: recording_threads.add(threading.current_thread().name) or record(*args))
+    writing_threads = set()
+    write = reliefweb_async.HashingFileWriter.write
+    monkeypatch.setattr(reliefweb_async.HashingFileWriter, 'write',
+                        lambda self, chunk: writing_threads.add(threading.current_thread().name) or write(self, chunk))
+
+    jobs = [{'assessment_id': i, 'url': f'https://reliefweb.int{path}', 'filename': f'record_{i}.pdf'}
+            for i, path in enumerate(FILES)]
+    jobs.append({'assessment_id': 99, 'url': 'https://reliefweb.int/files/missing.pdf', 'filename': 'missing.pdf'})
+    jobs.append({'assessment_id': 98, 'url': 'https://reliefweb.int/files/broken.pdf', 'filename': 'broken.pdf'})
+
+    results = []
+    progress = {0: [], 1: []}
+
+    def download(key, batch):
+        report = lambda completed, total, result: progress[key].append(
+            (completed, total, result['filename'], threading.current_thread().name))
+        results.extend(facade.download_all(batch, target_dir, db_path, progress_callback=report))
+
+    try:
+        threads = [threading.Thread(target=download, args=(key, batch)) for key, batch in enumerate((jobs[:3], jobs[3:]))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        assert facade.fetch_reports({'limit': 5})['totalCount'] == TOTAL_REPORTS
+    finally:
+        facade.close()
+
+    by_name = {r['filename']: r for r in results}
+    print(f"Statuses: {sorted((name, r['status']) for name, r in by_name.items())}")
+    for i, payload in enumerate(FILES.values()):
+        result = by_name[f'record_{i}.pdf']
+        assert result['status'] == 'downloaded'
+        assert result['checksum'] == hashlib.sha256(payload).hexdigest()
+        with open(result['file_path'], 'rb') as f:
+            assert f.read() == payload
+    assert by_name['missing.pdf']['error'] == 'HTTP 404'
+    assert by_name['broken.pdf']['status'] == 'failed'
+    # Neither failure leaves a final or temp file behind
+    assert sorted(os.listdir(target_dir)) == sorted(f'record_{i}.pdf' for i in range(len(FILES)))
+    assert get_connection(db_path).execute("SELECT COUNT(*) FROM document_downloads").fetchone()[0] == len(FILES)
+    assert server.max_files_in_flight == 2
+    # Each batch reports every file once, counting up to its own total
+    for key, batch in enumerate((jobs[:3], jobs[3:])):
+        assert [(completed, total) for completed, total, _, _ in progress[key]] == [(i, len(batch)) for i in range(1, len(batch) + 1)]
+        assert sorted(name for _, _, name, _ in progress[key]) == sorted(job['filename'] for job in batch)
+        assert all(thread.startswith('reliefweb-db') for _, _, _, thread in progress[key])
+    assert len(recording_threads) == 1 and recording_threads.pop().startswith('reliefweb-db')
+    # Chunks are written by the small file pool, not one thread per download
+    assert 0 < len(writing_threads) <= AsyncReliefWebClient.FILE_WRITERS
+    assert all(name.startswith('reliefweb-file') for name in writing_threads)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,130 @@
+"""
+Test script for incremental ReliefWeb sync and its high-water marks.
+Uses a fake HTTP session and a temporary database, no API access needed.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.reliefweb_api as reliefweb_api
+from utils.reliefweb_api import ReliefWebAPI
+import app.main.routes as routes
+from utils.reliefweb_sync import build_sync_key, needs_full_sync, sync_reliefweb
+from utils.db_utils import get_sync_state, update_sync_state
+from conftest import FakeSession, find_condition
+
+FILTERS = {'country': 'Sudan', 'format': 'Assessment', 'country_filter_type': 'primary'}
+
+def make_item(report_id, changed, theme='Health'):
+    return {'id': report_id, 'fields': {
+        'title': f'Sudan Assessment {report_id}',
+        'date': {'created': '2024-01-01T00:00:00+00:00', 'changed': changed},
+        'format': [{'name': 'Assessment'}],
+        'theme': [{'name': theme}],
+        'primary_country': {'name': 'Sudan'},
+        'country': [{'name': 'Sudan'}]
+    }}
+
+class SyncSession(FakeSession):
+    """Serves stored items, honouring the theme and date.changed filters"""
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = items
+
+    def respond(self, json):
+        items = self.items
+        theme = find_condition(json.get('filter'), 'theme.name')
+        if theme:
+            items = [i for i in items if i['fields']['theme'][0]['name'] == theme['value']]
+        changed = find_condition(json.get('filter'), 'date.changed')
+        if changed:
+            items = [i for i in items if i['fields']['date']['changed'] >= changed['value']['from']]
+        return {'totalCount': len(items), 'data': items}
+
+@pytest.fixture
+def session(monkeypatch, db_path):
+    session = SyncSession([
+        make_item(1, '2024-03-01T00:00:00+00:00'),
+        make_item(2, '2024-03-05T00:00:00+00:00', theme='Protection')
+    ])
+    api = ReliefWebAPI(db_path=db_path)
+    api.session = session
+    monkeypatch.setattr(reliefweb_api, 'reliefweb_api', api)
+    return session
+
+def test_mark_advances_and_delta_follows(session, db_path):
+    """A full pass sets the mark; the next run is a delta from it"""
+    print("\n🧪 Testing mark advance")
+
+    result = sync_reliefweb(db_path, FILTERS)
+    assert result['mode'] == 'full' and result['new_saved'] == 2
+    assert result['last_changed'] == '2024-03-05T00:00:00+00:00' and result['last_report_id'] == 2
+    assert find_condition(session.payloads[-1].get('filter'), 'date.changed') is None
+
+    session.items.append(make_item(3, '2024-03-09T00:00:00+00:00'))
+    result = sync_reliefweb(db_path, FILTERS)
+    print(f"Delta sync: {result}")
+    assert result['mode'] == 'delta'
+    assert find_condition(session.payloads[-1]['filter'], 'date.changed')['value'] == {'from': '2024-03-05T00:00:00+00:00'}
+    assert result['total_fetched'] == 2 and result['new_saved'] == 1
+    assert get_sync_state(db_path, build_sync_key(FILTERS))['last_changed'] == '2024-03-09T00:00:00+00:00'
+
+    assert sync_reliefweb(db_path, FILTERS, force_full=True)['mode'] == 'full'
+
+def test_full_sync_selection():
+    """Missing or stale reconciliation forces a full pass"""
+    print("\n🧪 Testing delta vs full selection")
+    now = datetime.now()
+    assert needs_full_sync(None)
+    assert needs_full_sync({'last_changed': None, 'last_full_sync': now.isoformat()})
+    assert needs_full_sync({'last_changed': '2024-03-01', 'last_full_sync': None})
+    assert needs_full_sync({'last_changed': '2024-03-01', 'last_full_sync': (now - timedelta(days=8)).isoformat()})
+    assert not needs_full_sync({'last_changed': '2024-03-01', 'last_full_sync': (now - timedelta(days=1)).isoformat()})
+
+def test_filtered_sync_keeps_its_own_mark(session, db_path):
+    """A theme-filtered sync doesn't advance the unfiltered query's mark"""
+    print("\n🧪 Testing filter key isolation")
+    base_key = build_sync_key(FILTERS)
+    themed = dict(FILTERS, theme='Protection')
+    assert build_sync_key(themed) != base_key
+    assert build_sync_key(dict(FILTERS, **{'date.from': '2024-01-01'})) == build_sync_key(dict(FILTERS, date_from='2024-01-01'))
+
+    update_sync_state(db_path, base_key, 'Sudan', 'Assessment', 'primary',
+                      '2024-02-01T00:00:00+00:00', 0, full_sync=True)
+    session.items.append(make_item(3, '2024-04-01T00:00:00+00:00', theme='Protection'))
+
+    assert sync_reliefweb(db_path, themed)['mode'] == 'full'
+    assert get_sync_state(db_path, base_key)['last_changed'] == '2024-02-01T00:00:00+00:00'
+
+    result = sync_reliefweb(db_path, FILTERS)
+    assert result['mode'] == 'delta' and result['total_fetched'] == 3
+
+def test_failed_sync_returns_partial_result(session, db_path, monkeypatch):
+    """A page that keeps failing leaves the mark alone; the route reports what was saved"""
+    print("\n🧪 Testing partial sync result")
+    session.items = [make_item(i, '2024-03-01T00:00:00+00:00') for i in range(1, 1201)]
+    respond = session.respond
+
+    def drop_second_page(payload):
+        if payload.get('offset'):
+            raise ConnectionError('page dropped')
+        return respond(payload)
+
+    session.respond = drop_second_page
+    monkeypatch.setattr(routes, 'DB_PATH', db_path)
+    with Flask(__name__).app_context():
+        result = routes.extract_rw(dict(FILTERS, sync=True))
+    print(f"Result: {result['message']}")
+    assert not result['success']
+    assert result['data']['failed_offsets'] == [1000]
+    assert result['data']['total_fetched'] == result['data']['new_saved'] == 1200
+    assert get_sync_state(db_path, build_sync_key(FILTERS)) is None
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,204 @@
+"""
+Test script for semantic search over the vector index.
+Uses a temporary database and index with a small deterministic model.
+"""
+import os
+import sys
+import tempfile
+
+import fitz
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.embedding_service as embedding_service
+import utils.semantic_search as semantic_search
+import utils.vector_db_utils as vector_db_utils
+from utils.db_utils import init_db, record_document_download, record_content_extraction
+from utils.db_connection import get_connection
+from utils.embedding_service import EmbeddingService
+from utils.extraction_queue import extract_document
+from utils.vector_db_utils import VectorDatabaseManager, index_document_embeddings
+
+TOPICS = ['cholera', 'displacement', 'famine']
+
+class TopicModel:
+    """One dimension per topic keyword, counted in the text; records what it encodes"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        vectors = np.array([[text.lower().count(topic) for topic in TOPICS] + [0.1] for text in texts],
+                           dtype=np.float32)
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+def make_search_index(monkeypatch):
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, 'test.db')
+    init_db(db_path)
+    model = TopicModel()
+    monkeypatch.setattr(embedding_service, '_service', EmbeddingService(db_path, model_name='topic-model', model=model))
+    semantic_search._result_cache.clear()
+
+    conn = get_connection(db_path)
+    for report_id, title in ((101, 'Cholera outbreak in Kassala'), (102, 'Displacement in Darfur')):
+        conn.execute("INSERT INTO assessments (report_id, title, primary_country, url) VALUES (?, ?, 'Sudan', ?)",
+                     (report_id, title, f'https://reliefweb.int/node/{report_id}'))
+    conn.commit()
+    assessment_ids = dict(conn.execute("SELECT report_id, id FROM assessments").fetchall())
+
+    vector_db = VectorDatabaseManager({'dimension': len(TOPICS) + 1,
+                                       'index_path': os.path.join(directory, 'vector_db', 'faiss.index'),
+                                       'metadata_path': os.path.join(directory, 'vector_db', 'metadata.jsonl')})
+    documents = {
+        101: ['Cholera cases rise. Cholera treatment centres open.', 'Famine risk is low.', 'Cholera in camps.'],
+        102: ['Displacement continues.', 'Displacement camps report some cholera.']
+    }
+    for report_id, texts in documents.items():
+        document_id = record_document_download(db_path, assessment_ids[report_id], f'{report_id}.pdf',
+                                               f'https://reliefweb.int/{report_id}.pdf', f'/tmp/{report_id}.pdf')
+        vector_db.add_embeddings(document_id, [{'chunk_id': i, 'text': t} for i, t in enumerate(texts)],
+                                 model.encode(texts, normalize_embeddings=True),
+                                 ids=[1000 + 10 * report_id + i for i in range(len(texts))])
+    # Vectors of a document that has since been removed from document_downloads
+    vector_db.add_embeddings(999, [{'chunk_id': 0, 'text': 'cholera cholera'}],
+                             model.encode(['cholera cholera'], normalize_embeddings=True), ids=[9990])
+    model.encoded.clear()
+    return db_path, vector_db, model
+
+def use_shared_index(monkeypatch, vector_db):
+    """Point get_vector_db() at the test index files"""
+    monkeypatch.setattr(vector_db_utils, 'DEFAULT_VECTOR_DB_CONFIG', vector_db.config)
+    monkeypatch.setattr(vector_db_utils, '_vector_db', None)
+
+def test_results_grouped_by_document(monkeypatch):
+    """Chunk hits are grouped per document, joined to assessments and ranked"""
+    print("\n🧪 Testing semantic search ranking")
+    db_path, vector_db, model = make_search_index(monkeypatch)
+
+    response = semantic_search.semantic_search('Cholera', limit=5, db_path=db_path, vector_db=vector_db)
+    results = response['results']
+    print(f"Results: {[(r['title'], r['score'], r['matching_chunks']) for r in results]}")
+    assert not response['cached']
+    assert [r['title'] for r in results] == ['Cholera outbreak in Kassala', 'Displacement in Darfur']
+    assert [r['rank'] for r in results] == [1, 2]
+    assert results[0]['matching_chunks'] == 3
+    assert len(results[0]['snippets']) == 3
+    assert results[0]['snippets'][0]['text'].startswith('Cholera')
+    assert results[0]['country'] == 'Sudan'
+    assert results[0]['url'] == 'https://reliefweb.int/node/101'
+
+    limited = semantic_search.semantic_search('cholera', limit=1, db_path=db_path, vector_db=vector_db)
+    assert len(limited['results']) == 1
+
+def test_repeated_queries_are_cached(monkeypatch):
+    """Repeat queries skip the model and index until the index changes"""
+    print("\n🧪 Testing semantic search caches")
+    db_path, vector_db, model = make_search_index(monkeypatch)
+
+    first = semantic_search.semantic_search('famine', db_path=db_path, vector_db=vector_db)
+    repeat = semantic_search.semantic_search('  Famine ', db_path=db_path, vector_db=vector_db)
+    assert repeat['cached'] and repeat['results'] == first['results']
+    assert model.encoded == ['famine']
+
+    # A different limit misses the result cache but reuses the query embedding
+    semantic_search.semantic_search('famine', limit=1, db_path=db_path, vector_db=vector_db)
+    assert model.encoded == ['famine']
+
+    vector_db.delete_document_embeddings(999)
+    after_delete = semantic_search.semantic_search('famine', db_path=db_path, vector_db=vector_db)
+    assert not after_delete['cached']
+    assert model.encoded == ['famine']
+
+def test_empty_index(monkeypatch):
+    """An empty index answers without loading the model"""
+    print("\n🧪 Testing semantic search on an empty index")
+    db_path, vector_db, model = make_search_index(monkeypatch)
+    empty = VectorDatabaseManager(dict(vector_db.config, index_path=os.path.join(tempfile.mkdtemp(), 'faiss.index')))
+    response = semantic_search.semantic_search('cholera', db_path=db_path, vector_db=empty)
+    assert response['total_results'] == 0 and 'message' in response
+    assert model.encoded == []
+
+def test_rebuilt_index_is_reloaded(monkeypatch):
+    """A rebuild by another process is picked up and its old cached results dropped"""
+    print("\n🧪 Testing index reload after an external rebuild")
+    db_path, vector_db, model = make_search_index(monkeypatch)
+    use_shared_index(monkeypatch, vector_db)
+
+    first = semantic_search.semantic_search('displacement', db_path=db_path)
+    assert first['results'][0]['title'] == 'Displacement in Darfur'
+    assert semantic_search.semantic_search('displacement', db_path=db_path)['cached']
+
+    # The CLI rebuilds the index in its own process without the Darfur report
+    darfur_id = first['results'][0]['document_id']
+    VectorDatabaseManager(vector_db.config).delete_document_embeddings(darfur_id)
+
+    after = semantic_search.semantic_search('displacement', db_path=db_path)
+    assert not after['cached']
+    assert darfur_id not in [r['document_id'] for r in after['results']]
+
+def test_processed_documents_are_indexed(monkeypatch):
+    """Chunk embeddings stored by the pipeline become searchable straight away"""
+    print("\n🧪 Testing pipeline indexing")
+    db_path, vector_db, model = make_search_index(monkeypatch)
+    use_shared_index(monkeypatch, vector_db)
+    titles = lambda: [r['title'] for r in semantic_search.semantic_search('famine', db_path=db_path)['results']]
+    assert 'Famine in Kordofan' not in titles()
+
+    conn = get_connection(db_path)
+    conn.execute("INSERT INTO assessments (report_id, title, primary_country) VALUES (103, 'Famine in Kordofan', 'Sudan')")
+    conn.commit()
+    assessment_id = conn.execute("SELECT id FROM assessments WHERE report_id = 103").fetchone()[0]
+    document_id = record_document_download(db_path, assessment_id, '103.pdf', 'https://reliefweb.int/103.pdf', '/tmp/103.pdf')
+
+    texts = ['Famine conditions. Famine declared.', 'Markets closed.']
+    for round_texts in (texts, texts[:1]):
+        content_id = record_content_extraction(db_path, {
+            'document_id': document_id, 'content_text': ' '.join(round_texts),
+            'chunks': [{'chunk_id': i, 'text': t} for i, t in enumerate(round_texts)],
+            'embeddings': model.encode(round_texts, normalize_embeddings=True), 'embedding_model': 'topic-model'})
+        assert index_document_embeddings(db_path, document_id, content_id) == len(round_texts)
+
+    shared = vector_db_utils.get_vector_db()
+    assert len(shared._document_ids[document_id]) == 1
+    assert shared.get_total_embeddings() == 7
+    assert 'Famine in Kordofan' in titles()
+    assert not shared.changed_on_disk()
+
+def test_extracted_documents_are_searchable(monkeypatch, tmp_path):
+    """Extraction chunks, embeds and indexes a downloaded file, so search finds it"""
+    print("\n🧪 Testing extraction to search")
+    db_path, vector_db, model = make_search_index(monkeypatch)
+    use_shared_index(monkeypatch, vector_db)
+
+    conn = get_connection(db_path)
+    conn.execute("INSERT INTO assessments (report_id, title, primary_country) VALUES (104, 'Kordofan food security', 'Sudan')")
+    conn.commit()
+    assessment_id = conn.execute("SELECT id FROM assessments WHERE report_id = 104").fetchone()[0]
+    file_path = str(tmp_path / '104.pdf')
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), 'Famine conditions in Kordofan. Famine declared in two localities.')
+    doc.save(file_path)
+    doc.close()
+    document_id = record_document_download(db_path, assessment_id, '104.pdf', 'https://reliefweb.int/104.pdf', file_path)
+
+    result = extract_document(db_path, document_id)
+    print(f"Extraction: {result}")
+    assert result['success'] and result['chunk_count'] == 1
+    stored = conn.execute("""SELECT e.embedding_model, c.cleaned_text FROM document_embeddings e
+                             JOIN document_content c ON c.id = e.content_id WHERE c.document_id = ?""",
+                          (document_id,)).fetchall()
+    assert [row[0] for row in stored] == ['topic-model'] and 'Famine declared' in stored[0][1]
+
+    results = semantic_search.semantic_search('famine', db_path=db_path)['results']
+    hit = next(r for r in results if r['document_id'] == document_id)
+    assert hit['title'] == 'Kordofan food security'
+    assert 'Famine declared' in hit['snippets'][0]['text']
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
@@ -0,0 +1,235 @@
+"""
+Test script for batched adds and deferred persistence in VectorDatabaseManager.
+Uses a temporary directory, no embedding model needed.
+"""
+import os
+import sys
+import json
+import tempfile
+
+import faiss
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.vector_db_utils as vector_db_utils
+from utils.vector_db_utils import VectorDatabaseManager
+from utils.db_utils import record_content_extraction, store_chunk_embeddings, load_embedding_matrix
+
+DIMENSION = 16
+
+def make_config(**options):
+    directory = tempfile.mkdtemp()
+    return dict({'dimension': DIMENSION,
+                 'index_path': os.path.join(directory, 'vector_db', 'faiss.index'),
+                 'metadata_path': os.path.join(directory, 'vector_db', 'metadata.jsonl')}, **options)
+
+def make_clustered_vectors(count, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((20, DIMENSION))
+    return (centres[rng.integers(0, 20, count)] + 0.3 * rng.standard_normal((count, DIMENSION))).astype(np.float32)
+
+def make_chunks(count):
+    return [{'chunk_id': i, 'text': f'chunk {i}'} for i in range(count)]
+
+def test_bulk_add_writes_once():
+    """A 200-chunk document costs one index write; metadata is appended"""
+    print("\n🧪 Testing batched vector adds")
+    config = make_config()
+    writes = []
+    original_write_index = vector_db_utils.faiss.write_index
+    vector_db_utils.faiss.write_index = lambda index, path: writes.append(path) or original_write_index(index, path)
+    try:
+        manager = VectorDatabaseManager(config)
+        vector_ids = manager.add_embeddings(1, make_chunks(200), np.random.rand(200, DIMENSION))
+        assert len(vector_ids) == 200
+        assert len(writes) == 1
+
+        with manager:
+            for document_id in (2, 3, 4):
+                manager.add_embeddings(document_id, make_chunks(10), np.random.rand(10, DIMENSION), flush=False)
+            assert len(writes) == 1
+        assert len(writes) == 2
+    finally:
+        vector_db_utils.faiss.write_index = original_write_index
+
+    assert not os.path.exists(config['index_path'] + '.tmp')
+    with open(config['metadata_path']) as f:
+        assert len(f.readlines()) == 230
+
+    reloaded = VectorDatabaseManager(config)
+    print(f"Reloaded {reloaded.get_total_embeddings()} vectors")
+    assert reloaded.get_total_embeddings() == 230
+    assert reloaded.metadata['229']['document_id'] == 4
+    assert np.allclose(np.linalg.norm(reloaded.index.reconstruct(0)), 1.0)
+
+    assert reloaded.delete_document_embeddings(1)
+    assert VectorDatabaseManager(config).get_total_embeddings() == 30
+
+def test_legacy_and_stale_metadata():
+    """The old JSON dict format loads, and lines without vectors are dropped"""
+    print("\n🧪 Testing metadata recovery")
+    config = make_config()
+    manager = VectorDatabaseManager(config)
+    manager.add_embeddings(1, make_chunks(3), np.random.rand(3, DIMENSION))
+
+    # Simulate a crash after the metadata append but before the index write
+    with open(config['metadata_path'], 'a') as f:
+        f.write(json.dumps({'idx': 3, 'document_id': 9, 'text': 'lost'}) + '\n')
+    manager = VectorDatabaseManager(config)
+    assert sorted(manager.metadata) == ['0', '1', '2']
+    manager.add_embeddings(2, make_chunks(1), np.random.rand(1, DIMENSION))
+    assert VectorDatabaseManager(config).metadata['3']['document_id'] == 2
+
+    # Older versions wrote one indented JSON dict
+    legacy = {str(i): {'vector_id': f'v{i}', 'document_id': 5} for i in range(4)}
+    with open(config['metadata_path'], 'w') as f:
+        json.dump(legacy, f, indent=2)
+    manager = VectorDatabaseManager(config)
+    assert manager.metadata == legacy
+    manager.add_embeddings(6, make_chunks(1), np.random.rand(1, DIMENSION))
+    assert VectorDatabaseManager(config).metadata['4']['document_id'] == 6
+
+def test_stable_ids_and_true_deletes():
+    """Deletes and replacements touch only one document and ids never shift"""
+    print("\n🧪 Testing ID-mapped deletes")
+    config = make_config()
+    with VectorDatabaseManager(config) as manager:
+        manager.add_embeddings(1, make_chunks(3), np.random.rand(3, DIMENSION), ids=[101, 102, 103], flush=False)
+        manager.add_embeddings(2, make_chunks(2), np.random.rand(2, DIMENSION), ids=[201, 202], flush=False)
+        manager.add_embeddings(3, make_chunks(2), np.random.rand(2, DIMENSION), ids=[203, 204], flush=False)
+    assert sorted(manager.metadata, key=int) == ['101', '102', '103', '201', '202', '203', '204']
+
+    # Locally allocated ids could collide with future document_embeddings rows
+    assert manager.add_embeddings(4, make_chunks(1), np.random.rand(1, DIMENSION)) == []
+    assert VectorDatabaseManager(config).add_embeddings(4, make_chunks(1), np.random.rand(1, DIMENSION)) == []
+
+    vector = manager.index.reconstruct(202)
+    assert manager.delete_document_embeddings(1)
+    assert manager.get_total_embeddings() == 4
+    assert np.array_equal(manager.index.reconstruct(202), vector)
+
+    # Re-embedding document 2 replaces its vectors, even under the same ids
+    replacement = np.random.rand(2, DIMENSION)
+    manager.replace_document_embeddings(2, make_chunks(2), replacement, ids=[201, 202])
+    updated = np.random.rand(1, DIMENSION)
+    manager.add_embeddings(2, make_chunks(1), updated, ids=[202])
+    assert manager.get_total_embeddings() == 4
+
+    reloaded = VectorDatabaseManager(config)
+    assert sorted(reloaded.metadata, key=int) == ['201', '202', '203', '204']
+    assert reloaded.metadata['202']['chunk_index'] == 0
+    expected = updated[0] / np.linalg.norm(updated[0])
+    assert np.allclose(reloaded.index.reconstruct(202), expected, atol=1e-6)
+    scores, ids = reloaded.index.search(expected.reshape(1, -1).astype(np.float32), 1)
+    assert ids[0][0] == 202
+
+def test_positional_index_is_converted():
+    """Indexes written before ID mapping keep their positions as ids"""
+    print("\n🧪 Testing positional index upgrade")
+    config = make_config()
+    os.makedirs(os.path.dirname(config['index_path']))
+    vectors = np.random.rand(3, DIMENSION).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    flat = faiss.IndexFlatIP(DIMENSION)
+    flat.add(vectors)
+    faiss.write_index(flat, config['index_path'])
+    with open(config['metadata_path'], 'w') as f:
+        json.dump({str(i): {'document_id': 7, 'text': f'chunk {i}'} for i in range(3)}, f, indent=2)
+
+    manager = VectorDatabaseManager(config)
+    assert isinstance(manager.index, faiss.IndexIDMap2)
+    assert np.allclose(manager.index.reconstruct(2), vectors[2])
+    assert manager.find_similar_documents(7) == []
+    assert manager.delete_document_embeddings(7)
+    assert VectorDatabaseManager(config).get_total_embeddings() == 0
+
+def test_approximate_index_modes():
+    """IVF and HNSW indexes train on build, honour search knobs and report recall"""
+    print("\n🧪 Testing approximate index modes")
+    vectors = make_clustered_vectors(2000)
+    ids = np.arange(1000, 3000)
+    entries = [{'document_id': i // 10, 'chunk_index': i % 10, 'text': f'chunk {i}'} for i in ids.tolist()]
+
+    for index_type, min_recall in [('ivf_flat', 0.99), ('ivf_pq', 0.2), ('hnsw', 0.95)]:
+        config = make_config(index_type=index_type, nlist=32, nprobe=4, pq_m=4, pq_nbits=4, ef_search=32)
+        manager = VectorDatabaseManager(config)
+        if index_type != 'hnsw':
+            assert manager.add_embeddings(1, make_chunks(1), vectors[:1]) == []
+        assert manager.build_index(ids, vectors, entries)
+
+        report = manager.recall_report(ids, vectors, k=10, num_queries=50, nprobe_values=(1, 32), ef_search_values=(8, 256))
+        for row in report:
+            print(f"{row['index_type']:<9} {str(row['setting']):<14} recall={row['recall']:.3f} p50={row['latency_ms_p50']:.3f}ms")
+        assert report[0]['index_type'] == 'flat' and report[0]['recall'] == 1.0
+        assert len(report) == 3
+        assert report[-1]['recall'] >= min_recall
+        assert report[-1]['recall'] >= report[1]['recall']
+
+        # Configured knobs are restored after the report and on reload
+        reloaded = VectorDatabaseManager(config)
+        assert reloaded.get_total_embeddings() == 2000
+        if index_type == 'hnsw':
+            assert faiss.downcast_index(reloaded.index.index).hnsw.efSearch == 32
+        else:
+            assert faiss.extract_index_ivf(reloaded.index).nprobe == 4
+
+        similar = reloaded.find_similar_documents(100, top_k=3)
+        assert len(similar) == 3 and 100 not in [r['document_id'] for r in similar]
+
+        assert reloaded.delete_document_embeddings(100)
+        assert reloaded.add_embeddings(500, make_chunks(2), vectors[:2]) == []
+        assert reloaded.add_embeddings(500, make_chunks(2), vectors[:2], ids=[5000, 5001])
+        assert reloaded.get_total_embeddings() == 1992
+        assert reloaded.metadata['5000']['document_id'] == 500
+
+        # Surviving ids still map to their own vectors after the delete (PQ codes are lossy)
+        if index_type != 'ivf_pq':
+            _, found = reloaded.index.search(vectors[1500:1501] / np.linalg.norm(vectors[1500]), 1)
+            assert found[0][0] == 2500
+        assert reloaded.find_similar_documents(149, top_k=1)
+
+def test_id_mapped_ivf_is_converted():
+    """IVF indexes written inside an IndexIDMap2 move to native ids on load"""
+    print("\n🧪 Testing ID-mapped IVF upgrade")
+    config = make_config(index_type='ivf_flat', nprobe=4)
+    os.makedirs(os.path.dirname(config['index_path']))
+    vectors = make_clustered_vectors(400)
+    faiss.normalize_L2(vectors)
+    wrapped = faiss.index_factory(DIMENSION, 'IDMap2,IVF4,Flat', faiss.METRIC_INNER_PRODUCT)
+    wrapped.train(vectors)
+    wrapped.add_with_ids(vectors, np.arange(1000, 1400))
+    faiss.write_index(wrapped, config['index_path'])
+    with open(config['metadata_path'], 'w') as f:
+        for i in range(400):
+            f.write(json.dumps({'idx': 1000 + i, 'document_id': i // 4, 'text': f'chunk {i}', 'external_id': True}) + '\n')
+
+    manager = VectorDatabaseManager(config)
+    assert not isinstance(manager.index, faiss.IndexIDMap2)
+    assert len(manager.metadata) == 400
+    assert np.allclose(manager.index.reconstruct(1003), vectors[3])
+    assert manager.delete_document_embeddings(0)
+    _, found = manager.index.search(vectors[4:5], 1)
+    assert found[0][0] == 1004
+    assert VectorDatabaseManager(config).get_total_embeddings() == 396
+
+def test_build_from_database(db_path):
+    """The index can be rebuilt from the embeddings stored in SQLite"""
+    print("\n🧪 Testing index build from stored embeddings")
+    vectors = make_clustered_vectors(60, seed=1)
+    for document_id in (7, 8, 9):
+        content_id = record_content_extraction(db_path, {'document_id': document_id, 'content_text': 'text'})
+        rows = slice((document_id - 7) * 20, (document_id - 6) * 20)
+        store_chunk_embeddings(db_path, content_id, make_chunks(20), vectors[rows], model='m')
+
+    manager = VectorDatabaseManager(make_config(index_type='hnsw'))
+    assert manager.build_from_database(db_path)
+    ids, _ = load_embedding_matrix(db_path)
+    assert sorted(map(int, manager.metadata)) == ids.tolist()
+    assert manager.metadata[str(ids[25])]['document_id'] == 8
+    assert manager.metadata[str(ids[25])]['text'] == 'chunk 5'
+    assert [r['document_id'] for r in manager.find_similar_documents(7, top_k=2)]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, '-s']))
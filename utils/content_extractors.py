@@ -3,9 +3,13 @@ Content extractors for different file types
 """
 import os
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import PyPDF2
 import pdfplumber
 from docx import Document
@@ -14,6 +18,9 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever extractor output changes so cached extractions are redone
+EXTRACTOR_VERSION = '2'
+
 @dataclass
 class ExtractedContent:
     """Container for extracted content and metadata"""
@@ -43,87 +50,114 @@ class BaseExtractor(ABC):
         """Validate that file exists and is readable"""
         return os.path.exists(file_path) and os.path.isfile(file_path)
 
-class PDFExtractor(BaseExtractor):
-    """Extract text from PDF files using multiple methods"""
-    
-    def extract(self, file_path: str) -> ExtractedContent:
-        try:
-            if not self.validate_file(file_path):
-                raise ValueError(f"Invalid file: {file_path}")
+# Confidence of text recovered by each PDF backend
+PDF_METHOD_CONFIDENCE = {'pymupdf': 0.95, 'pdfplumber': 0.9, 'pypdf2': 0.7}
 
-            # Try PyMuPDF first (fastest)
-            text, page_count = self._extract_with_pymupdf(file_path)
-            confidence = 0.95
+def pdf_page_count(file_path: str) -> int:
+    """Count the pages of a PDF, trying each backend in turn"""
+    try:
+        import fitz  # PyMuPDF
+        with fitz.open(file_path) as doc:
+            return len(doc)
+    except Exception as e:
+        logger.warning(f"PyMuPDF could not open {file_path}: {e}")
+    try:
+        with pdfplumber.open(file_path) as pdf:
+            return len(pdf.pages)
+    except Exception as e:
+        logger.warning(f"pdfplumber could not open {file_path}: {e}")
+    try:
+        with open(file_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+    except Exception as e:
+        logger.warning(f"PyPDF2 could not open {file_path}: {e}")
+        return 0
 
-            # Fallback to pdfplumber if PyMuPDF fails
-            if not text.strip():
-                text, page_count = self._extract_with_pdfplumber(file_path)
-                confidence = 0.9
+def extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    """Extract pages [start, end) with PyMuPDF; unreadable pages come back empty"""
+    pages = []
+    try:
+        import fitz  # PyMuPDF
+        with fitz.open(file_path) as doc:
+            for page_number in range(start, min(end, len(doc))):
+                pages.append(doc[page_number].get_text() or '')
+    except Exception as e:
+        logger.warning(f"PyMuPDF failed for {file_path} pages {start}-{end}: {e}")
+    return pages + [''] * (end - start - len(pages))
 
-            # Fallback to PyPDF2 if both fail
-            if not text.strip():
-                text, page_count = self._extract_with_pypdf2(file_path)
-                confidence = 0.7
+def extract_pdf_pages_fallback(file_path: str, page_numbers: List[int]) -> Dict[int, Tuple[str, str]]:
+    """
+    Re-extract only the given pages with pdfplumber, then PyPDF2
 
-            return ExtractedContent(
-                text=text,
-                page_count=page_count,
-                confidence=confidence,
-                metadata={'extraction_method': 'pdf', 'file_size': os.path.getsize(file_path)}
-            )
+    Returns:
+        dict: page number -> (text, method) for pages that yielded text
+    """
+    recovered = {}
+    try:
+        with pdfplumber.open(file_path) as pdf:
+            for page_number in page_numbers:
+                page_text = pdf.pages[page_number].extract_text() or ''
+                if page_text.strip():
+                    recovered[page_number] = (page_text, 'pdfplumber')
+    except Exception as e:
+        logger.warning(f"pdfplumber failed for {file_path}: {e}")
 
-        except Exception as e:
-            logger.error(f"Error extracting PDF {file_path}: {e}")
-            return ExtractedContent(text="", confidence=0.0)
-    
-    def _extract_with_pdfplumber(self, file_path: str) -> tuple:
-        """Extract using pdfplumber (better for tables)"""
-        try:
-            with pdfplumber.open(file_path) as pdf:
-                text_parts = []
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(page_text)
-                
-                return '\n'.join(text_parts), len(pdf.pages)
-                
-        except Exception as e:
-            logger.warning(f"pdfplumber failed for {file_path}: {e}")
-            return "", 0
-    
-    def _extract_with_pypdf2(self, file_path: str) -> tuple:
-        """Extract using PyPDF2 (fallback method)"""
+    remaining = [n for n in page_numbers if n not in recovered]
+    if remaining:
         try:
             with open(file_path, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
-                text_parts = []
-                
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(page_text)
-                
-                return '\n'.join(text_parts), len(reader.pages)
-                
+                for page_number in remaining:
+                    page_text = reader.pages[page_number].extract_text() or ''
+                    if page_text.strip():
+                        recovered[page_number] = (page_text, 'pypdf2')
         except Exception as e:
             logger.warning(f"PyPDF2 failed for {file_path}: {e}")
-            return "", 0
+
+    return recovered
+
+def assemble_pdf_content(file_path: str, pages: List[str],
+                         recovered: Dict[int, Tuple[str, str]]) -> ExtractedContent:
+    """Join page texts in page order, preferring fallback text for empty pages"""
+    text_parts = []
+    page_methods = {}
+    for page_number, page_text in enumerate(pages):
+        method = 'pymupdf'
+        if not page_text.strip():
+            page_text, method = recovered.get(page_number, ('', None))
+        if page_text.strip():
+            text_parts.append(page_text)
+            page_methods[method] = page_methods.get(method, 0) + 1
+
+    pages_with_text = sum(page_methods.values())
+    confidence = (sum(PDF_METHOD_CONFIDENCE[m] * n for m, n in page_methods.items()) / pages_with_text
+                  if pages_with_text else 0.0)
+
+    return ExtractedContent(
+        text='\n'.join(text_parts),
+        page_count=len(pages),
+        confidence=round(confidence, 3),
+        metadata={'extraction_method': 'pdf', 'file_size': os.path.getsize(file_path),
+                  'page_methods': page_methods, 'empty_pages': len(pages) - pages_with_text}
+    )
+
+class PDFExtractor(BaseExtractor):
+    """Extract text from PDF files page by page using multiple methods"""
     
-    def _extract_with_pymupdf(self, file_path: str) -> tuple:
-        """Extract using PyMuPDF (fitz) - very fast"""
+    def extract(self, file_path: str) -> ExtractedContent:
         try:
-            import fitz  # PyMuPDF
-            doc = fitz.open(file_path)
-            text_parts = []
-            for page in doc:
-                page_text = page.get_text()
-                if page_text:
-                    text_parts.append(page_text)
-            return '\n'.join(text_parts), len(doc)
+            if not self.validate_file(file_path):
+                raise ValueError(f"Invalid file: {file_path}")
+
+            # PyMuPDF first (fastest), then the slower extractors on empty pages only
+            pages = extract_pdf_pages(file_path, 0, pdf_page_count(file_path))
+            empty_pages = [n for n, page_text in enumerate(pages) if not page_text.strip()]
+            recovered = extract_pdf_pages_fallback(file_path, empty_pages) if empty_pages else {}
+            return assemble_pdf_content(file_path, pages, recovered)
+
         except Exception as e:
-            logger.warning(f"PyMuPDF failed for {file_path}: {e}")
-            return "", 0
+            logger.error(f"Error extracting PDF {file_path}: {e}")
+            return ExtractedContent(text="", confidence=0.0)
     
     def supports_format(self, file_path: str) -> bool:
         return file_path.lower().endswith('.pdf')
@@ -281,4 +315,135 @@ def extract_content(file_path: str) -> ExtractedContent:
         return extractor.extract(file_path)
     else:
         logger.error(f"No extractor available for file: {file_path}")
-        return ExtractedContent(text="", confidence=0.0, metadata={'error': 'Unsupported file format'})
\ No newline at end of file
+        return ExtractedContent(text="", confidence=0.0, metadata={'error': 'Unsupported file format'})
+
+class ParallelExtractionEngine:
+    """Extract documents over a process pool, splitting large PDFs into page ranges
+
+    PDF page ranges are extracted with PyMuPDF in parallel and reassembled in
+    page order; only pages that came back empty are sent to the slower
+    pdfplumber/PyPDF2 fallback. Other formats run as one task per file.
+
+    Workers are spawned rather than forked, since the pool is created from a
+    threaded server. If a worker dies (e.g. a parser crash on a bad file) the
+    pool is replaced and the affected files are retried once.
+    """
+
+    PAGES_PER_TASK = 25
+
+    def __init__(self, max_workers: int = None, pages_per_task: int = None):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.pages_per_task = pages_per_task or self.PAGES_PER_TASK
+        self._executor_lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _replace_executor(self, broken: ProcessPoolExecutor):
+        """Swap in a fresh pool, unless another thread already replaced this one"""
+        with self._executor_lock:
+            if self._executor is broken:
+                logger.warning("♻️ Extraction process pool broke, starting a new one")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+
+    def extract(self, file_path: str) -> ExtractedContent:
+        """Extract a single document"""
+        return self.extract_many([file_path])[file_path]
+
+    def extract_many(self, file_paths: List[str]) -> Dict[str, ExtractedContent]:
+        """
+        Extract a batch of documents concurrently
+
+        Returns:
+            dict: file path -> ExtractedContent (empty content on failure)
+        """
+        executor = self._executor
+        results, broken = self._extract_many(executor, file_paths)
+        if broken:
+            self._replace_executor(executor)
+            logger.warning(f"🔁 Retrying {len(broken)} files after a worker crash")
+            executor = self._executor
+            retried, still_broken = self._extract_many(executor, broken)
+            results.update(retried)
+            if still_broken:
+                logger.error(f"❌ Worker crashed again on {len(still_broken)} files: {still_broken}")
+                self._replace_executor(executor)
+        return results
+
+    def _extract_many(self, executor: ProcessPoolExecutor,
+                      file_paths: List[str]) -> Tuple[Dict[str, ExtractedContent], List[str]]:
+        """One extraction pass; also returns the files lost to a broken pool"""
+        results = {}
+        broken = []
+        page_tasks = {}
+        file_tasks = {}
+
+        def failed(file_path, e, label='Error extracting'):
+            if isinstance(e, BrokenProcessPool):
+                broken.append(file_path)
+            else:
+                logger.error(f"{label} {file_path}: {e}")
+            results[file_path] = ExtractedContent(text="", confidence=0.0)
+
+        # Fan out: page ranges for PDFs, whole files for everything else
+        for file_path in file_paths:
+            try:
+                if not os.path.isfile(file_path):
+                    raise ValueError(f"Invalid file: {file_path}")
+                if file_path.lower().endswith('.pdf'):
+                    page_count = pdf_page_count(file_path)
+                    page_tasks[file_path] = [
+                        executor.submit(extract_pdf_pages, file_path, start,
+                                        min(start + self.pages_per_task, page_count))
+                        for start in range(0, page_count, self.pages_per_task)
+                    ]
+                else:
+                    file_tasks[file_path] = executor.submit(extract_content, file_path)
+            except Exception as e:
+                failed(file_path, e)
+
+        # Reassemble page ranges and queue fallback work for empty pages only
+        pdf_pages = {}
+        fallback_tasks = {}
+        for file_path, futures in page_tasks.items():
+            try:
+                pages = [page_text for future in futures for page_text in future.result()]
+                empty_pages = [n for n, page_text in enumerate(pages) if not page_text.strip()]
+                if empty_pages:
+                    fallback_tasks[file_path] = executor.submit(extract_pdf_pages_fallback,
+                                                                file_path, empty_pages)
+                pdf_pages[file_path] = pages
+            except Exception as e:
+                failed(file_path, e, 'Error extracting PDF')
+
+        for file_path, pages in pdf_pages.items():
+            try:
+                recovered = fallback_tasks[file_path].result() if file_path in fallback_tasks else {}
+                results[file_path] = assemble_pdf_content(file_path, pages, recovered)
+            except Exception as e:
+                failed(file_path, e, 'Error extracting PDF')
+
+        for file_path, future in file_tasks.items():
+            try:
+                results[file_path] = future.result()
+            except Exception as e:
+                failed(file_path, e)
+
+        return results, broken
+
+    def close(self):
+        """Shut down the worker processes"""
+        self._executor.shutdown(wait=True)
+
+_engine: Optional[ParallelExtractionEngine] = None
+_engine_lock = threading.Lock()
+
+def get_extraction_engine() -> ParallelExtractionEngine:
+    """Get the process-wide extraction engine, creating it on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ParallelExtractionEngine()
+        return _engine
@@ -4,47 +4,111 @@ Content processing utilities for text cleaning, chunking, and metadata extractio
 
 import re
 import logging
-import spacy
+import threading
 from typing import List, Dict, Any, Tuple
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from textstat import flesch_reading_ease, gunning_fog
-from sklearn.feature_extraction.text import TfidfVectorizer
-import nltk
 from collections import Counter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SPACY_MODEL = "en_core_web_sm"
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+# Pipeline components whose output nothing here reads; disabled while parsing
+UNUSED_SPACY_COMPONENTS = ['lemmatizer']
+
+def _load_spacy_pipeline():
+    """Full spaCy pipeline (tagger, parser, NER), downloading it if needed"""
+    import spacy
+    try:
+        return spacy.load(SPACY_MODEL)
+    except OSError:
+        logger.warning("spaCy model not found. Installing...")
+        spacy.cli.download(SPACY_MODEL)
+        return spacy.load(SPACY_MODEL)
+
+def _load_sentencizer():
+    """Rule-based sentence splitter; no statistical model to load"""
+    import spacy
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+def _load_embedding_model():
+    """Sentence transformer used for chunk embeddings"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL)
+
 class ContentProcessor:
-    """Main content processor for text cleaning, chunking, and metadata extraction"""
+    """Main content processor for text cleaning, chunking, and metadata extraction
+    
+    Models are loaded on first use, so importing this module is cheap and
+    callers only pay for the components they touch (chunking needs just the
+    sentencizer, not the full NER pipeline).
+    """
+    
+    _loaders = {
+        'nlp': _load_spacy_pipeline,
+        'sentencizer': _load_sentencizer,
+        'embedding_model': _load_embedding_model
+    }
     
     def __init__(self):
-        self.nlp = None
-        self.embedding_model = None
-        self._load_models()
+        self._models = {}
+        self._lock = threading.Lock()
     
-    def _load_models(self):
-        """Load spaCy and embedding models"""
-        try:
-            # Load spaCy model (download if needed)
-            try:
-                self.nlp = spacy.load("en_core_web_sm")
-            except OSError:
-                logger.warning("spaCy model not found. Installing...")
-                spacy.cli.download("en_core_web_sm")
-                self.nlp = spacy.load("en_core_web_sm")
-            
-            # Load sentence transformer for embeddings
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("Content processing models loaded successfully")
-            
-        except Exception as e:
-            logger.error(f"Error loading models: {e}")
-            # Fallback to basic processing
-            self.nlp = None
-            self.embedding_model = None
+    def _get_model(self, name: str):
+        """Load a model once, on first use; a failed load is remembered as None"""
+        if name not in self._models:
+            with self._lock:
+                if name not in self._models:
+                    try:
+                        self._models[name] = self._loaders[name]()
+                        logger.info(f"Loaded {name} model")
+                    except Exception as e:
+                        logger.error(f"Error loading {name} model: {e}")
+                        # Fallback to basic processing
+                        self._models[name] = None
+        return self._models[name]
+    
+    @property
+    def nlp(self):
+        return self._get_model('nlp')
+    
+    @property
+    def sentencizer(self):
+        return self._get_model('sentencizer')
+    
+    @property
+    def embedding_model(self):
+        return self._get_model('embedding_model')
+    
+    def warm_up(self, components: Tuple[str, ...] = ('nlp', 'sentencizer', 'embedding_model')) -> Dict[str, bool]:
+        """Load models ahead of first use; returns which ones are available"""
+        return {name: self._get_model(name) is not None for name in components}
+    
+    def parse_documents(self, texts: List[str], batch_size: int = 16, n_process: int = 1, analyze: bool = True) -> List[Any]:
+        """Parse each text once with nlp.pipe
+        
+        With analyze=True the full pipeline runs (sentences, entities, POS);
+        otherwise only the sentencizer. Returns one Doc per text, or None for
+        empty texts and when spaCy is unavailable.
+        """
+        nlp = (self.nlp if analyze else None) or self.sentencizer
+        docs = [None] * len(texts)
+        if not nlp:
+            return docs
+        
+        indexes = [i for i, text in enumerate(texts) if text and text.strip()]
+        disabled = [name for name in UNUSED_SPACY_COMPONENTS if name in nlp.pipe_names]
+        with nlp.select_pipes(disable=disabled):
+            parsed = nlp.pipe((texts[i] for i in indexes), batch_size=batch_size, n_process=n_process)
+            for i, doc in zip(indexes, parsed):
+                docs[i] = doc
+        return docs
     
     def clean_text(self, text: str) -> str:
         """Clean and normalize text content"""
@@ -75,16 +139,20 @@ class ContentProcessor:
         
         return text
     
-    def chunk_text(self, text: str, method: str = 'semantic', max_chunk_size: int = 1000, overlap: int = 100) -> List[Dict[str, Any]]:
-        """Split text into chunks using different strategies"""
+    def chunk_text(self, text: str, method: str = 'semantic', max_chunk_size: int = 1000, overlap: int = 100,
+                   doc=None) -> List[Dict[str, Any]]:
+        """Split text into chunks using different strategies
+        
+        Pass an already parsed Doc to reuse its sentence boundaries.
+        """
         
         if not text or not text.strip():
             return []
         
         chunks = []
         
-        if method == 'semantic' and self.nlp:
-            chunks = self._semantic_chunking(text, max_chunk_size, overlap)
+        if method == 'semantic' and (doc is not None or self.sentencizer):
+            chunks = self._semantic_chunking(text, max_chunk_size, overlap, doc)
         elif method == 'sentence':
             chunks = self._sentence_chunking(text, max_chunk_size, overlap)
         else:
@@ -101,9 +169,10 @@ class ContentProcessor:
         
         return chunks
     
-    def _semantic_chunking(self, text: str, max_size: int, overlap: int) -> List[Dict[str, Any]]:
-        """Chunk text based on semantic boundaries using spaCy"""
-        doc = self.nlp(text)
+    def _semantic_chunking(self, text: str, max_size: int, overlap: int, doc=None) -> List[Dict[str, Any]]:
+        """Chunk text based on sentence boundaries from spaCy"""
+        if doc is None:
+            doc = self.sentencizer(text)
         chunks = []
         current_chunk = []
         current_length = 0
@@ -117,7 +186,7 @@ class ContentProcessor:
                 chunk_text = ' '.join(current_chunk)
                 chunks.append({
                     'text': chunk_text,
-                    'start_pos': len(' '.join(chunks)) if chunks else 0
+                    'start_pos': len(' '.join([c['text'] for c in chunks])) if chunks else 0
                 })
                 
                 # Handle overlap
@@ -221,21 +290,16 @@ class ContentProcessor:
         
         return chunks
     
-    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Generate embeddings for list of texts"""
-        if not self.embedding_model:
-            logger.error("Embedding model not available")
-            return np.array([])
-        
-        try:
-            embeddings = self.embedding_model.encode(texts)
-            return embeddings
-        except Exception as e:
-            logger.error(f"Error generating embeddings: {e}")
-            return np.array([])
+    def generate_embeddings(self, texts: List[str], db_path: str = None) -> np.ndarray:
+        """Generate normalised float32 embeddings for list of texts, reusing cached vectors"""
+        from utils.embedding_service import get_embedding_service
+        return get_embedding_service(db_path).embed(texts)
     
-    def extract_content_metadata(self, text: str, chunks: List[Dict]) -> Dict[str, Any]:
-        """Extract comprehensive metadata from content"""
+    def extract_content_metadata(self, text: str, chunks: List[Dict], doc=None) -> Dict[str, Any]:
+        """Extract comprehensive metadata from content
+        
+        Pass an already parsed Doc to reuse it for entities and POS statistics.
+        """
         if not text or not text.strip():
             return {}
         
@@ -246,9 +310,13 @@ class ContentProcessor:
             'chunk_stats': self._calculate_chunk_stats(chunks)
         }
         
-        if self.nlp:
-            metadata['entities'] = self._extract_entities(text)
-            metadata['language_features'] = self._analyze_language_features(text)
+        if doc is None and self.nlp:
+            doc = self.nlp(text)
+        
+        if doc is not None and doc.has_annotation('ENT_IOB'):
+            metadata['entities'] = self._extract_entities(text, doc)
+        if doc is not None and doc.has_annotation('POS'):
+            metadata['language_features'] = self._analyze_language_features(text, doc)
         
         return metadata
     
@@ -280,6 +348,8 @@ class ContentProcessor:
     def _extract_key_terms(self, text: str, max_terms: int = 20) -> List[Dict[str, Any]]:
         """Extract key terms using TF-IDF"""
         try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            
             # Clean text for TF-IDF
             clean_text = self.clean_text(text)
             
@@ -322,10 +392,11 @@ class ContentProcessor:
             'max_chunk_length': max(chunk_lengths)
         }
     
-    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
+    def _extract_entities(self, text: str, doc=None) -> Dict[str, List[str]]:
         """Extract named entities using spaCy"""
         try:
-            doc = self.nlp(text)
+            if doc is None:
+                doc = self.nlp(text)
             entities = {}
             
             for ent in doc.ents:
@@ -340,10 +411,11 @@ class ContentProcessor:
             logger.warning(f"Error extracting entities: {e}")
             return {}
     
-    def _analyze_language_features(self, text: str) -> Dict[str, Any]:
+    def _analyze_language_features(self, text: str, doc=None) -> Dict[str, Any]:
         """Analyze language features using spaCy"""
         try:
-            doc = self.nlp(text)
+            if doc is None:
+                doc = self.nlp(text)
             
             pos_counts = Counter([token.pos_ for token in doc])
             
@@ -357,28 +429,59 @@ class ContentProcessor:
             logger.warning(f"Error analyzing language features: {e}")
             return {}
 
-# Global content processor instance
+# Global content processor instance (cheap: models load on first use)
 content_processor = ContentProcessor()
 
-def process_content_pipeline(text: str, max_chunk_size: int = 1000, chunk_method: str = 'semantic') -> Dict[str, Any]:
+def warm_up_models(components: Tuple[str, ...] = ('nlp', 'sentencizer', 'embedding_model')) -> Dict[str, bool]:
+    """Explicitly load models, e.g. at worker startup, so the first request doesn't wait"""
+    return content_processor.warm_up(components)
+
+def process_content_pipeline(text: str, max_chunk_size: int = 1000, chunk_method: str = 'semantic',
+                             analyze: bool = True, db_path: str = None) -> Dict[str, Any]:
     """Complete content processing pipeline"""
+    return process_content_batch([text], max_chunk_size=max_chunk_size, chunk_method=chunk_method,
+                                 analyze=analyze, db_path=db_path)[0]
+
+def process_content_batch(texts: List[str], max_chunk_size: int = 1000, chunk_method: str = 'semantic',
+                          batch_size: int = 16, n_process: int = 1, analyze: bool = True,
+                          db_path: str = None) -> List[Dict[str, Any]]:
+    """Content processing pipeline for a batch of documents
+    
+    Each document is parsed once (nlp.pipe, batched) and the Doc is shared by
+    chunking, entity and POS extraction; embeddings for every chunk in the
+    batch go through the embedding service in one call and come back as
+    float32 arrays (one row per chunk), tagged with the model that made them.
+    With analyze=False only the sentencizer runs, so no entities or POS.
+    """
+    from utils.embedding_service import get_embedding_service
     
     # Step 1: Clean text
-    cleaned_text = content_processor.clean_text(text)
+    cleaned_texts = [content_processor.clean_text(text) for text in texts]
     
-    # Step 2: Chunk text
-    chunks = content_processor.chunk_text(cleaned_text, method=chunk_method, max_chunk_size=max_chunk_size)
+    # Step 2: Parse every document once
+    docs = content_processor.parse_documents(cleaned_texts, batch_size=batch_size, n_process=n_process, analyze=analyze)
     
-    # Step 3: Generate embeddings
-    chunk_texts = [chunk['text'] for chunk in chunks]
-    embeddings = content_processor.generate_embeddings(chunk_texts) if chunk_texts else np.array([])
+    # Step 3: Chunk text
+    chunk_lists = [content_processor.chunk_text(cleaned_text, method=chunk_method, max_chunk_size=max_chunk_size, doc=doc)
+                   for cleaned_text, doc in zip(cleaned_texts, docs)]
     
-    # Step 4: Extract metadata
-    metadata = content_processor.extract_content_metadata(cleaned_text, chunks)
+    # Step 4: Generate embeddings
+    chunk_texts = [chunk['text'] for chunks in chunk_lists for chunk in chunks]
+    embeddings = content_processor.generate_embeddings(chunk_texts, db_path) if chunk_texts else np.array([], dtype=np.float32)
+    embedding_model = get_embedding_service(db_path).model_name
     
-    return {
-        'cleaned_text': cleaned_text,
-        'chunks': chunks,
-        'embeddings': embeddings.tolist() if embeddings.size > 0 else [],
-        'metadata': metadata
-    }
+    # Step 5: Extract metadata
+    results = []
+    offset = 0
+    for cleaned_text, doc, chunks in zip(cleaned_texts, docs, chunk_lists):
+        chunk_embeddings = embeddings[offset:offset + len(chunks)] if embeddings.size > 0 else np.array([], dtype=np.float32)
+        offset += len(chunks)
+        results.append({
+            'cleaned_text': cleaned_text,
+            'chunks': chunks,
+            'embeddings': chunk_embeddings,
+            'embedding_model': embedding_model,
+            'metadata': content_processor.extract_content_metadata(cleaned_text, chunks, doc=doc)
+        })
+    
+    return results
@@ -0,0 +1,83 @@
+"""
+Shared SQLite connection provider with per-thread reuse and tuned pragmas
+"""
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Single source of truth for the registry database location
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'database', 'humanitarian_assessments.db'))
+
+# Applied to every new connection. WAL lets readers proceed while a writer
+# (e.g. background extraction) holds the write lock.
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",      # 64 MB page cache
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000"
+]
+
+_local = threading.local()
+
+def _configure_connection(conn):
+    """Apply performance pragmas to a fresh connection"""
+    for pragma in CONNECTION_PRAGMAS:
+        try:
+            conn.execute(pragma)
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"Could not apply '{pragma}': {e}")
+    conn.row_factory = sqlite3.Row
+
+def get_connection(db_path=None):
+    """Get this thread's connection for a database, opening it on first use
+
+    Connections are cached per thread and per database file, so callers must
+    not close them. Rows are returned as sqlite3.Row objects.
+    """
+    db_path = os.path.abspath(db_path or DB_PATH)
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        _configure_connection(conn)
+        connections[db_path] = conn
+        logger.debug(f"Opened SQLite connection to {db_path} on thread {threading.current_thread().name}")
+    return conn
+
+@contextmanager
+def transaction(db_path=None):
+    """Run a block of statements in one transaction on this thread's connection
+
+    Commits when the block exits normally and rolls back on any exception.
+    """
+    conn = get_connection(db_path)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def close_connection(db_path=None):
+    """Close this thread's connection to a database, if one is open"""
+    connections = getattr(_local, 'connections', {})
+    conn = connections.pop(os.path.abspath(db_path or DB_PATH), None)
+    if conn is not None:
+        conn.close()
+
+def close_all_connections():
+    """Close every connection opened by the current thread"""
+    connections = getattr(_local, 'connections', {})
+    while connections:
+        _, conn = connections.popitem()
+        conn.close()
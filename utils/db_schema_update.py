@@ -4,7 +4,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import sqlite3
 import logging
-from utils.db_utils import create_content_tables
+from utils.db_utils import create_content_tables, create_sync_tables, create_search_tables, create_facet_tables, create_stats_tables, ensure_assessment_columns
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +79,7 @@ def init_db():
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         create_content_tables(cursor)
+        create_sync_tables(cursor)
         
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS assessments (
@@ -103,10 +104,17 @@ def init_db():
             url TEXT,
             url_alias TEXT,
             platform_aggr TEXT DEFAULT 'ReliefWeb',
+            file_urls TEXT DEFAULT '',
+            headline TEXT DEFAULT '',
+            content_hash TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         """)
+        ensure_assessment_columns(cursor)
+        create_search_tables(cursor)
+        create_facet_tables(cursor)
+        create_stats_tables(cursor)
         
         conn.commit()
         conn.close()
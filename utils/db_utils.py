@@ -1,9 +1,13 @@
 import sqlite3
 import logging
 import json
+import hashlib
+import re
+import uuid
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
+from utils.db_connection import get_connection, transaction
 
 logger = logging.getLogger(__name__)
 
@@ -112,6 +116,309 @@ def create_content_tables(cursor):
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_districts_country ON admin_districts(country_iso2)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_document ON content_processing_jobs(document_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON content_processing_jobs(status)")
+    ensure_job_queue_columns(cursor)
+    ensure_embedding_blob_columns(cursor)
+    create_extraction_cache_table(cursor)
+    create_embedding_cache_table(cursor)
+
+def ensure_embedding_blob_columns(cursor):
+    """Add binary vector columns to document_embeddings and convert legacy JSON vectors"""
+    cursor.execute("PRAGMA table_info(document_embeddings)")
+    columns = {row[1] for row in cursor.fetchall()}
+    
+    for column_name, column_type in [('embedding_blob', 'BLOB'), ('embedding_dtype', 'TEXT'),
+                                     ('embedding_scale', 'REAL')]:
+        if column_name not in columns:
+            cursor.execute(f"ALTER TABLE document_embeddings ADD COLUMN {column_name} {column_type}")
+            logger.info(f"Added {column_name} column to document_embeddings")
+    
+    legacy = cursor.execute("""
+        SELECT id, embedding_vector FROM document_embeddings
+        WHERE embedding_blob IS NULL AND embedding_vector IS NOT NULL
+    """).fetchall()
+    for row_id, embedding_vector in legacy:
+        blob, scale = encode_embedding(json.loads(embedding_vector), 'float32')
+        cursor.execute("""
+            UPDATE document_embeddings
+            SET embedding_blob = ?, embedding_dtype = 'float32', embedding_scale = ?, embedding_vector = NULL
+            WHERE id = ?
+        """, (blob, scale, row_id))
+    if legacy:
+        logger.info(f"Converted {len(legacy)} JSON embeddings to float32 blobs")
+
+def create_embedding_cache_table(cursor):
+    """Create the chunk embedding cache, keyed by hash of (model name, chunk text)"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS embedding_cache (
+        cache_key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        dimension INTEGER NOT NULL,
+        vector BLOB NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+    """)
+
+def create_extraction_cache_table(cursor):
+    """Create the content-addressed extraction cache (file checksum + extractor version)"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS extraction_cache (
+        checksum TEXT NOT NULL,
+        extractor_version TEXT NOT NULL,
+        content_text TEXT,
+        page_count INTEGER,
+        extraction_confidence REAL,
+        extraction_method TEXT,
+        metadata TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (checksum, extractor_version)
+    ) WITHOUT ROWID
+    """)
+
+def ensure_job_queue_columns(cursor):
+    """Add the columns the background job queue needs to content_processing_jobs"""
+    cursor.execute("PRAGMA table_info(content_processing_jobs)")
+    columns = {row[1] for row in cursor.fetchall()}
+    
+    for column_name, column_type in [('batch_id', 'TEXT'), ('worker', 'TEXT')]:
+        if column_name not in columns:
+            cursor.execute(f"ALTER TABLE content_processing_jobs ADD COLUMN {column_name} {column_type}")
+            logger.info(f"Added {column_name} column to content_processing_jobs")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_batch ON content_processing_jobs(batch_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON content_processing_jobs(status, id)")
+
+def create_sync_tables(cursor):
+    """Create tables for tracking incremental ReliefWeb sync state"""
+    
+    # One high-water mark per (country, format, filter_type) query
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sync_state (
+        query_key TEXT PRIMARY KEY,
+        country TEXT,
+        format TEXT,
+        country_filter_type TEXT,
+        last_changed TEXT,
+        last_report_id INTEGER,
+        last_sync TIMESTAMP,
+        last_full_sync TIMESTAMP,
+        records_seen INTEGER DEFAULT 0
+    )
+    """)
+    create_api_cache_table(cursor)
+
+def create_api_cache_table(cursor):
+    """Create the persistent cache of ReliefWeb API lookups (facet lists), keyed by request"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS api_cache (
+        cache_key TEXT PRIMARY KEY,
+        payload TEXT NOT NULL,
+        fetched_at REAL NOT NULL
+    ) WITHOUT ROWID
+    """)
+
+def create_search_tables(cursor):
+    """Create FTS5 full-text indexes over assessments and extracted document text
+
+    Both indexes are external-content tables kept in sync by triggers, so
+    every write path (bulk upsert, deletes, content extraction) updates them.
+    Must run after the assessments and document_content tables exist.
+    """
+    try:
+        cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS assessments_fts USING fts5(
+            title, body,
+            content='assessments', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """)
+        cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS document_content_fts USING fts5(
+            cleaned_text, assessment_id UNINDEXED,
+            content='document_content', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"⚠️ FTS5 not available, full-text search disabled: {e}")
+        return False
+
+    # Keep the indexes in step with their content tables
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS assessments_fts_ai AFTER INSERT ON assessments BEGIN
+        INSERT INTO assessments_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS assessments_fts_ad AFTER DELETE ON assessments BEGIN
+        INSERT INTO assessments_fts(assessments_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS assessments_fts_au AFTER UPDATE OF title, body ON assessments BEGIN
+        INSERT INTO assessments_fts(assessments_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO assessments_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS document_content_fts_ai AFTER INSERT ON document_content BEGIN
+        INSERT INTO document_content_fts(rowid, cleaned_text, assessment_id) VALUES (new.id, new.cleaned_text, new.assessment_id);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS document_content_fts_ad AFTER DELETE ON document_content BEGIN
+        INSERT INTO document_content_fts(document_content_fts, rowid, cleaned_text, assessment_id) VALUES ('delete', old.id, old.cleaned_text, old.assessment_id);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS document_content_fts_au AFTER UPDATE OF cleaned_text, assessment_id ON document_content BEGIN
+        INSERT INTO document_content_fts(document_content_fts, rowid, cleaned_text, assessment_id) VALUES ('delete', old.id, old.cleaned_text, old.assessment_id);
+        INSERT INTO document_content_fts(rowid, cleaned_text, assessment_id) VALUES (new.id, new.cleaned_text, new.assessment_id);
+    END
+    """)
+
+    # Backfill indexes created on an existing database
+    for fts_table, content_table in [('assessments_fts', 'assessments'),
+                                     ('document_content_fts', 'document_content')]:
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {fts_table}_docsize)")
+        indexed = cursor.fetchone()[0]
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {content_table})")
+        if cursor.fetchone()[0] and not indexed:
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+            logger.info(f"🔎 Rebuilt full-text index {fts_table}")
+    return True
+
+# Multi-valued assessment fields and the link tables that normalise them
+FACET_LINK_TABLES = {
+    'country': 'assessment_country',
+    'source': 'assessment_source',
+    'theme': 'assessment_theme',
+    'format': 'assessment_format',
+    'language': 'assessment_language'
+}
+
+def _table_exists(cursor, table):
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?)", (table,))
+    return bool(cursor.fetchone()[0])
+
+def create_facet_tables(cursor):
+    """Create one (assessment_id, value) link table per multi-valued field
+
+    Values compare case-insensitively. assessment_country also flags the
+    primary country. Links go away with their assessment via a delete trigger.
+    Must run after the assessments table exists; existing assessments are
+    linked when the tables are first created.
+    """
+    migrating = not _table_exists(cursor, 'assessment_country')
+    for field, table in FACET_LINK_TABLES.items():
+        is_primary = "is_primary INTEGER NOT NULL DEFAULT 0," if field == 'country' else ""
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            assessment_id INTEGER NOT NULL,
+            {field} TEXT NOT NULL COLLATE NOCASE,
+            {is_primary}
+            PRIMARY KEY (assessment_id, {field}),
+            FOREIGN KEY (assessment_id) REFERENCES assessments (id)
+        ) WITHOUT ROWID
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_value ON {table}({field}, assessment_id)")
+
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS assessments_facets_ad AFTER DELETE ON assessments BEGIN
+        {' '.join(f'DELETE FROM {table} WHERE assessment_id = old.id;' for table in FACET_LINK_TABLES.values())}
+    END
+    """)
+
+    # One-time backfill for databases created before the link tables existed
+    if migrating:
+        cursor.execute(f"SELECT id, primary_country, {', '.join(FACET_LINK_TABLES)} FROM assessments")
+        rows = [dict(zip([d[0] for d in cursor.description], r)) for r in cursor.fetchall()]
+        write_facet_links(cursor, rows)
+        if rows:
+            logger.info(f"🔗 Backfilled facet links for {len(rows)} assessments")
+
+# Day bucket an assessment counts towards for "recent records" (latest of ingest/publish date)
+_STATS_DAY_KEY = "substr(max(coalesce({row}.created_at, ''), coalesce({row}.date_created, '')), 1, 10)"
+
+def _stats_increment(stat_type, key, delta):
+    """SQL statement adjusting one dashboard_stats counter, for use in triggers"""
+    statement = f"""INSERT INTO dashboard_stats (stat_type, key, value) VALUES ('{stat_type}', {key}, {delta})
+            ON CONFLICT(stat_type, key) DO UPDATE SET value = value + {delta};"""
+    if delta < 0:
+        statement += f"\n        DELETE FROM dashboard_stats WHERE stat_type = '{stat_type}' AND key = {key} AND value <= 0;"
+    return statement
+
+def create_stats_tables(cursor):
+    """Create the materialised dashboard statistics table and its triggers
+
+    dashboard_stats holds one counter per (stat_type, key): the record total,
+    assessments per country and per source, and records per day. Triggers on
+    assessments and the facet link tables keep it current on every ingest and
+    delete, so the dashboard never scans the registry. Must run after
+    create_facet_tables; the counters are populated when the table is first
+    created.
+    """
+    migrating = not _table_exists(cursor, 'dashboard_stats')
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS dashboard_stats (
+        stat_type TEXT NOT NULL,
+        key TEXT NOT NULL COLLATE NOCASE,
+        value INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (stat_type, key)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dashboard_stats_value ON dashboard_stats(stat_type, value)")
+    # Lets the dashboard's "recent records" list read 5 rows instead of sorting the table
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assessments_recent ON assessments(COALESCE(created_at, date_created))")
+
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_assessment_ai AFTER INSERT ON assessments BEGIN
+        {_stats_increment('total', "''", 1)}
+        {_stats_increment('day', _STATS_DAY_KEY.format(row='new'), 1)}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_assessment_ad AFTER DELETE ON assessments BEGIN
+        {_stats_increment('total', "''", -1)}
+        {_stats_increment('day', _STATS_DAY_KEY.format(row='old'), -1)}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS dashboard_stats_assessment_au AFTER UPDATE OF created_at, date_created ON assessments BEGIN
+        {_stats_increment('day', _STATS_DAY_KEY.format(row='old'), -1)}
+        {_stats_increment('day', _STATS_DAY_KEY.format(row='new'), 1)}
+    END
+    """)
+    for field in ('country', 'source'):
+        table = FACET_LINK_TABLES[field]
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS dashboard_stats_{field}_ai AFTER INSERT ON {table} BEGIN
+            {_stats_increment(field, f'new.{field}', 1)}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS dashboard_stats_{field}_ad AFTER DELETE ON {table} BEGIN
+            {_stats_increment(field, f'old.{field}', -1)}
+        END
+        """)
+
+    # Populate once for databases that predate the stats table
+    if migrating:
+        rebuild_stats_table(cursor)
+
+def rebuild_stats_table(cursor):
+    """Recompute every dashboard_stats counter from the source tables"""
+    cursor.execute("DELETE FROM dashboard_stats")
+    cursor.execute("INSERT INTO dashboard_stats (stat_type, key, value) SELECT 'total', '', COUNT(*) FROM assessments")
+    cursor.execute(f"""
+        INSERT INTO dashboard_stats (stat_type, key, value)
+        SELECT 'day', {_STATS_DAY_KEY.format(row='assessments')} AS day, COUNT(*)
+        FROM assessments GROUP BY day
+    """)
+    for field in ('country', 'source'):
+        cursor.execute(f"""
+            INSERT INTO dashboard_stats (stat_type, key, value)
+            SELECT '{field}', {field}, COUNT(*) FROM {FACET_LINK_TABLES[field]} GROUP BY {field}
+        """)
+    logger.info("📊 Rebuilt dashboard statistics")
 
 def parse_datetime(date_str):
     """Parse datetime string from database into datetime object"""
@@ -133,179 +440,352 @@ def parse_datetime(date_str):
 def init_db(db_path):
     """Initialize SQLite database with proper schema"""
     try:
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
+        with transaction(db_path) as conn:
+            c = conn.cursor()
         
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS assessments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            report_id INTEGER UNIQUE,
-            title TEXT,
-            body TEXT,
-            body_html TEXT,
-            country TEXT,
-            date_created TEXT,
-            disaster TEXT,
-            disaster_type TEXT,
-            file_info TEXT,
-            format TEXT,
-            language TEXT,
-            origin TEXT,
-            primary_country TEXT,
-            redirects TEXT,
-            source TEXT,
-            status TEXT,
-            theme TEXT,
-            url TEXT,
-            url_alias TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS assessments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                report_id INTEGER UNIQUE,
+                title TEXT,
+                body TEXT,
+                body_html TEXT,
+                country TEXT,
+                date_created TEXT,
+                disaster TEXT,
+                disaster_type TEXT,
+                file_info TEXT,
+                format TEXT,
+                language TEXT,
+                origin TEXT,
+                primary_country TEXT,
+                redirects TEXT,
+                source TEXT,
+                status TEXT,
+                theme TEXT,
+                url TEXT,
+                url_alias TEXT,
+                file_urls TEXT DEFAULT '',
+                headline TEXT DEFAULT '',
+                content_hash TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            ensure_assessment_columns(c)
         
-        # Create document downloads tracking table
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS document_downloads (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            assessment_id INTEGER,
-            filename TEXT,
-            original_url TEXT,
-            file_size INTEGER,
-            download_status TEXT DEFAULT 'completed',
-            download_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            file_path TEXT,
-            mime_type TEXT,
-            checksum TEXT,
-            FOREIGN KEY (assessment_id) REFERENCES assessments (id)
-        )
-        """)
+            # Create document downloads tracking table
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS document_downloads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                assessment_id INTEGER,
+                filename TEXT,
+                original_url TEXT,
+                file_size INTEGER,
+                download_status TEXT DEFAULT 'completed',
+                download_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                file_path TEXT,
+                mime_type TEXT,
+                checksum TEXT,
+                FOREIGN KEY (assessment_id) REFERENCES assessments (id)
+            )
+            """)
         
-        # Create document registry table for tracking and future AI features
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS document_registry (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            assessment_id INTEGER,
-            download_id INTEGER,
-            document_type TEXT,
-            processing_status TEXT DEFAULT 'pending',
-            ai_summary TEXT,
-            ai_embeddings TEXT,
-            ai_keywords TEXT,
-            ai_processed_date TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (assessment_id) REFERENCES assessments (id),
-            FOREIGN KEY (download_id) REFERENCES document_downloads (id)
-        )
-        """)
+            # Create document registry table for tracking and future AI features
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS document_registry (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                assessment_id INTEGER,
+                download_id INTEGER,
+                document_type TEXT,
+                processing_status TEXT DEFAULT 'pending',
+                ai_summary TEXT,
+                ai_embeddings TEXT,
+                ai_keywords TEXT,
+                ai_processed_date TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (assessment_id) REFERENCES assessments (id),
+                FOREIGN KEY (download_id) REFERENCES document_downloads (id)
+            )
+            """)
         
-        # Enhanced Content Extraction Tables
-        create_content_tables(c)
+            # Enhanced Content Extraction Tables
+            create_content_tables(c)
+            create_sync_tables(c)
+            create_search_tables(c)
+            create_facet_tables(c)
+            create_stats_tables(c)
 
-        # Create indexes for faster queries
-        c.execute("CREATE INDEX IF NOT EXISTS idx_report_id ON assessments(report_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_date_created ON assessments(date_created)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_download_assessment ON document_downloads(assessment_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_registry_assessment ON document_registry(assessment_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_registry_download ON document_registry(download_id)")
+            # Create indexes for faster queries
+            c.execute("CREATE INDEX IF NOT EXISTS idx_report_id ON assessments(report_id)")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_date_created ON assessments(date_created)")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_download_assessment ON document_downloads(assessment_id)")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_registry_assessment ON document_registry(assessment_id)")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_registry_download ON document_registry(download_id)")
         
-        conn.commit()
-        conn.close()
         logger.info(f"Database initialized at {db_path}")
         
     except Exception as e:
         logger.error(f"Failed to initialize database: {str(e)}")
         raise
 
-def save_metadata(db_path, assessments):
-    """Save assessment metadata to database
+# Columns written by the ingest path, in insert order
+ASSESSMENT_INGEST_COLUMNS = [
+    'report_id', 'title', 'date_created', 'source', 'format', 'theme', 'country',
+    'primary_country', 'language', 'status', 'url', 'url_alias', 'body', 'body_html',
+    'file_urls', 'headline'
+]
+
+# Metadata key each ingest column is read from, where it differs from the column name
+ASSESSMENT_SOURCE_KEYS = {'file_urls': 'file'}
+
+def ensure_assessment_columns(cursor):
+    """Add ingest columns that older databases may be missing"""
+    cursor.execute("PRAGMA table_info(assessments)")
+    columns = {row[1] for row in cursor.fetchall()}
+    
+    for column_name, column_type in [('file_urls', "TEXT DEFAULT ''"),
+                                     ('headline', "TEXT DEFAULT ''"),
+                                     ('content_hash', 'TEXT'),
+                                     ('needs_backfill', 'INTEGER NOT NULL DEFAULT 0')]:
+        if column_name not in columns:
+            cursor.execute(f"ALTER TABLE assessments ADD COLUMN {column_name} {column_type}")
+            logger.info(f"Added {column_name} column to assessments")
+
+def _join_values(value):
+    """Join list fields into the comma-separated form stored in assessments"""
+    if isinstance(value, list):
+        return ', '.join(str(v) for v in value if v)
+    return str(value) if value is not None else ''
+
+def _assessment_hash(row):
+    """Hash of the ingest columns, used to skip unchanged records"""
+    return hashlib.sha1(
+        json.dumps([row[col] for col in ASSESSMENT_INGEST_COLUMNS], ensure_ascii=False, default=str).encode('utf-8')
+    ).hexdigest()
+
+def normalise_assessment(meta):
+    """Normalise one metadata dict into an ingest row, or None if it can't be stored
+    
+    For records from a lighter harvest profile (meta['field_profile'] other
+    than 'full'), columns whose key is absent are listed in
+    row['missing_columns']; otherwise absent keys simply mean ''.
+    """
+    if not isinstance(meta, dict):
+        logger.error(f"Invalid metadata item type: {type(meta)}, expected dict")
+        return None
+    
+    report_id = meta.get('report_id')
+    if not report_id:
+        logger.warning(f"Skipping record without report_id: {meta.get('title', 'Unknown')}")
+        return None
+    
+    try:
+        report_id = int(report_id)
+    except (ValueError, TypeError):
+        pass
+    
+    files = meta.get('file') or []
+    row = {
+        'report_id': report_id,
+        'title': meta.get('title', '') or '',
+        'date_created': meta.get('date_created', '') or '',
+        'source': _join_values(meta.get('source', '')),
+        'format': _join_values(meta.get('format', '')),
+        'theme': _join_values(meta.get('theme', '')),
+        'country': _join_values(meta.get('country', '')),
+        'primary_country': meta.get('primary_country', '') or '',
+        'language': _join_values(meta.get('language', '')),
+        'status': meta.get('status', '') or '',
+        'url': meta.get('url', '') or '',
+        'url_alias': meta.get('url_alias', '') or '',
+        'body': meta.get('body', '') or '',
+        'body_html': meta.get('body_html', '') or '',
+        'file_urls': ', '.join(f.get('url', '') for f in files if isinstance(f, dict)) if isinstance(files, list) else '',
+        'headline': meta.get('headline', '') or ''
+    }
+    partial = meta.get('field_profile', 'full') != 'full'
+    row['missing_columns'] = [col for col in ASSESSMENT_INGEST_COLUMNS
+                              if partial and ASSESSMENT_SOURCE_KEYS.get(col, col) not in meta]
+    row['needs_backfill'] = int(bool(row['missing_columns']))
+    row['content_hash'] = _assessment_hash(row)
+    return row
+
+def split_facet_values(value):
+    """Split a stored comma/semicolon-joined field into distinct trimmed values"""
+    values = []
+    seen = set()
+    for part in re.split(r'[,;]', value or ''):
+        part = part.strip()
+        if part and part.lower() not in seen:
+            seen.add(part.lower())
+            values.append(part)
+    return values
+
+def write_facet_links(cursor, rows):
+    """Replace the link table entries for assessment rows
+
+    Each row needs 'id', 'primary_country' and the FACET_LINK_TABLES fields.
+    """
+    if not rows:
+        return
+
+    ids = [(row['id'],) for row in rows]
+    for field, table in FACET_LINK_TABLES.items():
+        cursor.executemany(f"DELETE FROM {table} WHERE assessment_id = ?", ids)
+
+        links = []
+        for row in rows:
+            values = split_facet_values(row.get(field))
+            if field == 'country':
+                primary = (row.get('primary_country') or '').strip()
+                if primary:
+                    # The primary_country spelling wins over a case variant in the list
+                    values = [primary] + [v for v in values if v.lower() != primary.lower()]
+                links.extend((row['id'], v, int(v.lower() == primary.lower())) for v in values)
+            else:
+                links.extend((row['id'], v) for v in values)
+
+        if links:
+            placeholders = ', '.join('?' * len(links[0]))
+            cursor.executemany(f"INSERT OR IGNORE INTO {table} VALUES ({placeholders})", links)
+
+def bulk_upsert_metadata(db_path, assessments, chunk_size=500):
+    """Insert or refresh a batch of assessment records in a single transaction
+    
+    Records from a lighter harvest profile only refresh the columns they
+    carry; stored values are kept for the rest. New partial records are
+    flagged needs_backfill until a full record for them is ingested.
     
     Args:
         db_path (str): Path to database file
         assessments (list): List of assessment metadata dictionaries
+        chunk_size (int): Number of report ids per existence lookup
         
     Returns:
-        int: Number of new records saved
+        dict: Counts of inserted, updated, unchanged and skipped records
     """
-    try:
-        conn = sqlite3.connect(db_path)
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+    
+    # Handle both single dict and list of dicts
+    if isinstance(assessments, dict):
+        assessments = [assessments]
+    elif not isinstance(assessments, list):
+        logger.error(f"Invalid assessments data type: {type(assessments)}")
+        return counts
+    
+    # Normalise the whole batch up front; later duplicates of a report win
+    rows = {}
+    for meta in assessments:
+        row = normalise_assessment(meta)
+        if row is None:
+            counts['skipped'] += 1
+            continue
+        rows[row['report_id']] = row
+    
+    if not rows:
+        return counts
+    
+    # Schema, facet links and stats are set up by init_db; this path is DML only
+    with transaction(db_path) as conn:
         c = conn.cursor()
         
-        saved_count = 0
-        
-        # Handle both single dict and list of dicts
-        if isinstance(assessments, dict):
-            assessments = [assessments]
-        elif not isinstance(assessments, list):
-            logger.error(f"Invalid assessments data type: {type(assessments)}")
-            return 0
-        
-        for meta in assessments:
-            try:
-                # Validate that meta is a dictionary
-                if not isinstance(meta, dict):
-                    logger.error(f"Invalid metadata item type: {type(meta)}, expected dict")
-                    continue
-                
-                # Check if record already exists
-                report_id = meta.get("report_id")
-                if not report_id:
-                    logger.warning(f"Skipping record without report_id: {meta.get('title', 'Unknown')}")
-                    continue
-                
-                c.execute("SELECT id FROM assessments WHERE report_id = ?", (report_id,))
-                existing = c.fetchone()
-                
-                if existing:
-                    logger.debug(f"Record {report_id} already exists, skipping")
-                    continue
-                
-                # Prepare data for insertion
-                insert_data = {
-                    'report_id': report_id,
-                    'title': meta.get('title', ''),
-                    'date_created': meta.get('date_created', ''),
-                    'source': ', '.join(meta.get('source', [])) if isinstance(meta.get('source'), list) else str(meta.get('source', '')),
-                    'format': ', '.join(meta.get('format', [])) if isinstance(meta.get('format'), list) else str(meta.get('format', '')),
-                    'theme': ', '.join(meta.get('theme', [])) if isinstance(meta.get('theme'), list) else str(meta.get('theme', '')),
-                    'country': ', '.join(meta.get('country', [])) if isinstance(meta.get('country'), list) else str(meta.get('country', '')),
-                    'primary_country': meta.get('primary_country', ''),
-                    'language': ', '.join(meta.get('language', [])) if isinstance(meta.get('language'), list) else str(meta.get('language', '')),
-                    'status': meta.get('status', ''),
-                    'url': meta.get('url', ''),
-                    'url_alias': meta.get('url_alias', ''),
-                    'body': meta.get('body', ''),
-                    'body_html': meta.get('body_html', ''),
-                    'file_urls': ', '.join([f.get('url', '') for f in meta.get('file', []) if isinstance(f, dict)]) if meta.get('file') else '',
-                    'headline': meta.get('headline', ''),
-                    'created_at': datetime.now().isoformat()
-                }
-                
-                # Insert the record
-                c.execute('''
-                    INSERT INTO assessments (
-                        report_id, title, date_created, source, format, theme, country, 
-                        primary_country, language, status, url, url_alias, body, body_html, 
-                        file_urls, headline, created_at
-                    ) VALUES (
-                        :report_id, :title, :date_created, :source, :format, :theme, :country,
-                        :primary_country, :language, :status, :url, :url_alias, :body, :body_html,
-                        :file_urls, :headline, :created_at
-                    )
-                ''', insert_data)
-                
-                saved_count += 1
-                logger.debug(f"✅ Saved record: {report_id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to save record {meta.get('report_id', 'Unknown') if isinstance(meta, dict) else 'Invalid'}: {str(e)}")
+        # Look up existing hashes in chunks instead of one SELECT per record
+        existing = {}
+        report_ids = list(rows.keys())
+        for i in range(0, len(report_ids), chunk_size):
+            chunk = report_ids[i:i + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            c.execute(f"SELECT report_id, content_hash, needs_backfill FROM assessments WHERE report_id IN ({placeholders})", chunk)
+            existing.update({r[0]: (r[1], r[2]) for r in c.fetchall()})
+        
+        # Fill columns a partial record didn't carry from the stored row
+        partial_ids = [report_id for report_id, row in rows.items()
+                       if row['missing_columns'] and report_id in existing]
+        for i in range(0, len(partial_ids), chunk_size):
+            chunk = partial_ids[i:i + chunk_size]
+            placeholders = ', '.join('?' * len(chunk))
+            c.execute(f"SELECT {', '.join(ASSESSMENT_INGEST_COLUMNS)} FROM assessments WHERE report_id IN ({placeholders})", chunk)
+            for stored in c.fetchall():
+                stored = dict(zip(ASSESSMENT_INGEST_COLUMNS, stored))
+                row = rows[stored['report_id']]
+                row.update({col: stored[col] or '' for col in row['missing_columns']})
+                row['needs_backfill'] = existing[stored['report_id']][1]
+                row['content_hash'] = _assessment_hash(row)
+        
+        now = datetime.now().isoformat()
+        pending = []
+        for report_id, row in rows.items():
+            if report_id not in existing:
+                counts['inserted'] += 1
+            elif existing[report_id] != (row['content_hash'], row['needs_backfill']):
+                counts['updated'] += 1
+            else:
+                counts['unchanged'] += 1
                 continue
+            pending.append(dict(row, created_at=now, updated_at=now))
+        
+        if pending:
+            columns = ASSESSMENT_INGEST_COLUMNS + ['content_hash', 'needs_backfill', 'created_at', 'updated_at']
+            update_columns = [col for col in columns if col not in ('report_id', 'created_at')]
+            c.executemany(f"""
+                INSERT INTO assessments ({', '.join(columns)})
+                VALUES ({', '.join(':' + col for col in columns)})
+                ON CONFLICT(report_id) DO UPDATE SET
+                    {', '.join(f'{col} = excluded.{col}' for col in update_columns)}
+                WHERE assessments.content_hash IS NOT excluded.content_hash
+                   OR assessments.needs_backfill IS NOT excluded.needs_backfill
+            """, pending)
+
+            # Refresh the normalised facet links for inserted/changed rows
+            changed = {row['report_id']: row for row in pending}
+            changed_ids = list(changed.keys())
+            linked_rows = []
+            for i in range(0, len(changed_ids), chunk_size):
+                chunk = changed_ids[i:i + chunk_size]
+                placeholders = ', '.join('?' * len(chunk))
+                c.execute(f"SELECT id, report_id FROM assessments WHERE report_id IN ({placeholders})", chunk)
+                linked_rows.extend(dict(changed[r[1]], id=r[0]) for r in c.fetchall())
+            write_facet_links(c, linked_rows)
+
+    logger.info(f"Bulk upsert: {counts['inserted']} inserted, {counts['updated']} updated, "
+                f"{counts['unchanged']} unchanged, {counts['skipped']} skipped")
+    return counts
+
+def get_report_ids_needing_backfill(db_path, limit=None):
+    """Report ids of assessments ingested from a lighter harvest profile, oldest first"""
+    try:
+        conn = get_connection(db_path)
+        query = "SELECT report_id FROM assessments WHERE needs_backfill = 1 ORDER BY id"
+        params = ()
+        if limit:
+            query += " LIMIT ?"
+            params = (int(limit),)
+        return [row[0] for row in conn.execute(query, params)]
         
-        conn.commit()
-        conn.close()
+    except Exception as e:
+        logger.error(f"Failed to list assessments needing backfill: {str(e)}")
+        return []
+
+def save_metadata(db_path, assessments):
+    """Save assessment metadata to database
+    
+    New records are inserted and records whose upstream content changed are
+    refreshed, all in one transaction via bulk_upsert_metadata.
+    
+    Args:
+        db_path (str): Path to database file
+        assessments (list): List of assessment metadata dictionaries
         
-        logger.info(f"Successfully saved {saved_count} new assessment records")
-        return saved_count
+    Returns:
+        int: Number of new records saved
+    """
+    try:
+        counts = bulk_upsert_metadata(db_path, assessments)
+        logger.info(f"Successfully saved {counts['inserted']} new assessment records "
+                    f"({counts['updated']} refreshed)")
+        return counts['inserted']
         
     except Exception as e:
         logger.error(f"Database save operation failed: {str(e)}")
@@ -314,14 +794,12 @@ def save_metadata(db_path, assessments):
 def get_all_metadata(db_path):
     """Retrieve all metadata from database"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        conn = get_connection(db_path)
         c = conn.cursor()
         
         c.execute("SELECT * FROM assessments ORDER BY date_created DESC")
         rows = c.fetchall()
         
-        conn.close()
         return [dict(row) for row in rows]
         
     except Exception as e:
@@ -331,107 +809,64 @@ def get_all_metadata(db_path):
 def get_table_columns(db_path, table_name):
     """Get column names for a table"""
     try:
-        conn = sqlite3.connect(db_path)
+        conn = get_connection(db_path)
         c = conn.cursor()
         c.execute(f"PRAGMA table_info({table_name})")
         columns = [row[1] for row in c.fetchall()]
-        conn.close()
         return columns
     except Exception as e:
         logger.error(f"Failed to get table columns: {str(e)}")
         return []
 
 def get_database_stats(db_path):
-    """Get comprehensive database statistics for dashboard"""
+    """Get comprehensive database statistics for dashboard
+    
+    Counts come from the materialised dashboard_stats table, so this reads a
+    handful of small rows regardless of how many assessments are stored.
+    """
     try:
-        conn = sqlite3.connect(db_path)
-        conn.text_factory = str
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(db_path)
         c = conn.cursor()
         
         stats = {}
         
         # Total records
-        c.execute("SELECT COUNT(*) as count FROM assessments")
+        c.execute("SELECT COALESCE(SUM(value), 0) as count FROM dashboard_stats WHERE stat_type = 'total'")
         stats['total_records'] = c.fetchone()['count']
         
-        # Unique countries (from both primary_country and country fields)
-        c.execute("""
-            SELECT COUNT(DISTINCT country_name) as count FROM (
-                SELECT primary_country as country_name FROM assessments 
-                WHERE primary_country IS NOT NULL AND primary_country != ''
-                UNION
-                SELECT TRIM(country_name) as country_name FROM (
-                    SELECT SUBSTR(country || ',', 1, INSTR(country || ',', ',') - 1) as country_name FROM assessments
-                    WHERE country IS NOT NULL AND country != ''
-                    UNION ALL
-                    SELECT TRIM(SUBSTR(country || ',', INSTR(country || ',', ',') + 1)) as country_name FROM assessments
-                    WHERE country IS NOT NULL AND country != '' AND INSTR(country, ',') > 0
-                ) WHERE country_name != ''
-            ) WHERE country_name IS NOT NULL AND country_name != ''
-        """)
-        unique_countries_result = c.fetchone()
-        stats['unique_countries'] = unique_countries_result['count'] if unique_countries_result else 0
+        # Unique countries (primary and secondary)
+        c.execute("SELECT COUNT(*) as count FROM dashboard_stats WHERE stat_type = 'country'")
+        stats['unique_countries'] = c.fetchone()['count']
         
         # Unique sources
-        c.execute("SELECT COUNT(DISTINCT source) as count FROM assessments WHERE source IS NOT NULL AND source != ''")
+        c.execute("SELECT COUNT(*) as count FROM dashboard_stats WHERE stat_type = 'source'")
         stats['unique_sources'] = c.fetchone()['count']
         
-        # Records in last 7 days - check both created_at and date_created
+        # Records in last 7 days, by the later of ingest and publish date
         seven_days_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
         c.execute("""
-            SELECT COUNT(*) as count FROM assessments 
-            WHERE (created_at >= ? OR date_created >= ?)
-        """, (seven_days_ago, seven_days_ago))
+            SELECT COALESCE(SUM(value), 0) as count FROM dashboard_stats
+            WHERE stat_type = 'day' AND key >= ?
+        """, (seven_days_ago,))
         stats['records_last_7_days'] = c.fetchone()['count']
         
-        # Top 10 countries by frequency - Python-based approach for proper splitting
-        c.execute("SELECT primary_country, country FROM assessments")
-        all_records = c.fetchall()
-        
-        country_counts = {}
-        
-        for record in all_records:
-            # Get all countries mentioned in this record (avoid double counting)
-            countries_in_record = set()
-            
-            # Process primary country
-            primary_country = record['primary_country']
-            if primary_country and primary_country.strip():
-                country_name = primary_country.strip().title()
-                countries_in_record.add(country_name)
-            
-            # Process secondary countries (split properly on both ; and ,)
-            country_field = record['country']
-            if country_field and country_field.strip():
-                # Replace semicolons with commas and split
-                countries_str = country_field.replace(';', ',')
-                countries = [c.strip().title() for c in countries_str.split(',') if c.strip()]
-                
-                # Add all countries to the set (set will handle duplicates)
-                for country in countries:
-                    if country:
-                        countries_in_record.add(country)
-            
-            # Count each unique country once per record
-            for country in countries_in_record:
-                country_counts[country] = country_counts.get(country, 0) + 1
-        
-        # Get top 10 countries
-        sorted_countries = sorted(country_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        stats['top_countries'] = sorted_countries
+        # Top 10 countries by number of assessments mentioning them
+        c.execute("""
+            SELECT key, value FROM dashboard_stats
+            WHERE stat_type = 'country'
+            ORDER BY value DESC
+            LIMIT 10
+        """)
+        stats['top_countries'] = [(row['key'], row['value']) for row in c.fetchall()]
         
         # Top 10 sources by frequency
         c.execute("""
-            SELECT source, COUNT(*) as count 
-            FROM assessments 
-            WHERE source IS NOT NULL AND source != '' 
-            GROUP BY source 
-            ORDER BY count DESC 
+            SELECT key, value FROM dashboard_stats
+            WHERE stat_type = 'source'
+            ORDER BY value DESC
             LIMIT 10
         """)
-        top_sources = c.fetchall()
-        stats['top_sources'] = [(row['source'], row['count']) for row in top_sources]
+        stats['top_sources'] = [(row['key'], row['value']) for row in c.fetchall()]
         
         # Recent records (last 5)
         c.execute("""
@@ -451,7 +886,6 @@ def get_database_stats(db_path):
                 except:
                     pass
         
-        conn.close()
         return stats
         
     except Exception as e:
@@ -466,57 +900,96 @@ def get_database_stats(db_path):
             'recent_records': []
         }
 
+def rebuild_dashboard_stats(db_path):
+    """Recompute the materialised dashboard statistics from scratch
+    
+    Returns:
+        bool: True if the rebuild succeeded
+    """
+    try:
+        with transaction(db_path) as conn:
+            rebuild_stats_table(conn.cursor())
+        return True
+    except Exception as e:
+        logger.error(f"Failed to rebuild dashboard statistics: {str(e)}")
+        return False
+
+def get_country_facet_counts(db_path):
+    """Count assessments per country from the normalised link table
+    
+    Returns:
+        tuple: (primary_counts, secondary_counts, all_counts) dicts keyed by country
+    """
+    primary_counts, secondary_counts, all_counts = {}, {}, {}
+    try:
+        conn = get_connection(db_path)
+        c = conn.cursor()
+        c.execute("""
+            SELECT country,
+                   SUM(is_primary) as primary_count,
+                   SUM(1 - is_primary) as secondary_count,
+                   COUNT(*) as total_count
+            FROM assessment_country
+            GROUP BY country
+        """)
+        for row in c.fetchall():
+            if row['primary_count']:
+                primary_counts[row['country']] = row['primary_count']
+            if row['secondary_count']:
+                secondary_counts[row['country']] = row['secondary_count']
+            all_counts[row['country']] = row['total_count']
+    except Exception as e:
+        logger.error(f"Failed to get country facet counts: {str(e)}")
+    return primary_counts, secondary_counts, all_counts
+
 def delete_records(db_path, filters):
     """Delete records based on filters (enhanced version)"""
     try:
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
+        with transaction(db_path) as conn:
+            c = conn.cursor()
         
-        # Build WHERE clause from filters
-        where_conditions = []
-        params = []
+            # Build WHERE clause from filters
+            where_conditions = []
+            params = []
         
-        for field, value in filters.items():
-            if field == "id":
-                # Exact match for ID
-                where_conditions.append("id = ?")
-                params.append(value)
-            elif field == "date_from":
-                where_conditions.append("date_created >= ?")
-                params.append(value)
-            elif field == "date_to":
-                where_conditions.append("date_created <= ?")
-                params.append(value)
-            elif field in ["country", "primary_country", "source", "format", "theme"]:
-                # Use LIKE for text fields
-                where_conditions.append(f"{field} LIKE ?")
-                params.append(f"%{value}%")
-            else:
-                # Exact match for other fields
-                where_conditions.append(f"{field} = ?")
-                params.append(value)
-        
-        if not where_conditions:
-            logger.warning("No valid filter conditions provided for deletion")
-            return 0
+            for field, value in filters.items():
+                if field == "id":
+                    # Exact match for ID
+                    where_conditions.append("id = ?")
+                    params.append(value)
+                elif field == "date_from":
+                    where_conditions.append("date_created >= ?")
+                    params.append(value)
+                elif field == "date_to":
+                    where_conditions.append("date_created <= ?")
+                    params.append(value)
+                elif field in ["country", "primary_country", "source", "format", "theme"]:
+                    # Use LIKE for text fields
+                    where_conditions.append(f"{field} LIKE ?")
+                    params.append(f"%{value}%")
+                else:
+                    # Exact match for other fields
+                    where_conditions.append(f"{field} = ?")
+                    params.append(value)
         
-        where_clause = " AND ".join(where_conditions)
+            if not where_conditions:
+                logger.warning("No valid filter conditions provided for deletion")
+                return 0
         
-        # Count records to be deleted
-        count_query = f"SELECT COUNT(*) FROM assessments WHERE {where_clause}"
-        c.execute(count_query, params)
-        count = c.fetchone()[0]
+            where_clause = " AND ".join(where_conditions)
         
-        if count == 0:
-            logger.info("No records found matching deletion criteria")
-            return 0
+            # Count records to be deleted
+            count_query = f"SELECT COUNT(*) FROM assessments WHERE {where_clause}"
+            c.execute(count_query, params)
+            count = c.fetchone()[0]
         
-        # Delete records
-        delete_query = f"DELETE FROM assessments WHERE {where_clause}"
-        c.execute(delete_query, params)
+            if count == 0:
+                logger.info("No records found matching deletion criteria")
+                return 0
         
-        conn.commit()
-        conn.close()
+            # Delete records
+            delete_query = f"DELETE FROM assessments WHERE {where_clause}"
+            c.execute(delete_query, params)
         
         logger.info(f"Deleted {count} records with filters: {filters}")
         return count
@@ -528,15 +1001,12 @@ def delete_records(db_path, filters):
 def get_record_by_id(db_path, record_id):
     """Get a single record by ID"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.text_factory = str
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(db_path)
         c = conn.cursor()
         
         c.execute("SELECT * FROM assessments WHERE id = ?", (record_id,))
         row = c.fetchone()
         
-        conn.close()
         return dict(row) if row else None
         
     except Exception as e:
@@ -546,8 +1016,7 @@ def get_record_by_id(db_path, record_id):
 def get_assessment_by_id(db_path, assessment_id):
     """Get assessment record by ID"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -556,7 +1025,6 @@ def get_assessment_by_id(db_path, assessment_id):
         ''', (assessment_id,))
         
         row = cursor.fetchone()
-        conn.close()
         
         return dict(row) if row else None
         
@@ -567,9 +1035,7 @@ def get_assessment_by_id(db_path, assessment_id):
 def get_filtered_metadata(db_path, filters):
     """Get metadata with filters applied"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.text_factory = str
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(db_path)
         c = conn.cursor()
         
         # Build WHERE clause
@@ -594,36 +1060,227 @@ def get_filtered_metadata(db_path, filters):
         c.execute(query, params)
         rows = c.fetchall()
         
-        conn.close()
         return [dict(row) for row in rows]
         
     except Exception as e:
         logger.error(f"Failed to get filtered metadata: {str(e)}")
         return []
 
+# Columns shown on the /manage table; body is cut down to a preview in SQL
+MANAGE_LIST_COLUMNS = [
+    'id', 'report_id', 'title', 'created_at', 'primary_country', 'country',
+    'source', 'format', 'date_created', 'url'
+]
+MANAGE_SORT_COLUMNS = MANAGE_LIST_COLUMNS + ['theme', 'language', 'status']
+MANAGE_BODY_PREVIEW_CHARS = 200
+
+def build_manage_where(filters, use_fts=False):
+    """Translate /manage filter inputs into a parameterised WHERE clause
+
+    With use_fts, title/body searches go through the FTS5 index (token prefix
+    matching) and body searches also match extracted document text.
+    """
+    where_conditions = []
+    params = []
+
+    title_query = build_fts_query(filters.get('searchTitle'), column='title') if use_fts else None
+    if title_query:
+        where_conditions.append("id IN (SELECT rowid FROM assessments_fts WHERE assessments_fts MATCH ?)")
+        params.append(title_query)
+    elif filters.get('searchTitle'):
+        where_conditions.append("title LIKE ?")
+        params.append(f"%{filters['searchTitle']}%")
+
+    body_query = build_fts_query(filters.get('searchBody')) if use_fts else None
+    if body_query:
+        where_conditions.append("""(id IN (SELECT rowid FROM assessments_fts WHERE assessments_fts MATCH ?)
+            OR id IN (SELECT assessment_id FROM document_content_fts WHERE document_content_fts MATCH ?))""")
+        params.extend([build_fts_query(filters['searchBody'], column='body'), body_query])
+    elif filters.get('searchBody'):
+        where_conditions.append("body LIKE ?")
+        params.append(f"%{filters['searchBody']}%")
+
+    # Country filters are indexed lookups on the normalised link table
+    if filters.get('filterPrimaryCountry'):
+        where_conditions.append("id IN (SELECT assessment_id FROM assessment_country WHERE country = ? AND is_primary = 1)")
+        params.append(filters['filterPrimaryCountry'].strip())
+
+    secondary = split_facet_values(filters.get('filterSecondaryCountry'))
+    if secondary:
+        placeholders = ', '.join('?' * len(secondary))
+        where_conditions.append(f"id IN (SELECT assessment_id FROM assessment_country WHERE country IN ({placeholders}))")
+        params.extend(secondary)
+
+    if filters.get('filterCountry'):
+        where_conditions.append("id IN (SELECT assessment_id FROM assessment_country WHERE country = ?)")
+        params.append(filters['filterCountry'].strip())
+
+    if filters.get('filterDateFrom'):
+        where_conditions.append("date_created >= ?")
+        params.append(filters['filterDateFrom'])
+
+    if filters.get('filterDateTo'):
+        # Dates are stored as ISO timestamps, so include the whole end day
+        where_conditions.append("date_created < date(?, '+1 day')")
+        params.append(filters['filterDateTo'])
+
+    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+    return where_clause, params
+
+def query_manage_records(db_path, filters=None, sort_by='date_created', sort_order='desc', page=1, per_page=50):
+    """
+    Get one page of assessments for the /manage table
+
+    Filtering, sorting and paging all happen in SQLite and only the listed
+    columns are read, so the cost depends on the page size rather than the
+    size of the registry.
+
+    Returns:
+        dict: records, total, page, per_page and pages
+    """
+    sort_by = sort_by if sort_by in MANAGE_SORT_COLUMNS else 'date_created'
+    direction = 'ASC' if str(sort_order).lower() == 'asc' else 'DESC'
+    per_page = max(1, min(int(per_page or 50), 500))
+    page = max(1, int(page or 1))
+
+    result = {'records': [], 'total': 0, 'page': page, 'per_page': per_page, 'pages': 0}
+
+    try:
+        conn = get_connection(db_path)
+        c = conn.cursor()
+
+        where_clause, params = build_manage_where(filters or {}, use_fts=has_full_text_index(conn))
+
+        c.execute(f"SELECT COUNT(*) FROM assessments WHERE {where_clause}", params)
+        total = c.fetchone()[0]
+        pages = (total + per_page - 1) // per_page
+        page = min(page, pages) if pages else 1
+
+        columns = ", ".join(MANAGE_LIST_COLUMNS)
+        c.execute(f"""
+            SELECT {columns}, substr(body, 1, {MANAGE_BODY_PREVIEW_CHARS}) AS body
+            FROM assessments
+            WHERE {where_clause}
+            ORDER BY {sort_by} {direction}, id {direction}
+            LIMIT ? OFFSET ?
+        """, params + [per_page, (page - 1) * per_page])
+
+        result.update({
+            'records': [dict(row) for row in c.fetchall()],
+            'total': total,
+            'page': page,
+            'pages': pages
+        })
+        return result
+
+    except Exception as e:
+        logger.error(f"Failed to query manage records: {str(e)}")
+        return result
+
+# ===== FULL-TEXT SEARCH FUNCTIONS =====
+
+def has_full_text_index(conn):
+    """Check whether the FTS5 search tables exist on this connection's database"""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'assessments_fts'").fetchone()
+    return row is not None
+
+def build_fts_query(text, column=None):
+    """Turn free text into a safe FTS5 MATCH expression
+
+    Each word becomes a quoted prefix term, so punctuation and FTS operators
+    typed by users can't break the query. Returns '' when nothing is searchable.
+    """
+    terms = re.findall(r'\w+', text or '')
+    if not terms:
+        return ''
+    expression = ' '.join(f'"{term}"*' for term in terms)
+    return f"{column} : ({expression})" if column else expression
+
+def search_full_text(db_path, query, scope='all', limit=20, offset=0):
+    """
+    Ranked full-text search over assessments and extracted document text
+
+    Args:
+        db_path: Path to database file
+        query: Free-text search terms (prefix matched)
+        scope: 'all', 'assessments' or 'documents'
+        limit: Maximum hits per result set
+        offset: Hits to skip, for paging
+
+    Returns:
+        dict: assessments and documents hit lists (best match first) with totals
+    """
+    results = {'query': query, 'assessments': [], 'documents': [],
+               'total_assessments': 0, 'total_documents': 0}
+    match = build_fts_query(query)
+    if not match:
+        return results
+
+    try:
+        conn = get_connection(db_path)
+        c = conn.cursor()
+
+        if scope in ('all', 'assessments'):
+            c.execute("SELECT COUNT(*) FROM assessments_fts WHERE assessments_fts MATCH ?", (match,))
+            results['total_assessments'] = c.fetchone()[0]
+            # Title hits weigh more than body hits
+            c.execute("""
+                SELECT a.id, a.report_id, a.title, a.primary_country, a.source, a.format,
+                       a.date_created, a.url,
+                       bm25(assessments_fts, 5.0, 1.0) AS rank,
+                       snippet(assessments_fts, 1, '<mark>', '</mark>', '…', 24) AS snippet
+                FROM assessments_fts
+                JOIN assessments a ON a.id = assessments_fts.rowid
+                WHERE assessments_fts MATCH ?
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            """, (match, limit, offset))
+            results['assessments'] = [dict(row) for row in c.fetchall()]
+
+        if scope in ('all', 'documents'):
+            c.execute("SELECT COUNT(*) FROM document_content_fts WHERE document_content_fts MATCH ?", (match,))
+            results['total_documents'] = c.fetchone()[0]
+            c.execute("""
+                SELECT dc.id AS content_id, dc.document_id, dc.assessment_id,
+                       a.title, a.report_id, a.url,
+                       bm25(document_content_fts) AS rank,
+                       snippet(document_content_fts, 0, '<mark>', '</mark>', '…', 32) AS snippet
+                FROM document_content_fts
+                JOIN document_content dc ON dc.id = document_content_fts.rowid
+                LEFT JOIN assessments a ON a.id = dc.assessment_id
+                WHERE document_content_fts MATCH ?
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            """, (match, limit, offset))
+            results['documents'] = [dict(row) for row in c.fetchall()]
+
+        return results
+
+    except Exception as e:
+        logger.error(f"Full-text search failed for '{query}': {str(e)}")
+        return results
+
 def record_document_download(db_path, assessment_id, filename, original_url, file_path, file_size=None, mime_type=None, checksum=None):
     """Record a document download in the database"""
     try:
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
+        with transaction(db_path) as conn:
+            c = conn.cursor()
         
-        c.execute("""
-            INSERT INTO document_downloads 
-            (assessment_id, filename, original_url, file_path, file_size, mime_type, checksum)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (assessment_id, filename, original_url, file_path, file_size, mime_type, checksum))
+            c.execute("""
+                INSERT INTO document_downloads 
+                (assessment_id, filename, original_url, file_path, file_size, mime_type, checksum)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (assessment_id, filename, original_url, file_path, file_size, mime_type, checksum))
         
-        download_id = c.lastrowid
+            download_id = c.lastrowid
         
-        # Also create registry entry for future AI processing
-        c.execute("""
-            INSERT INTO document_registry 
-            (assessment_id, download_id, document_type, processing_status)
-            VALUES (?, ?, ?, 'pending')
-        """, (assessment_id, download_id, 'pdf' if filename.endswith('.pdf') else 'other'))
+            # Also create registry entry for future AI processing
+            c.execute("""
+                INSERT INTO document_registry 
+                (assessment_id, download_id, document_type, processing_status)
+                VALUES (?, ?, ?, 'pending')
+            """, (assessment_id, download_id, 'pdf' if filename.endswith('.pdf') else 'other'))
         
-        conn.commit()
-        conn.close()
         logger.info(f"Recorded download: {filename} for assessment {assessment_id}")
         return download_id
         
@@ -634,8 +1291,7 @@ def record_document_download(db_path, assessment_id, filename, original_url, fil
 def get_document_downloads(db_path, assessment_id=None):
     """Get document downloads with integration status flags"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(db_path)
         c = conn.cursor()
         
         if assessment_id:
@@ -663,7 +1319,6 @@ def get_document_downloads(db_path, assessment_id=None):
             """)
         
         rows = c.fetchall()
-        conn.close()
         
         # Parse datetime fields and convert flags to boolean
         result = []
@@ -684,8 +1339,7 @@ def get_document_downloads(db_path, assessment_id=None):
 def get_document_registry_status(db_path, assessment_id=None):
     """Get document registry with processing status"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(db_path)
         c = conn.cursor()
         
         if assessment_id:
@@ -709,7 +1363,6 @@ def get_document_registry_status(db_path, assessment_id=None):
             """)
         
         rows = c.fetchall()
-        conn.close()
         
         # Parse datetime fields
         result = []
@@ -730,8 +1383,7 @@ def get_document_registry_status(db_path, assessment_id=None):
 def get_assessment_with_downloads(db_path, limit=None):
     """Get assessments with their download status"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(db_path)
         c = conn.cursor()
         
         query = """
@@ -749,95 +1401,340 @@ def get_assessment_with_downloads(db_path, limit=None):
         
         c.execute(query)
         rows = c.fetchall()
-        conn.close()
         return [dict(row) for row in rows]
         
     except Exception as e:
         logger.error(f"Failed to get assessments with downloads: {str(e)}")
         return []
 
+# ===== SYNC STATE DATABASE FUNCTIONS =====
+
+def get_sync_state(db_path, query_key):
+    """Get the stored high-water mark for a sync query"""
+    try:
+        conn = get_connection(db_path)
+        c = conn.cursor()
+        
+        c.execute("SELECT * FROM sync_state WHERE query_key = ?", (query_key,))
+        row = c.fetchone()
+        
+        return dict(row) if row else None
+        
+    except Exception as e:
+        logger.error(f"Failed to get sync state for {query_key}: {str(e)}")
+        return None
+
+def update_sync_state(db_path, query_key, country, format_type, country_filter_type,
+                      last_changed, last_report_id, records_seen=0, full_sync=False):
+    """Store the high-water mark reached by a sync run"""
+    try:
+        with transaction(db_path) as conn:
+            c = conn.cursor()
+        
+            now = datetime.now().isoformat()
+            c.execute("""
+                INSERT INTO sync_state (
+                    query_key, country, format, country_filter_type, last_changed,
+                    last_report_id, last_sync, last_full_sync, records_seen
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(query_key) DO UPDATE SET
+                    last_changed = COALESCE(excluded.last_changed, sync_state.last_changed),
+                    last_report_id = COALESCE(excluded.last_report_id, sync_state.last_report_id),
+                    last_sync = excluded.last_sync,
+                    last_full_sync = COALESCE(excluded.last_full_sync, sync_state.last_full_sync),
+                    records_seen = excluded.records_seen
+            """, (query_key, country, format_type, country_filter_type, last_changed,
+                  last_report_id, now, now if full_sync else None, records_seen))
+        
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to update sync state for {query_key}: {str(e)}")
+        return False
+
+# ===== API CACHE =====
+
+def get_cached_api_response(db_path, cache_key):
+    """Look up a cached ReliefWeb API lookup
+    
+    Returns:
+        tuple: (decoded payload, fetched_at epoch seconds), or None if not cached
+    """
+    try:
+        conn = get_connection(db_path)
+        row = conn.execute("SELECT payload, fetched_at FROM api_cache WHERE cache_key = ?",
+                           (cache_key,)).fetchone()
+        return (json.loads(row['payload']), row['fetched_at']) if row else None
+        
+    except Exception as e:
+        logger.error(f"Failed to read API cache for {cache_key}: {str(e)}")
+        return None
+
+def store_cached_api_response(db_path, cache_key, payload, fetched_at):
+    """Store (or replace) a ReliefWeb API lookup result"""
+    try:
+        with transaction(db_path) as conn:
+            create_api_cache_table(conn.cursor())
+            conn.execute("""
+                INSERT INTO api_cache (cache_key, payload, fetched_at) VALUES (?, ?, ?)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    payload = excluded.payload,
+                    fetched_at = excluded.fetched_at
+            """, (cache_key, json.dumps(payload), fetched_at))
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to store API cache for {cache_key}: {str(e)}")
+        return False
+
 # ===== CONTENT EXTRACTION DATABASE FUNCTIONS =====
 
 def update_content_processing_status(db_path, document_id, status, error_message=None):
     """Update content processing status for a document"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        with transaction(db_path) as conn:
+            cursor = conn.cursor()
+        
+            if error_message:
+                cursor.execute('''
+                    UPDATE content_metadata 
+                    SET processing_status = ?, updated_date = CURRENT_TIMESTAMP
+                    WHERE document_id = ?
+                ''', (status, document_id))
+            else:
+                cursor.execute('''
+                    UPDATE content_metadata 
+                    SET processing_status = ?, updated_date = CURRENT_TIMESTAMP
+                    WHERE document_id = ?
+                ''', (status, document_id))
         
-        if error_message:
-            cursor.execute('''
-                UPDATE content_metadata 
-                SET processing_status = ?, updated_date = CURRENT_TIMESTAMP
-                WHERE document_id = ?
-            ''', (status, document_id))
-        else:
-            cursor.execute('''
-                UPDATE content_metadata 
-                SET processing_status = ?, updated_date = CURRENT_TIMESTAMP
-                WHERE document_id = ?
-            ''', (status, document_id))
-        
-        conn.commit()
-        conn.close()
         return True
         
     except Exception as e:
         logger.error(f"Error updating content processing status: {e}")
         return False
 
-def record_content_extraction(db_path, content_metadata):
-    """Record content extraction results"""
+# ===== CONTENT PROCESSING JOB QUEUE =====
+
+def enqueue_processing_jobs(db_path, document_ids, job_type='extraction', processing_options=None):
+    """Queue one pending job per document under a new batch id
+    
+    Returns:
+        str: The batch id used to track progress
+    """
+    batch_id = uuid.uuid4().hex
+    options = json.dumps(processing_options or {})
+    with transaction(db_path) as conn:
+        conn.executemany("""
+            INSERT INTO content_processing_jobs (document_id, job_type, status, processing_options, batch_id)
+            VALUES (?, ?, 'pending', ?, ?)
+        """, [(document_id, job_type, options, batch_id) for document_id in document_ids])
+    
+    logger.info(f"📋 Queued {len(document_ids)} {job_type} jobs in batch {batch_id}")
+    return batch_id
+
+def claim_processing_job(db_path, worker):
+    """Atomically mark the oldest pending job as running and return it
+    
+    The select-and-update is one statement, so concurrent workers (threads
+    or processes) can never claim the same job.
+    
+    Returns:
+        dict: The claimed job row, or None if the queue is empty
+    """
+    with transaction(db_path) as conn:
+        row = conn.execute("""
+            UPDATE content_processing_jobs
+            SET status = 'running', start_time = ?, worker = ?
+            WHERE id = (
+                SELECT id FROM content_processing_jobs
+                WHERE status = 'pending'
+                ORDER BY id
+                LIMIT 1
+            )
+            RETURNING *
+        """, (datetime.now().isoformat(), worker)).fetchone()
+    return dict(row) if row else None
+
+def finish_processing_job(db_path, job_id, status, error_message=None, results_summary=None):
+    """Record the outcome and timing of a claimed job"""
+    end_time = datetime.now()
+    with transaction(db_path) as conn:
+        row = conn.execute("SELECT start_time FROM content_processing_jobs WHERE id = ?", (job_id,)).fetchone()
+        start_time = datetime.fromisoformat(row['start_time']) if row and row['start_time'] else None
+        conn.execute("""
+            UPDATE content_processing_jobs
+            SET status = ?, end_time = ?, processing_time = ?, error_message = ?, results_summary = ?
+            WHERE id = ?
+        """, (status, end_time.isoformat(),
+              (end_time - start_time).total_seconds() if start_time else None,
+              error_message, json.dumps(results_summary) if results_summary is not None else None,
+              job_id))
+
+# A running job whose worker can't be checked is presumed dead after this long
+JOB_LEASE_SECONDS = 6 * 60 * 60
+
+def requeue_stale_jobs(db_path, lease_seconds=JOB_LEASE_SECONDS, is_worker_alive=None):
+    """Return running jobs whose worker has gone back to the pending state
+    
+    A job is stale once its lease has expired or, when is_worker_alive is
+    given, once is_worker_alive(worker) is False. Jobs still held by live
+    workers in other processes are left alone.
+    
+    Returns:
+        int: Number of jobs requeued
+    """
+    cutoff = (datetime.now() - timedelta(seconds=lease_seconds)).isoformat()
+    with transaction(db_path) as conn:
+        running = conn.execute("""
+            SELECT id, worker, start_time FROM content_processing_jobs WHERE status = 'running'
+        """).fetchall()
+        stale = [(row['id'], row['worker']) for row in running
+                 if not row['start_time'] or row['start_time'] < cutoff
+                 or (is_worker_alive is not None and not is_worker_alive(row['worker']))]
+        # Guard on the worker too, in case the job finished or moved on meanwhile
+        count = 0
+        for job_id, worker in stale:
+            count += conn.execute("""
+                UPDATE content_processing_jobs
+                SET status = 'pending', start_time = NULL, worker = NULL
+                WHERE id = ? AND status = 'running' AND worker IS ?
+            """, (job_id, worker)).rowcount
+    if count:
+        logger.warning(f"♻️ Requeued {count} jobs whose worker stopped or whose lease expired")
+    return count
+
+def get_processing_batch_status(db_path, batch_id):
+    """Summarise progress of a batch of queued jobs
+    
+    Returns:
+        dict: Status counts, progress percentage and per-job results, or None if unknown
+    """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        conn = get_connection(db_path)
+        rows = [dict(r) for r in conn.execute("""
+            SELECT id, document_id, status, start_time, end_time, processing_time,
+                   error_message, results_summary
+            FROM content_processing_jobs
+            WHERE batch_id = ?
+            ORDER BY id
+        """, (batch_id,)).fetchall()]
+        
+        if not rows:
+            return None
+        
+        counts = {'pending': 0, 'running': 0, 'completed': 0, 'failed': 0}
+        for row in rows:
+            counts[row['status']] = counts.get(row['status'], 0) + 1
+            if row['results_summary']:
+                row['results_summary'] = json.loads(row['results_summary'])
         
-        # First, insert into document_content table (actual schema columns)
-        cursor.execute('''
-            INSERT INTO document_content (
-                document_id, assessment_id, original_text, cleaned_text,
-                extraction_method, extraction_confidence, page_count, word_count,
-                char_count, processing_time
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            content_metadata['document_id'],
-            content_metadata.get('assessment_id'),
-            content_metadata.get('content_text', ''),  # Map content_text to original_text
-            content_metadata.get('content_text', ''),  # Also use as cleaned_text for now
-            content_metadata.get('extraction_method', 'automated'),
-            content_metadata.get('extraction_confidence', 0.95),
-            content_metadata.get('page_count', 1),
-            content_metadata.get('word_count', 0),
-            len(content_metadata.get('content_text', '')),  # char_count
-            content_metadata.get('processing_time', 0.0)
-        ))
-        
-        # Get the content_id from the insert
-        content_id = cursor.lastrowid
-        
-        # Insert into content_metadata table (if it has the required columns)
-        try:
-            cursor.execute('''
-                INSERT INTO content_metadata (
-                    content_id, key_terms, named_entities, readability_scores,
-                    language_features, content_statistics, chunk_statistics,
-                    confidence_score
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                content_id,
-                content_metadata.get('key_topics', ''),
-                content_metadata.get('named_entities', ''),
-                content_metadata.get('readability_score', ''),
-                content_metadata.get('language', ''),
-                json.dumps({'word_count': content_metadata.get('word_count', 0)}),
-                '{}',  # Empty chunk statistics for now
-                content_metadata.get('extraction_confidence', 0.95)
-            ))
-        except sqlite3.OperationalError as e:
-            # If content_metadata table structure is different, skip this insert
-            logger.warning(f"Could not insert into content_metadata: {e}")
-        
-        conn.commit()
-        conn.close()
+        finished = counts['completed'] + counts['failed']
+        return {
+            'batch_id': batch_id,
+            'total': len(rows),
+            'counts': counts,
+            'finished': finished,
+            'progress': round(100.0 * finished / len(rows), 1),
+            'done': finished == len(rows),
+            'jobs': rows
+        }
+        
+    except Exception as e:
+        logger.error(f"Failed to get batch status for {batch_id}: {str(e)}")
+        return None
+
+def get_document_download_by_id(db_path, download_id):
+    """Get a single document_downloads row by ID"""
+    try:
+        conn = get_connection(db_path)
+        row = conn.execute("SELECT * FROM document_downloads WHERE id = ?", (download_id,)).fetchone()
+        return dict(row) if row else None
+        
+    except Exception as e:
+        logger.error(f"Failed to get document download {download_id}: {str(e)}")
+        return None
+
+def record_content_extraction(db_path, content_metadata):
+    """Record content extraction results
+    
+    Re-processing a document updates its existing document_content row (the
+    content_id stays stable) instead of appending a new one.
+    """
+    try:
+        with transaction(db_path) as conn:
+            cursor = conn.cursor()
+            content_text = content_metadata.get('content_text', '')
+            values = (
+                content_metadata.get('assessment_id'),
+                content_text,  # Map content_text to original_text
+                content_text,  # Also use as cleaned_text for now
+                content_metadata.get('extraction_method', 'automated'),
+                content_metadata.get('extraction_confidence', 0.95),
+                content_metadata.get('page_count', 1),
+                content_metadata.get('word_count', 0),
+                len(content_text),  # char_count
+                content_metadata.get('processing_time', 0.0)
+            )
+        
+            # Update the latest row for this document, or insert the first one
+            row = cursor.execute('''
+                UPDATE document_content SET
+                    assessment_id = ?, original_text = ?, cleaned_text = ?,
+                    extraction_method = ?, extraction_confidence = ?, page_count = ?, word_count = ?,
+                    char_count = ?, processing_time = ?, created_at = CURRENT_TIMESTAMP
+                WHERE id = (SELECT MAX(id) FROM document_content WHERE document_id = ?)
+                RETURNING id
+            ''', values + (content_metadata['document_id'],)).fetchone()
+        
+            if row:
+                content_id = row[0]
+            else:
+                cursor.execute('''
+                    INSERT INTO document_content (
+                        assessment_id, original_text, cleaned_text,
+                        extraction_method, extraction_confidence, page_count, word_count,
+                        char_count, processing_time, document_id
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', values + (content_metadata['document_id'],))
+                content_id = cursor.lastrowid
+        
+            # Upsert into content_metadata table (if it has the required columns)
+            try:
+                metadata_values = (
+                    content_metadata.get('key_topics', ''),
+                    content_metadata.get('named_entities', ''),
+                    content_metadata.get('readability_score', ''),
+                    content_metadata.get('language', ''),
+                    json.dumps({'word_count': content_metadata.get('word_count', 0)}),
+                    '{}',  # Empty chunk statistics for now
+                    content_metadata.get('extraction_confidence', 0.95),
+                    content_id
+                )
+                cursor.execute('''
+                    UPDATE content_metadata SET
+                        key_terms = ?, named_entities = ?, readability_scores = ?,
+                        language_features = ?, content_statistics = ?, chunk_statistics = ?,
+                        confidence_score = ?, extraction_date = CURRENT_TIMESTAMP
+                    WHERE content_id = ?
+                ''', metadata_values)
+                if cursor.rowcount == 0:
+                    cursor.execute('''
+                        INSERT INTO content_metadata (
+                            key_terms, named_entities, readability_scores,
+                            language_features, content_statistics, chunk_statistics,
+                            confidence_score, content_id
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', metadata_values)
+            except sqlite3.OperationalError as e:
+                # If content_metadata table structure is different, skip this insert
+                logger.warning(f"Could not insert into content_metadata: {e}")
+        
+            # Chunk vectors from the processing pipeline are stored as binary blobs
+            if content_metadata.get('chunks') and len(content_metadata.get('embeddings', [])):
+                _write_chunk_embeddings(cursor, content_id, content_metadata['chunks'], content_metadata['embeddings'],
+                                        content_metadata.get('embedding_model'),
+                                        content_metadata.get('embedding_dtype', 'float32'))
         
         logger.info(f"Content extraction recorded for document {content_metadata['document_id']}")
         return content_id
@@ -846,11 +1743,103 @@ def record_content_extraction(db_path, content_metadata):
         logger.error(f"Error recording content extraction: {e}")
         return False
 
+# ===== EXTRACTION CACHE =====
+
+def get_cached_extraction(db_path, checksum, extractor_version):
+    """Look up a cached extraction by file checksum and extractor version"""
+    try:
+        conn = get_connection(db_path)
+        row = conn.execute(
+            "SELECT * FROM extraction_cache WHERE checksum = ? AND extractor_version = ?",
+            (checksum, extractor_version)
+        ).fetchone()
+        if not row:
+            return None
+        
+        cached = dict(row)
+        cached['metadata'] = json.loads(cached['metadata']) if cached['metadata'] else {}
+        return cached
+        
+    except Exception as e:
+        logger.error(f"Failed to read extraction cache for {checksum}: {str(e)}")
+        return None
+
+def store_cached_extraction(db_path, checksum, extractor_version, content_text, page_count=None,
+                            extraction_confidence=None, extraction_method=None, metadata=None):
+    """Store (or replace) the extraction result for a file checksum"""
+    try:
+        with transaction(db_path) as conn:
+            conn.execute("""
+                INSERT INTO extraction_cache
+                (checksum, extractor_version, content_text, page_count, extraction_confidence, extraction_method, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (checksum, extractor_version) DO UPDATE SET
+                    content_text = excluded.content_text,
+                    page_count = excluded.page_count,
+                    extraction_confidence = excluded.extraction_confidence,
+                    extraction_method = excluded.extraction_method,
+                    metadata = excluded.metadata,
+                    created_at = CURRENT_TIMESTAMP
+            """, (checksum, extractor_version, content_text, page_count, extraction_confidence,
+                  extraction_method, json.dumps(metadata or {})))
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to store extraction cache for {checksum}: {str(e)}")
+        return False
+
+def get_cached_embeddings(db_path, cache_keys):
+    """Fetch cached embedding vectors (raw float32 bytes) for the given cache keys
+    
+    Returns:
+        dict: cache_key -> (dimension, vector bytes) for the keys that are cached
+    """
+    try:
+        conn = get_connection(db_path)
+        cached = {}
+        cache_keys = list(cache_keys)
+        for start in range(0, len(cache_keys), 500):
+            batch = cache_keys[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            for row in conn.execute(
+                f"SELECT cache_key, dimension, vector FROM embedding_cache WHERE cache_key IN ({placeholders})", batch
+            ):
+                cached[row['cache_key']] = (row['dimension'], row['vector'])
+        return cached
+        
+    except Exception as e:
+        logger.error(f"Failed to read embedding cache: {str(e)}")
+        return {}
+
+def store_cached_embeddings(db_path, rows):
+    """Store embedding vectors given as (cache_key, model, dimension, vector bytes) tuples"""
+    try:
+        with transaction(db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (cache_key, model, dimension, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to store embedding cache: {str(e)}")
+        return False
+
+def update_document_checksum(db_path, document_id, checksum):
+    """Backfill the checksum of a downloaded document"""
+    try:
+        with transaction(db_path) as conn:
+            conn.execute("UPDATE document_downloads SET checksum = ? WHERE id = ?", (checksum, document_id))
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to update checksum for document {document_id}: {str(e)}")
+        return False
+
 def get_content_metadata(db_path, document_id=None, limit=None):
     """Get content metadata with optional filtering"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(db_path)
         cursor = conn.cursor()
         
         query = '''
@@ -878,7 +1867,6 @@ def get_content_metadata(db_path, document_id=None, limit=None):
         cursor.execute(query, params)
         results = [dict(row) for row in cursor.fetchall()]
         
-        conn.close()
         return results
         
     except Exception as e:
@@ -888,8 +1876,7 @@ def get_content_metadata(db_path, document_id=None, limit=None):
 def get_extracted_content_simple(db_path, limit=None):
     """Get simple extracted content list for dashboard (fallback method)"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(db_path)
         cursor = conn.cursor()
         
         # Try to get from document_content table first
@@ -911,9 +1898,206 @@ def get_extracted_content_simple(db_path, limit=None):
             # Fallback: return empty list if table doesn't exist
             results = []
         
-        conn.close()
         return results
         
     except Exception as e:
         logger.error(f"Error getting extracted content: {e}")
-        return []
\ No newline at end of file
+        return []
+
+# ===== EMBEDDING STORAGE =====
+
+EMBEDDING_DTYPES = ('float32', 'float16', 'int8')
+
+def encode_embedding(vector, dtype='float32'):
+    """
+    Pack a vector into a compact BLOB
+    
+    int8 uses symmetric per-vector quantisation; the returned scale maps the
+    stored integers back to floats (it is None for float dtypes).
+    
+    Returns:
+        tuple: (blob bytes, scale)
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    if dtype == 'int8':
+        scale = float(np.abs(vector).max()) / 127 or 1.0
+        return np.round(vector / scale).astype(np.int8).tobytes(), scale
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    return vector.astype(dtype).tobytes(), None
+
+def decode_embedding(blob, dtype='float32', scale=None):
+    """Unpack a BLOB written by encode_embedding into a float32 vector (zero-copy for float32)"""
+    vector = np.frombuffer(blob, dtype=dtype)
+    if dtype == 'int8':
+        return vector.astype(np.float32) * np.float32(scale)
+    return vector if dtype == 'float32' else vector.astype(np.float32)
+
+def _write_chunk_embeddings(cursor, content_id, chunks, embeddings, model=None, dtype='float32'):
+    """Replace the stored chunk embeddings of one document_content row
+    
+    Rows are updated in place by (content_id, chunk_id), so re-processing a
+    document keeps each chunk's document_embeddings.id (its vector index id);
+    only chunks that no longer exist are deleted.
+    
+    Returns:
+        list: document_embeddings ids, one per chunk
+    """
+    cursor.execute("SELECT id, chunk_id FROM document_embeddings WHERE content_id = ? ORDER BY id", (content_id,))
+    existing = {}
+    stale = []
+    for embedding_id, chunk_id in cursor.fetchall():
+        if chunk_id in existing:
+            stale.append(embedding_id)
+        else:
+            existing[chunk_id] = embedding_id
+    
+    ids = []
+    for offset, (chunk, vector) in enumerate(zip(chunks, embeddings)):
+        chunk_id = chunk.get('chunk_id', offset)
+        blob, scale = encode_embedding(vector, dtype)
+        values = (chunk.get('text'), chunk.get('start_pos'), chunk.get('start_pos', 0) + len(chunk.get('text', '')),
+                  len(vector), model, blob, dtype, scale)
+        embedding_id = existing.pop(chunk_id, None)
+        if embedding_id is not None:
+            cursor.execute("""
+                UPDATE document_embeddings SET
+                    chunk_text = ?, chunk_start_pos = ?, chunk_end_pos = ?, embedding_dimension = ?,
+                    embedding_model = ?, embedding_blob = ?, embedding_dtype = ?, embedding_scale = ?,
+                    embedding_vector = NULL, created_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, values + (embedding_id,))
+        else:
+            cursor.execute("""
+                INSERT INTO document_embeddings
+                (chunk_text, chunk_start_pos, chunk_end_pos, embedding_dimension, embedding_model,
+                 embedding_blob, embedding_dtype, embedding_scale, content_id, chunk_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, values + (content_id, chunk_id))
+            embedding_id = cursor.lastrowid
+        ids.append(embedding_id)
+    
+    stale.extend(existing.values())
+    if stale:
+        cursor.executemany("DELETE FROM document_embeddings WHERE id = ?", [(i,) for i in stale])
+    return ids
+
+def store_chunk_embeddings(db_path, content_id, chunks, embeddings, model=None, dtype='float32'):
+    """
+    Store chunk embeddings for a document as binary vectors
+    
+    Args:
+        chunks: Chunk dicts from ContentProcessor.chunk_text
+        embeddings: One vector per chunk (float32 array or lists)
+        dtype: 'float32', 'float16' or 'int8' (quantised)
+    
+    Returns:
+        int: Number of embeddings stored, or 0 on failure
+    """
+    try:
+        with transaction(db_path) as conn:
+            return len(_write_chunk_embeddings(conn.cursor(), content_id, chunks, embeddings, model, dtype))
+        
+    except Exception as e:
+        logger.error(f"Failed to store embeddings for content {content_id}: {str(e)}")
+        return 0
+
+def load_embedding_matrix(db_path, model=None, content_ids=None):
+    """
+    Load stored embeddings as one matrix for bulk index builds
+    
+    All blobs are read in a single query; float32 rows are joined into one
+    buffer (one copy) and decoded with a single numpy.frombuffer call rather
+    than one call per vector.
+    
+    Returns:
+        tuple: (embedding row ids as int64 array, float32 matrix of shape (n, dimension))
+    """
+    try:
+        conn = get_connection(db_path)
+        query = """
+            SELECT id, embedding_blob, embedding_dtype, embedding_scale, embedding_dimension
+            FROM document_embeddings WHERE embedding_blob IS NOT NULL
+        """
+        params = []
+        if model:
+            query += " AND embedding_model = ?"
+            params.append(model)
+        if content_ids:
+            query += f" AND content_id IN ({','.join('?' * len(content_ids))})"
+            params.extend(content_ids)
+        rows = conn.execute(query + " ORDER BY id", params).fetchall()
+        
+        if not rows:
+            return np.array([], dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        
+        ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        dimension = rows[0]['embedding_dimension']
+        if all(row['embedding_dtype'] == 'float32' for row in rows):
+            matrix = np.frombuffer(b''.join(row['embedding_blob'] for row in rows), dtype=np.float32)
+            return ids, matrix.reshape(len(rows), dimension)
+        
+        matrix = np.vstack([decode_embedding(row['embedding_blob'], row['embedding_dtype'], row['embedding_scale'])
+                            for row in rows])
+        return ids, matrix
+        
+    except Exception as e:
+        logger.error(f"Failed to load embedding matrix: {str(e)}")
+        return np.array([], dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+
+def get_embedding_entries(db_path, embedding_ids):
+    """
+    Chunk details for stored embeddings, for building the vector index
+    
+    Returns:
+        dict: embedding id -> {document_id, chunk_index, text}
+    """
+    try:
+        conn = get_connection(db_path)
+        entries = {}
+        embedding_ids = list(embedding_ids)
+        for start in range(0, len(embedding_ids), 500):
+            batch = embedding_ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            for row in conn.execute(f"""
+                SELECT de.id, dc.document_id, de.chunk_id, de.chunk_text
+                FROM document_embeddings de
+                LEFT JOIN document_content dc ON dc.id = de.content_id
+                WHERE de.id IN ({placeholders})
+            """, batch):
+                entries[row['id']] = {'document_id': row['document_id'], 'chunk_index': row['chunk_id'],
+                                      'text': row['chunk_text'] or ''}
+        return entries
+        
+    except Exception as e:
+        logger.error(f"Failed to load embedding entries: {str(e)}")
+        return {}
+
+def get_documents_with_assessments(db_path, document_ids):
+    """
+    Downloaded documents joined to their assessments, for search results
+    
+    Returns:
+        dict: document_downloads.id -> filename, original_url and assessment fields
+    """
+    try:
+        conn = get_connection(db_path)
+        documents = {}
+        document_ids = list(document_ids)
+        for start in range(0, len(document_ids), 500):
+            batch = document_ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            for row in conn.execute(f"""
+                SELECT d.id AS document_id, d.filename, d.original_url, d.assessment_id,
+                       a.report_id, a.title, a.url, a.primary_country, a.country, a.source,
+                       a.format, a.date_created
+                FROM document_downloads d
+                LEFT JOIN assessments a ON d.assessment_id = a.id
+                WHERE d.id IN ({placeholders})
+            """, batch):
+                documents[row['document_id']] = dict(row)
+        return documents
+        
+    except Exception as e:
+        logger.error(f"Failed to load documents for search results: {str(e)}")
+        return {}
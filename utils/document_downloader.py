@@ -0,0 +1,81 @@
+"""
+Streaming writes and checksums for downloaded documents
+"""
+import os
+import hashlib
+import logging
+import tempfile
+from typing import Any, Dict
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+class HashingFileWriter:
+    """
+    Write a file chunk by chunk, hashing it on the way through
+
+    Chunks go to a temp file in the target directory; commit() renames it
+    into place once complete and discard() removes it, so a failed download
+    never leaves a partial file under the final name.
+    """
+
+    def __init__(self, file_path: str):
+        directory = os.path.dirname(file_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        self.file_path = file_path
+        self.file_size = 0
+        self._sha256 = hashlib.sha256()
+        fd, self._temp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.part')
+        self._file = os.fdopen(fd, 'wb')
+
+    def write(self, chunk: bytes):
+        if chunk:
+            self._file.write(chunk)
+            self._sha256.update(chunk)
+            self.file_size += len(chunk)
+
+    def commit(self) -> Dict[str, Any]:
+        """
+        Move the finished file into place
+
+        Returns:
+            dict: file_size and checksum (SHA-256 hex digest)
+        """
+        self._file.close()
+        os.replace(self._temp_path, self.file_path)
+        return {'file_size': self.file_size, 'checksum': self._sha256.hexdigest()}
+
+    def discard(self):
+        """Drop the partial file"""
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+def stream_to_file(response: requests.Response, file_path: str, chunk_size: int = 256 * 1024) -> Dict[str, Any]:
+    """
+    Stream a response body to disk and hash it on the way through
+
+    The body goes to a temp file in the target directory which is renamed
+    into place once complete, so a failed download never leaves a partial
+    file under the final name.
+
+    Returns:
+        dict: file_size and checksum (SHA-256 hex digest)
+    """
+    writer = HashingFileWriter(file_path)
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            writer.write(chunk)
+        return writer.commit()
+    except BaseException:
+        writer.discard()
+        raise
+
+def file_checksum(file_path: str, chunk_size: int = 256 * 1024) -> str:
+    """SHA-256 hex digest of a file on disk, matching stream_to_file's checksum"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,132 @@
+"""
+Batched chunk embedding service with a SQLite vector cache
+"""
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from utils.db_connection import DB_PATH
+from utils.db_utils import get_cached_embeddings, store_cached_embeddings
+
+logger = logging.getLogger(__name__)
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    """Cache key for one chunk: SHA-256 of model name and chunk text"""
+    return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+class EmbeddingService:
+    """Encode chunk texts in batches, reusing cached vectors
+
+    Vectors are L2-normalised by the model at encode time and returned as
+    float32 arrays. Each vector is cached by hash of (model name, chunk
+    text), so only new or changed chunks are ever sent to the model.
+    """
+
+    BATCH_SIZE = 64
+    QUERY_CACHE_SIZE = 512
+
+    def __init__(self, db_path: str = None, model_name: str = None, batch_size: int = None, model=None,
+                 query_cache_size: int = None):
+        from utils.content_processing import EMBEDDING_MODEL
+        self.db_path = db_path or DB_PATH
+        self.model_name = model_name or EMBEDDING_MODEL
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self._model = model
+        self._lock = threading.Lock()
+        self._query_cache = lru_cache(maxsize=query_cache_size or self.QUERY_CACHE_SIZE)(self._encode_query)
+
+    @property
+    def model(self):
+        """The sentence transformer, shared with ContentProcessor for the default model"""
+        if self._model is None:
+            from utils.content_processing import EMBEDDING_MODEL, content_processor
+            if self.model_name == EMBEDDING_MODEL:
+                self._model = content_processor.embedding_model
+            else:
+                with self._lock:
+                    if self._model is None:
+                        from sentence_transformers import SentenceTransformer
+                        self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a list of chunk texts
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension); an
+            empty array if nothing could be embedded
+        """
+        if not texts:
+            return np.array([], dtype=np.float32)
+
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        vectors = {key: np.frombuffer(vector, dtype=np.float32)
+                   for key, (_, vector) in get_cached_embeddings(self.db_path, set(keys)).items()}
+
+        # Encode each distinct uncached text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            if not self.model:
+                logger.error("Embedding model not available")
+                return np.array([], dtype=np.float32)
+
+            try:
+                encoded = self.model.encode(list(missing.values()), batch_size=self.batch_size,
+                                            normalize_embeddings=True, convert_to_numpy=True)
+                encoded = np.asarray(encoded, dtype=np.float32)
+            except Exception as e:
+                logger.error(f"Error generating embeddings: {e}")
+                return np.array([], dtype=np.float32)
+
+            vectors.update(zip(missing, encoded))
+            store_cached_embeddings(self.db_path, [
+                (key, self.model_name, int(vector.shape[0]), vector.tobytes())
+                for key, vector in zip(missing, encoded)
+            ])
+
+        logger.info(f"🧮 Embedded {len(texts)} chunks ({len(missing)} encoded, {len(texts) - len(missing)} from cache)")
+        return np.vstack([vectors[key] for key in keys])
+
+    def _encode_query(self, text: str) -> Optional[np.ndarray]:
+        if not self.model:
+            logger.error("Embedding model not available")
+            return None
+        vector = self.model.encode([text], normalize_embeddings=True, convert_to_numpy=True)[0]
+        vector = np.asarray(vector, dtype=np.float32)
+        vector.flags.writeable = False
+        return vector
+
+    def embed_query(self, text: str) -> Optional[np.ndarray]:
+        """
+        Embed a search query with the chunk model, memoised in an in-process LRU
+
+        Queries are not written to the SQLite chunk cache.
+
+        Returns:
+            np.ndarray: read-only float32 vector, or None if the model is unavailable
+        """
+        vector = self._query_cache(text.strip())
+        if vector is None:
+            # Don't remember a failed load
+            self._query_cache.cache_clear()
+        return vector
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+def get_embedding_service(db_path: str = None) -> EmbeddingService:
+    """Get the process-wide embedding service for the default model"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmbeddingService(db_path)
+        return _service
@@ -0,0 +1,217 @@
+"""
+SQLite-backed background job queue for document content extraction
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from utils.db_utils import (get_document_download_by_id, record_content_extraction, claim_processing_job,
+                            finish_processing_job, requeue_stale_jobs, get_cached_extraction,
+                            store_cached_extraction, update_document_checksum)
+from utils.document_downloader import file_checksum
+
+logger = logging.getLogger(__name__)
+
+# Striped locks keyed by checksum so identical files queued together are
+# extracted once; a fixed pool keeps memory flat however many files are seen
+CHECKSUM_LOCK_STRIPES = 64
+_checksum_locks = [threading.Lock() for _ in range(CHECKSUM_LOCK_STRIPES)]
+
+def worker_is_alive(worker: Optional[str]) -> bool:
+    """Whether the process that claimed a job (worker "pid:thread") is still running
+
+    Unknown workers count as alive, leaving them to the job lease.
+    """
+    try:
+        pid = int((worker or '').split(':', 1)[0])
+    except ValueError:
+        return True
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def extract_document_content(db_path: str, document: Dict[str, Any]) -> Tuple[Any, bool]:
+    """
+    Extract a downloaded document, reusing the cached result for identical files
+
+    Results are keyed by the file's SHA-256 checksum plus EXTRACTOR_VERSION;
+    documents recorded without a checksum have it computed and backfilled.
+
+    Returns:
+        tuple: (ExtractedContent, whether it came from the cache)
+    """
+    from utils.content_extractors import EXTRACTOR_VERSION, ExtractedContent, get_extraction_engine
+
+    checksum = document.get('checksum')
+    if not checksum:
+        checksum = file_checksum(document['file_path'])
+        update_document_checksum(db_path, document['id'], checksum)
+
+    with _checksum_locks[hash(checksum) % CHECKSUM_LOCK_STRIPES]:
+        cached = get_cached_extraction(db_path, checksum, EXTRACTOR_VERSION)
+        if cached:
+            logger.info(f"♻️ Extraction cache hit for document {document['id']} ({checksum[:12]})")
+            return ExtractedContent(text=cached['content_text'] or '', page_count=cached['page_count'] or 0,
+                                    confidence=cached['extraction_confidence'],
+                                    metadata=cached['metadata']), True
+
+        # Parsing runs in the shared process pool; this thread only waits on it
+        extracted_content = get_extraction_engine().extract(document['file_path'])
+        if extracted_content.text.strip():
+            store_cached_extraction(db_path, checksum, EXTRACTOR_VERSION, extracted_content.text,
+                                    extracted_content.page_count, extracted_content.confidence,
+                                    extracted_content.metadata.get('extraction_method'),
+                                    extracted_content.metadata)
+        return extracted_content, False
+
+def extract_document(db_path: str, document_id: int, extraction_method: str = 'bulk_extraction') -> Dict[str, Any]:
+    """
+    Extract the text of one downloaded document, store it with its chunk
+    embeddings and add those to the shared vector index
+
+    Returns:
+        dict: success flag plus word_count/content_id, or an error message
+    """
+    document = get_document_download_by_id(db_path, document_id)
+    if not document:
+        return {'success': False, 'error': 'Document not found'}
+
+    file_path = document.get('file_path')
+    if not file_path or not os.path.exists(file_path):
+        return {'success': False, 'error': 'File not found on disk'}
+
+    from utils.content_extractors import ContentExtractorFactory
+    if not ContentExtractorFactory.get_extractor(file_path):
+        return {'success': False, 'error': 'Unsupported file format'}
+
+    started = time.time()
+    extracted_content, cached = extract_document_content(db_path, document)
+    if not extracted_content or not extracted_content.text:
+        return {'success': False, 'error': 'No text content found'}
+
+    # Chunk and embed the text so the document shows up in semantic search;
+    # only chunks and vectors are stored, so entity tagging is skipped
+    from utils.content_processing import process_content_pipeline
+    try:
+        processed = process_content_pipeline(extracted_content.text, analyze=False, db_path=db_path)
+    except Exception as e:
+        logger.error(f"❌ Could not embed document {document_id}: {e}")
+        processed = {}
+
+    word_count = len(extracted_content.text.split())
+    content_id = record_content_extraction(db_path, {
+        'document_id': document_id,
+        'assessment_id': document.get('assessment_id'),
+        'content_text': extracted_content.text,
+        'word_count': word_count,
+        'page_count': extracted_content.page_count or 1,
+        'extraction_method': extraction_method,
+        'processing_status': 'completed',
+        'extraction_confidence': extracted_content.confidence or 0.95,
+        'processing_time': time.time() - started,
+        'chunks': processed.get('chunks', []),
+        'embeddings': processed.get('embeddings', []),
+        'embedding_model': processed.get('embedding_model')
+    })
+    if not content_id:
+        return {'success': False, 'error': 'Failed to save extraction results'}
+
+    # Make the new chunk embeddings searchable without a full index rebuild
+    if len(processed.get('embeddings', [])):
+        from utils.vector_db_utils import index_document_embeddings
+        try:
+            index_document_embeddings(db_path, document_id, content_id)
+        except Exception as e:
+            logger.error(f"❌ Could not index document {document_id}: {e}")
+
+    return {'success': True, 'content_id': content_id, 'word_count': word_count, 'cached': cached,
+            'chunk_count': len(processed.get('embeddings', [])),
+            'message': f"{'Reused' if cached else 'Extracted'} {word_count} words"}
+
+class ExtractionWorkerPool:
+    """Worker threads that claim and run queued extraction jobs
+
+    Jobs live in content_processing_jobs, so queued work survives restarts:
+    when the pool starts, jobs whose worker process has exited (or whose lease
+    expired) are requeued, while jobs held by other live processes are kept.
+    """
+
+    def __init__(self, db_path: str, num_workers: int = None, poll_interval: float = 2.0):
+        self.db_path = db_path
+        self.num_workers = num_workers or os.cpu_count() or 2
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Requeue jobs from dead workers and start the worker threads"""
+        if self._threads:
+            return
+        requeue_stale_jobs(self.db_path, is_worker_alive=worker_is_alive)
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._work, name=f"extraction-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"🚀 Started {self.num_workers} extraction workers")
+
+    def notify(self):
+        """Wake idle workers after new jobs were queued"""
+        self._wake.set()
+
+    def stop(self, timeout: float = None):
+        """Stop the workers once their current jobs finish"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self):
+        worker = threading.current_thread().name
+        while not self._stop.is_set():
+            try:
+                job = claim_processing_job(self.db_path, f"{os.getpid()}:{worker}")
+            except Exception as e:
+                logger.error(f"❌ {worker} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+
+            self._run(job)
+
+    def _run(self, job: Dict[str, Any]):
+        logger.info(f"⚙️ Processing job {job['id']} (document {job['document_id']})")
+        try:
+            result = extract_document(self.db_path, job['document_id'])
+        except Exception as e:
+            logger.error(f"❌ Error processing document {job['document_id']}: {e}")
+            result = {'success': False, 'error': str(e)}
+
+        if result['success']:
+            finish_processing_job(self.db_path, job['id'], 'completed', results_summary=result)
+        else:
+            finish_processing_job(self.db_path, job['id'], 'failed', error_message=result['error'])
+
+_pool: Optional[ExtractionWorkerPool] = None
+_pool_lock = threading.Lock()
+
+def get_worker_pool(db_path: str) -> ExtractionWorkerPool:
+    """Get the process-wide worker pool, starting it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionWorkerPool(db_path)
+            _pool.start()
+        return _pool
@@ -0,0 +1,175 @@
+"""
+Retrying, rate-limited HTTP transport for requests sessions
+"""
+import random
+import threading
+import time
+import logging
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Client-side rate limiter: rate requests per second with bursts up to capacity
+
+    pause() holds every caller back, e.g. while the server is throttling us.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token if one is free (returns 0), else the seconds to wait before retrying
+
+        Never blocks, so asyncio callers can await the delay instead.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if now >= self._paused_until and self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return max(self._paused_until - now, (1 - self._tokens) / self.rate)
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        waited = 0.0
+        while True:
+            delay = self.reserve()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for the next seconds"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class RetryingAdapter(HTTPAdapter):
+    """HTTPAdapter with bounded retries, jittered backoff and Retry-After handling
+
+    Connection errors, timeouts and RETRY_STATUSES are retried up to
+    `retries` times with full-jitter exponential backoff; a Retry-After
+    header, when present, sets the minimum wait and also pauses the shared
+    rate limiter so concurrent workers back off together. Per-endpoint
+    counters are available from metrics().
+    """
+
+    RETRIES = 4
+    BACKOFF_BASE = 0.5    # seconds; the nth retry waits up to BACKOFF_BASE * 2**n
+    BACKOFF_MAX = 30.0
+    RETRY_AFTER_MAX = 120.0  # longer server waits are returned to the caller instead
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, retries: int = None, backoff_base: float = None, backoff_max: float = None,
+                 rate_limiter: Optional[TokenBucket] = None, group_by_path: bool = True, **kwargs):
+        super().__init__(**kwargs)
+        self.retries = self.RETRIES if retries is None else retries
+        self.backoff_base = self.BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = self.BACKOFF_MAX if backoff_max is None else backoff_max
+        self.rate_limiter = rate_limiter
+        self.group_by_path = group_by_path
+        self._sleep = time.sleep
+        self._metrics = defaultdict(lambda: defaultdict(float))
+        self._metrics_lock = threading.Lock()
+
+    def _endpoint(self, request: requests.PreparedRequest) -> str:
+        url = urlparse(request.url)
+        return f"{request.method} {url.netloc}{url.path if self.group_by_path else ''}"
+
+    def _record(self, endpoint: str, **counters):
+        with self._metrics_lock:
+            for name, value in counters.items():
+                self._metrics[endpoint][name] += value
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number attempt (0-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(response: requests.Response) -> Optional[float]:
+        """Seconds requested by a Retry-After header (delta or HTTP date), if any"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def send(self, request, **kwargs):
+        endpoint = self._endpoint(request)
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter:
+                waited = self.rate_limiter.acquire()
+                if waited:
+                    self._record(endpoint, rate_limited_seconds=waited)
+
+            started = time.monotonic()
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(endpoint, requests=1, errors=1, latency_seconds=time.monotonic() - started)
+                if attempt == self.retries:
+                    self._record(endpoint, failures=1)
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"🔁 {endpoint} failed ({e.__class__.__name__}), retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+            else:
+                self._record(endpoint, requests=1, latency_seconds=time.monotonic() - started,
+                             throttled=int(response.status_code == 429))
+                if response.status_code not in self.RETRY_STATUSES:
+                    return response
+
+                retry_after = self.retry_after(response)
+                if attempt == self.retries or (retry_after or 0) > self.RETRY_AFTER_MAX:
+                    self._record(endpoint, failures=1)
+                    return response
+
+                delay = max(retry_after or 0, self.backoff(attempt))
+                if retry_after is not None and self.rate_limiter:
+                    self.rate_limiter.pause(delay)
+                response.close()
+                logger.warning(f"🔁 {endpoint} returned HTTP {response.status_code}, retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+
+            self._record(endpoint, retries=1, backoff_seconds=delay)
+            self._sleep(delay)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint counters: requests, retries, throttled, errors, failures and timings"""
+        with self._metrics_lock:
+            snapshot = {}
+            for endpoint, counters in self._metrics.items():
+                stats = {name: int(counters[name]) for name in ('requests', 'retries', 'throttled', 'errors', 'failures')}
+                stats['avg_latency_ms'] = round(1000 * counters['latency_seconds'] / counters['requests'], 1) if counters['requests'] else 0.0
+                stats['backoff_seconds'] = round(counters['backoff_seconds'], 2)
+                stats['rate_limited_seconds'] = round(counters['rate_limited_seconds'], 2)
+                snapshot[endpoint] = stats
+            return snapshot
+
+def create_session(pool_size: int, headers: Dict[str, str] = None, **adapter_options) -> requests.Session:
+    """A requests session whose http(s) traffic goes through one RetryingAdapter"""
+    session = requests.Session()
+    adapter = RetryingAdapter(pool_connections=pool_size, pool_maxsize=pool_size, **adapter_options)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
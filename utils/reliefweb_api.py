@@ -1,23 +1,107 @@
 import requests
 import logging
+import copy
 import json
 import os
-from typing import Dict, List, Optional, Any, Tuple
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 from datetime import datetime
+from utils.db_connection import DB_PATH
+from utils.document_downloader import stream_to_file
+from utils.http_transport import TokenBucket, create_session
 
 logger = logging.getLogger(__name__)
 
+# fields.include per harvest profile. 'ids' keeps the country fields so the
+# client-side Sudan filter still works, and 'date' for change tracking;
+# 'listing' is everything except the heavy body/body-html text.
+FIELD_PROFILES = {
+    'ids': ["id", "date", "primary_country", "country"],
+    'listing': [
+        "id", "title", "date", "source", "format", "theme", "primary_country",
+        "country", "language", "status", "url", "url_alias", "file", "headline"
+    ],
+    'full': [
+        "id", "title", "body", "body-html", "date", "source", "format",
+        "theme", "primary_country", "country", "language", "status",
+        "url", "url_alias", "file", "headline"
+    ]
+}
+DEFAULT_FIELD_PROFILE = 'full'
+
+# Metadata keys parse_report_item fills from each API field
+FIELD_METADATA_KEYS = {
+    'id': ['report_id'],
+    'title': ['title'],
+    'date': ['date_created', 'date_changed'],
+    'source': ['source'],
+    'format': ['format'],
+    'theme': ['theme'],
+    'primary_country': ['primary_country'],
+    'country': ['country'],
+    'language': ['language'],
+    'status': ['status'],
+    'url': ['url'],
+    'url_alias': ['url_alias'],
+    'body': ['body'],
+    'body-html': ['body_html'],
+    'file': ['file'],
+    'headline': ['headline']
+}
+
+def get_field_profile(filters: Dict[str, Any]) -> str:
+    """Validated field profile for a request (filters['field_profile'], default 'full')"""
+    profile = filters.get('field_profile') or DEFAULT_FIELD_PROFILE
+    if profile not in FIELD_PROFILES:
+        raise ValueError(f"Unknown field profile '{profile}'; expected one of {', '.join(FIELD_PROFILES)}")
+    return profile
+
+class HarvestError(Exception):
+    """Raised when harvest pages still fail after a retry
+
+    assessments holds whatever was harvested from the pages that did arrive,
+    so callers can keep them without mistaking the run for a complete one;
+    counts is set by callers that already saved them (bulk_upsert_metadata).
+    """
+
+    def __init__(self, message: str, failed_offsets: List[int], assessments: List[Dict] = None):
+        super().__init__(message)
+        self.failed_offsets = failed_offsets
+        self.assessments = assessments or []
+        self.counts = None
+
 class ReliefWebAPI:
     BASE_URL = "https://api.reliefweb.int/v1"
     APP_NAME = "sudan-assessment-registry"
     MAX_LIMIT = 1000  # ReliefWeb API maximum limit
-    
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    HARVEST_WORKERS = 4  # Default number of concurrent page requests when harvesting
+    FACET_CACHE_TTL = 6 * 60 * 60  # Seconds a facet list is served before it is refreshed
+    RATE_LIMIT = 5  # API requests per second, shared by all harvest workers
+    RATE_BURST = 10
+    
+    def __init__(self, max_workers: int = None, facet_ttl: float = None, db_path: str = None,
+                 rate_limit: float = None):
+        self.max_workers = max_workers or self.HARVEST_WORKERS
+        self.facet_ttl = self.FACET_CACHE_TTL if facet_ttl is None else facet_ttl
+        self.db_path = db_path or DB_PATH
+        # field -> (values, fetched_at); backed by the api_cache table across restarts
+        self._facets = {}
+        self._facets_refreshing = set()
+        self._facets_lock = threading.Lock()
+        # Size the connection pool so concurrent harvest requests reuse connections;
+        # the transport retries throttled/failed calls and keeps us under RATE_LIMIT
+        self.rate_limiter = TokenBucket(rate_limit or self.RATE_LIMIT, self.RATE_BURST)
+        self.session = create_session(self.max_workers, headers={
             'User-Agent': f'{self.APP_NAME}/1.0',
             'Content-Type': 'application/json'
-        })
+        }, rate_limiter=self.rate_limiter)
+        # File downloads are retried too, but don't draw on the API quota
+        self.download_session = create_session(self.max_workers, headers={
+            'User-Agent': f'{self.APP_NAME}/1.0'
+        }, group_by_path=False)
     
     def fetch_reports(self, filters: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -54,6 +138,81 @@ class ReliefWebAPI:
             logger.error(f"Unexpected error: {e}")
             raise Exception(f"Failed to fetch data from ReliefWeb API: {e}")
     
+    def iter_report_pages(self, filters: Dict[str, Any], max_workers: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Harvest every page of a query, yielding raw API responses as they arrive
+        
+        The first page is fetched on its own to read totalCount, then the
+        remaining offsets are requested concurrently over the pooled session.
+        Pages after the first are yielded in completion order, not offset order.
+        A page that fails is retried once after the others; if it fails again
+        HarvestError is raised once every other page has been yielded.
+        
+        Args:
+            filters: Same filters accepted by fetch_reports; an optional
+                'harvest_limit' stops paging once that many records are
+                covered, rounded up to whole MAX_LIMIT pages, so up to a
+                page more may be returned
+            max_workers: Maximum number of concurrent page requests
+        """
+        max_workers = max(1, int(max_workers or self.max_workers))
+        
+        page_filters = dict(filters)
+        page_filters['limit'] = self.MAX_LIMIT
+        page_filters['offset'] = 0
+        # Offset paging needs a deterministic order so pages don't overlap
+        if not page_filters.get('sort'):
+            page_filters['sort'] = ['date.created:desc', 'id:desc']
+        
+        try:
+            first_page = self.fetch_reports(page_filters)
+        except Exception as e:
+            raise HarvestError(f"Harvest failed on the first page: {e}", [0])
+        yield first_page
+        
+        total_count = int(first_page.get('totalCount', 0))
+        requested_limit = filters.get('harvest_limit')
+        if requested_limit:
+            total_count = min(total_count, int(requested_limit))
+        
+        offsets = list(range(self.MAX_LIMIT, total_count, self.MAX_LIMIT))
+        if not offsets:
+            return
+        
+        logger.info(f"🌾 Harvesting {total_count} records: {len(offsets)} more pages with {max_workers} workers")
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(offsets))) as executor:
+            futures = {
+                executor.submit(self.fetch_reports, dict(page_filters, offset=offset)): offset
+                for offset in offsets
+            }
+            failed_offsets = []
+            for future in as_completed(futures):
+                offset = futures[future]
+                try:
+                    page = future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Page at offset {offset} failed, will retry: {e}")
+                    failed_offsets.append(offset)
+                    continue
+                logger.info(f"📄 Received page at offset {offset} ({len(page.get('data', []))} records)")
+                yield page
+        
+        still_failed = []
+        for offset in sorted(failed_offsets):
+            try:
+                page = self.fetch_reports(dict(page_filters, offset=offset))
+            except Exception as e:
+                logger.error(f"❌ Page at offset {offset} failed again: {e}")
+                still_failed.append(offset)
+                continue
+            logger.info(f"📄 Received retried page at offset {offset} ({len(page.get('data', []))} records)")
+            yield page
+        
+        if still_failed:
+            raise HarvestError(f"Harvest incomplete: {len(still_failed)} of {len(offsets) + 1} pages failed "
+                               f"(offsets {still_failed})", still_failed)
+    
     def _build_payload(self, filters: Dict[str, Any]) -> Dict[str, Any]:
         """
         Build the API payload with exact matching for primary countries
@@ -120,6 +279,15 @@ class ReliefWebAPI:
             conditions.append(date_condition)
             logger.info(f"Using date filter: {date_condition}")
         
+        # Incremental sync filter - only records changed since the stored mark
+        changed_since = filters.get('changed_since')
+        if changed_since:
+            conditions.append({
+                "field": "date.changed",
+                "value": {"from": changed_since}
+            })
+            logger.info(f"Using changed-since filter: date.changed >= '{changed_since}'")
+        
         # Theme filter
         theme = filters.get('theme')
         if theme:
@@ -138,6 +306,16 @@ class ReliefWebAPI:
             })
             logger.info(f"Using source filter: source.name = '{source}'")
         
+        # Specific reports, e.g. when back-filling fields skipped by a lighter profile
+        report_ids = filters.get('report_ids')
+        if report_ids:
+            conditions.append({
+                "field": "id",
+                "value": [int(report_id) for report_id in report_ids],
+                "operator": "OR"
+            })
+            logger.info(f"Using report id filter: {len(report_ids)} ids")
+        
         # Language filter
         language = filters.get('language')
         if language:
@@ -169,15 +347,15 @@ class ReliefWebAPI:
         payload = {
             "preset": "latest",
             "fields": {
-                "include": [
-                    "id", "title", "body", "body-html", "date", "source", "format",
-                    "theme", "primary_country", "country", "language", "status",
-                    "url", "url_alias", "file", "headline"
-                ]
+                "include": FIELD_PROFILES[get_field_profile(filters)]
             },
             "limit": actual_limit
         }
         
+        offset = int(filters.get('offset', 0) or 0)
+        if offset:
+            payload["offset"] = offset
+        
         # Only add filter if we have conditions
         if main_filter:
             payload["filter"] = main_filter
@@ -194,66 +372,116 @@ class ReliefWebAPI:
         return json.dumps(payload, indent=2)
     
     def get_available_formats(self) -> List[str]:
-        """Get available formats using facets API"""
-        try:
-            payload = {
-                "facets": [{"field": "format.name", "limit": 100, "sort": "value:asc"}],
-                "limit": 0
-            }
-            
-            response = self.session.post(
-                f"{self.BASE_URL}/reports",
-                json=payload,
-                params={"appname": self.APP_NAME},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                facets_data = data.get('facets', {}).get('format.name', {}).get('data', [])
-                
-                if facets_data:
-                    formats = [item['value'] for item in facets_data]
-                    logger.info(f"Retrieved {len(formats)} formats from facets")
-                    return sorted(formats)
-                    
-            logger.info("Using verified working formats")
-            return self._get_verified_formats()
-                
-        except Exception as e:
-            logger.error(f"Error fetching formats via facets: {e}")
-            return self._get_verified_formats()
+        """Get available formats using facets API, cached for facet_ttl seconds"""
+        return self._get_facet('format.name', 100, self._get_verified_formats)
     
     def get_available_countries(self) -> List[str]:
-        """Get available countries using facets API"""
+        """Get available countries using facets API, cached for facet_ttl seconds"""
+        return self._get_facet('primary_country.name', 500, self._get_verified_countries)
+    
+    @staticmethod
+    def _facet_payload(field: str, limit: int) -> Dict[str, Any]:
+        """Count-free query returning just the values of one facet field"""
+        return {
+            "facets": [{"field": field, "limit": limit, "sort": "value:asc"}],
+            "limit": 0
+        }
+    
+    @staticmethod
+    def _facet_values(data: Dict[str, Any], field: str) -> Optional[List[str]]:
+        """Sorted facet values from an API response, or None if there are none"""
+        facets_data = data.get('facets', {}).get(field, {}).get('data', [])
+        return sorted(item['value'] for item in facets_data) if facets_data else None
+    
+    def _fetch_facet(self, field: str, limit: int) -> Optional[List[str]]:
+        """Fetch the sorted values of one facet field, or None if the API returned none"""
+        response = self.session.post(
+            f"{self.BASE_URL}/reports",
+            json=self._facet_payload(field, limit),
+            params={"appname": self.APP_NAME},
+            timeout=30
+        )
+        
+        if response.status_code == 200:
+            return self._facet_values(response.json(), field)
+        return None
+    
+    def _store_facet(self, field: str, values: List[str]):
+        """Cache freshly fetched facet values in memory and SQLite"""
+        from utils.db_utils import store_cached_api_response
+        
+        fetched_at = time.time()
+        with self._facets_lock:
+            self._facets[field] = (values, fetched_at)
+        store_cached_api_response(self.db_path, f"facet:{field}", values, fetched_at)
+        logger.info(f"Retrieved {len(values)} {field} values from facets")
+    
+    def _cached_facet(self, field: str) -> Optional[Tuple[List[str], float]]:
+        """(values, fetched_at) from memory, else from SQLite after a restart"""
+        from utils.db_utils import get_cached_api_response
+        
+        with self._facets_lock:
+            entry = self._facets.get(field)
+        
+        if entry is None:
+            entry = get_cached_api_response(self.db_path, f"facet:{field}")
+            if entry:
+                with self._facets_lock:
+                    entry = self._facets.setdefault(field, entry)
+        return entry
+    
+    def _refresh_facet(self, field: str, limit: int) -> Optional[List[str]]:
+        """Fetch a facet and store it in memory and SQLite; None (cache untouched) on failure"""
         try:
-            payload = {
-                "facets": [{"field": "primary_country.name", "limit": 500, "sort": "value:asc"}],
-                "limit": 0
-            }
-            
-            response = self.session.post(
-                f"{self.BASE_URL}/reports",
-                json=payload,
-                params={"appname": self.APP_NAME},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                facets_data = data.get('facets', {}).get('primary_country.name', {}).get('data', [])
-                
-                if facets_data:
-                    countries = [item['value'] for item in facets_data]
-                    logger.info(f"Retrieved {len(countries)} countries from facets")
-                    return sorted(countries)
-                    
-            logger.info("Using verified working countries")
-            return self._get_verified_countries()
-                
+            values = self._fetch_facet(field, limit)
         except Exception as e:
-            logger.error(f"Error fetching countries via facets: {e}")
-            return self._get_verified_countries()
+            logger.error(f"Error fetching {field} via facets: {e}")
+            return None
+        
+        if values is None:
+            logger.warning(f"No {field} values returned by facets")
+            return None
+        
+        self._store_facet(field, values)
+        return values
+    
+    def _refresh_facet_in_background(self, field: str, limit: int):
+        """Refresh a stale facet on a daemon thread, at most one refresh per field at a time"""
+        with self._facets_lock:
+            if field in self._facets_refreshing:
+                return
+            self._facets_refreshing.add(field)
+        
+        def refresh():
+            try:
+                self._refresh_facet(field, limit)
+            finally:
+                with self._facets_lock:
+                    self._facets_refreshing.discard(field)
+        
+        threading.Thread(target=refresh, name=f"facet-refresh-{field}", daemon=True).start()
+    
+    def _get_facet(self, field: str, limit: int, fallback) -> List[str]:
+        """
+        Facet values with stale-while-revalidate caching
+        
+        Fresh values are served from memory (or from SQLite after a restart).
+        Stale values are still served while one background refresh runs; the
+        API is only called inline when nothing has ever been cached, and the
+        verified fallback list is used if that call fails.
+        """
+        entry = self._cached_facet(field)
+        if entry:
+            values, fetched_at = entry
+            if time.time() - fetched_at >= self.facet_ttl:
+                self._refresh_facet_in_background(field, limit)
+            return list(values)
+        
+        values = self._refresh_facet(field, limit)
+        if values is None:
+            logger.info(f"Using verified working {field} values")
+            return fallback()
+        return list(values)
     
     def get_available_themes(self) -> List[str]:
         """Get available themes"""
@@ -278,6 +506,15 @@ class ReliefWebAPI:
             logger.error(f"API connection test failed: {e}")
             return False
 
+    def transport_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint request, retry and throttling counters for API calls and downloads"""
+        metrics = {}
+        for session in (self.session, self.download_session):
+            adapter = session.get_adapter(self.BASE_URL) if hasattr(session, 'get_adapter') else None
+            if hasattr(adapter, 'metrics'):
+                metrics.update(adapter.metrics())
+        return metrics
+
     def get_filter_options(self) -> Dict[str, List[str]]:
         """Get all available filter options"""
         try:
@@ -512,20 +749,138 @@ def apply_strict_country_filter(metadata_list: List[Dict], target_country: str,
     
     return filtered_list, filtered_out_count
 
-def fetch_assessments(params, downloads_dir):
+def parse_report_item(item: Dict[str, Any], field_profile: str = DEFAULT_FIELD_PROFILE) -> Dict[str, Any]:
+    """
+    Convert a single ReliefWeb API report item into an assessment metadata dict
+    
+    Keys for fields outside field_profile are left out rather than set empty
+    and the profile is recorded, so the ingest path keeps (or later
+    back-fills) the stored values.
+    """
+    # Extract fields from the API response
+    fields = item.get('fields', {})
+    
+    # Build metadata dictionary with proper data extraction
+    metadata = {
+        'report_id': str(item.get('id', '')),
+        'title': fields.get('title', ''),
+        'date_created': fields.get('date', {}).get('created', '') if isinstance(fields.get('date'), dict) else '',
+        'date_changed': fields.get('date', {}).get('changed', '') if isinstance(fields.get('date'), dict) else '',
+        'source': [src.get('name', '') for src in fields.get('source', []) if isinstance(src, dict)],
+        'format': [fmt.get('name', '') for fmt in fields.get('format', []) if isinstance(fmt, dict)],
+        'theme': [theme.get('name', '') for theme in fields.get('theme', []) if isinstance(theme, dict)],
+        'country': [country.get('name', '') for country in fields.get('country', []) if isinstance(country, dict)],
+        'primary_country': fields.get('primary_country', {}).get('name', '') if isinstance(fields.get('primary_country'), dict) else '',
+        'language': [lang.get('name', '') for lang in fields.get('language', []) if isinstance(lang, dict)],
+        'status': fields.get('status', ''),
+        'url': fields.get('url', ''),
+        'url_alias': fields.get('url_alias', ''),
+        'body': fields.get('body', ''),
+        'body_html': fields.get('body-html', ''),
+        'file': fields.get('file', []),
+        'headline': fields.get('headline', {}).get('title', '') if isinstance(fields.get('headline'), dict) else ''
+    }
+    
+    # Convert list fields to strings for database storage (this was key in working tests)
+    metadata['source'] = ', '.join(metadata['source']) if metadata['source'] else ''
+    metadata['format'] = ', '.join(metadata['format']) if metadata['format'] else ''
+    metadata['theme'] = ', '.join(metadata['theme']) if metadata['theme'] else ''
+    metadata['country'] = ', '.join(metadata['country']) if metadata['country'] else ''
+    metadata['language'] = ', '.join(metadata['language']) if metadata['language'] else ''
+    
+    if field_profile != 'full':
+        requested = {key for field in FIELD_PROFILES[field_profile] for key in FIELD_METADATA_KEYS[field]}
+        metadata = {key: value for key, value in metadata.items() if key in requested}
+        metadata['field_profile'] = field_profile
+    
+    return metadata
+
+def _parse_and_filter_page(response_data: Dict[str, Any], params: Dict[str, Any]) -> List[Dict]:
+    """Parse one API response page and apply the client-side country filter"""
+    field_profile = get_field_profile(params)
+    assessments = []
+    for item in response_data.get('data', []):
+        try:
+            assessments.append(parse_report_item(item, field_profile))
+        except Exception as e:
+            logger.error(f"Error processing assessment item: {e}")
+            continue
+    
+    # Apply country filtering if specified - using the working inclusive filtering
+    country = params.get('country')
+    filter_type = params.get('country_filter_type', 'primary')
+    
+    if country and filter_type and assessments:
+        assessments, filtered_out_count, validation = apply_inclusive_sudan_filtering(
+            assessments, country, filter_type
+        )
+    
+    return assessments
+
+def iter_assessment_pages(params: Dict[str, Any], max_workers: int = None) -> Iterator[List[Dict]]:
+    """
+    Harvest all pages for a query, yielding filtered assessment lists as pages arrive
+    
+    Args:
+        params (dict): Parameters for the API request
+        max_workers (int): Maximum number of concurrent page requests
+        
+    Yields:
+        list: Assessment metadata dictionaries for one API page
+    """
+    seen_ids = set()
+    for page in reliefweb_api.iter_report_pages(params, max_workers=max_workers):
+        assessments = []
+        for metadata in _parse_and_filter_page(page, params):
+            # Records can shift between pages if the index changes mid-harvest
+            if metadata['report_id'] in seen_ids:
+                continue
+            seen_ids.add(metadata['report_id'])
+            assessments.append(metadata)
+        yield assessments
+
+def fetch_assessments(params, downloads_dir, harvest=None, max_workers=None, field_profile=None):
     """
     Fetch assessments from ReliefWeb API
     
     Args:
         params (dict): Parameters for the API request
         downloads_dir (str): Directory for downloading files
+        harvest (bool): Fetch every page of the result set instead of a single
+            page capped at MAX_LIMIT (defaults to params['harvest'])
+        max_workers (int): Maximum number of concurrent page requests when harvesting
+        field_profile (str): 'ids', 'listing' or 'full' (defaults to
+            params['field_profile'], else 'full'); lighter profiles skip the
+            body text, which backfill_assessments can fetch later
         
     Returns:
         list: List of assessment metadata dictionaries
+        
+    Raises:
+        HarvestError: If harvest pages failed; its assessments attribute holds
+            the records from the pages that were fetched
     """
     try:
+        if field_profile:
+            params = dict(params, field_profile=field_profile)
+        get_field_profile(params)
         logger.info(f"🚀 Starting assessment fetch with parameters: {params}")
         
+        if harvest is None:
+            harvest = bool(params.get('harvest'))
+        
+        if harvest:
+            assessments = []
+            try:
+                for page_assessments in iter_assessment_pages(params, max_workers=max_workers):
+                    assessments.extend(page_assessments)
+            except HarvestError as e:
+                e.assessments = assessments
+                logger.error(f"❌ {e}; keeping {len(assessments)} records from the pages that arrived")
+                raise
+            logger.info(f"🎯 FINAL RESULT: {len(assessments)} records harvested")
+            return assessments
+        
         # Use the ReliefWebAPI class directly - this was working in tests
         response_data = reliefweb_api.fetch_reports(params)
         
@@ -535,63 +890,18 @@ def fetch_assessments(params, downloads_dir):
         
         logger.info(f"📥 Successfully received {len(response_data['data'])} records from API")
         
-        # Extract metadata from response - based on working test patterns
-        assessments = []
-        for item in response_data['data']:
-            try:
-                # Extract fields from the API response
-                fields = item.get('fields', {})
-                
-                # Build metadata dictionary with proper data extraction
-                metadata = {
-                    'report_id': str(item.get('id', '')),
-                    'title': fields.get('title', ''),
-                    'date_created': fields.get('date', {}).get('created', '') if isinstance(fields.get('date'), dict) else '',
-                    'source': [src.get('name', '') for src in fields.get('source', []) if isinstance(src, dict)],
-                    'format': [fmt.get('name', '') for fmt in fields.get('format', []) if isinstance(fmt, dict)],
-                    'theme': [theme.get('name', '') for theme in fields.get('theme', []) if isinstance(theme, dict)],
-                    'country': [country.get('name', '') for country in fields.get('country', []) if isinstance(country, dict)],
-                    'primary_country': fields.get('primary_country', {}).get('name', '') if isinstance(fields.get('primary_country'), dict) else '',
-                    'language': [lang.get('name', '') for lang in fields.get('language', []) if isinstance(lang, dict)],
-                    'status': fields.get('status', ''),
-                    'url': fields.get('url', ''),
-                    'url_alias': fields.get('url_alias', ''),
-                    'body': fields.get('body', ''),
-                    'body_html': fields.get('body-html', ''),
-                    'file': fields.get('file', []),
-                    'headline': fields.get('headline', {}).get('title', '') if isinstance(fields.get('headline'), dict) else ''
-                }
-                
-                # Convert list fields to strings for database storage (this was key in working tests)
-                metadata['source'] = ', '.join(metadata['source']) if metadata['source'] else ''
-                metadata['format'] = ', '.join(metadata['format']) if metadata['format'] else ''
-                metadata['theme'] = ', '.join(metadata['theme']) if metadata['theme'] else ''
-                metadata['country'] = ', '.join(metadata['country']) if metadata['country'] else ''
-                metadata['language'] = ', '.join(metadata['language']) if metadata['language'] else ''
-                
-                assessments.append(metadata)
-                
-            except Exception as e:
-                logger.error(f"Error processing assessment item: {e}")
-                continue
-        
-        logger.info(f"📋 Extracted metadata for {len(assessments)} records")
+        total_count = response_data.get('totalCount', 0)
+        if total_count > len(response_data['data']):
+            logger.warning(f"⚠️ Query matched {total_count} records but only {len(response_data['data'])} were returned; use harvest mode for the full set")
         
-        # Apply country filtering if specified - using the working inclusive filtering
-        country = params.get('country')
-        filter_type = params.get('country_filter_type', 'primary')
-        
-        if country and filter_type:
-            logger.info(f"🔧 Applying INCLUSIVE filtering: '{country}' ({filter_type})")
-            filtered_assessments, filtered_out_count, validation = apply_inclusive_sudan_filtering(
-                assessments, country, filter_type
-            )
-            assessments = filtered_assessments
+        assessments = _parse_and_filter_page(response_data, params)
         
         logger.info(f"🎯 FINAL RESULT: {len(assessments)} records included")
         
         return assessments
         
+    except HarvestError:
+        raise
     except Exception as e:
         logger.error(f"Error fetching assessments: {e}")
         return []
@@ -607,11 +917,9 @@ def download_document(url: str, filename: str, downloads_dir: str) -> Optional[s
         
         file_path = os.path.join(downloads_dir, safe_filename)
         
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        with open(file_path, 'wb') as f:
-            f.write(response.content)
+        with reliefweb_api.download_session.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            stream_to_file(response, file_path)
         
         logger.info(f"Downloaded document: {safe_filename}")
         return file_path
@@ -639,11 +947,93 @@ def get_available_fields() -> List[str]:
         'origin'
     ]
 
+class ResponseCache:
+    """In-memory TTL cache of API responses with in-flight request coalescing
+    
+    Concurrent misses for the same key wait on the first caller's upstream
+    request instead of issuing their own. Failures are not cached.
+    """
+    TTL = 10 * 60  # Seconds a response is reused
+    MAX_ENTRIES = 1024
+    
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        self.ttl = self.TTL if ttl is None else ttl
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        self._entries = OrderedDict()  # key -> (response, fetched_at)
+        self._inflight = {}  # key -> Future of the upstream request
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+    
+    def get_or_fetch(self, key: Tuple, fetch) -> Any:
+        """Return the cached response for key, calling fetch() at most once per miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[1] < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return copy.deepcopy(entry[0])
+            
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            return copy.deepcopy(future.result())
+        
+        try:
+            response = fetch()
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        
+        with self._lock:
+            self._entries[key] = (response, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._inflight[key]
+        future.set_result(response)
+        return copy.deepcopy(response)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'ttl_seconds': self.ttl
+            }
+
+# Shared by /api/count and /api/format-counts previews
+count_cache = ResponseCache()
+
+def _normalise_filter_value(value: Optional[str]) -> Optional[str]:
+    return (' '.join(value.split()) or None) if value else None
+
 def get_document_count(country: str, format_type: str = None, country_filter_type: str = 'primary', 
                       date_from: str = None, date_to: str = None) -> Dict[str, Any]:
     """
     Get total document count for a specific country and format without downloading data
     
+    Responses are memoised in count_cache by the normalised filter tuple, so
+    repeated form previews are answered from memory.
+    
     Args:
         country: Country name (e.g., 'Sudan')
         format_type: Format name (e.g., 'Assessment') - optional
@@ -654,6 +1044,18 @@ def get_document_count(country: str, format_type: str = None, country_filter_typ
     Returns:
         Dict with count information and breakdown
     """
+    country = _normalise_filter_value(country)
+    format_type = _normalise_filter_value(format_type)
+    country_filter_type = (country_filter_type or 'primary').strip().lower()
+    date_from = _normalise_filter_value(date_from)
+    date_to = _normalise_filter_value(date_to)
+    
+    key = (country, format_type, country_filter_type, date_from, date_to)
+    return count_cache.get_or_fetch(key, lambda: _fetch_document_count(*key))
+
+def _fetch_document_count(country: Optional[str], format_type: Optional[str], country_filter_type: str,
+                          date_from: Optional[str], date_to: Optional[str]) -> Dict[str, Any]:
+    """Run the count-only facet query against ReliefWeb"""
     try:
         logger.info(f"🔢 Checking document count for: Country='{country}', Format='{format_type}', Type='{country_filter_type}'")
         
@@ -0,0 +1,390 @@
+"""
+asyncio ReliefWeb and document fetch client, with a sync facade for threaded callers
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from utils.db_utils import record_document_download
+from utils.document_downloader import HashingFileWriter
+from utils.http_transport import RetryingAdapter
+from utils.reliefweb_api import ReliefWebAPI, HarvestError, reliefweb_api, _parse_and_filter_page
+
+logger = logging.getLogger(__name__)
+
+class AsyncReliefWebClient:
+    """Non-blocking equivalents of fetch_reports, facet lookups and document downloads
+
+    One httpx.AsyncClient is reused for every request, and a semaphore caps
+    requests in flight at max_concurrency. Payload building, the facet cache
+    and the API token bucket are shared with the ReliefWebAPI instance, and
+    retries follow RetryingAdapter's policy (429/5xx, transport errors,
+    Retry-After). Create and use an instance within a single event loop.
+
+    Downloads are also capped at per_host_limit per host. Bodies are read
+    on the loop; each chunk's write and hash runs on a small fixed pool of
+    file threads, and downloads are recorded from one database thread, so
+    neither blocks the loop.
+    """
+
+    MAX_CONCURRENCY = 100
+    PER_HOST_LIMIT = 4
+    FILE_WRITERS = 4
+    TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+    CHUNK_SIZE = 256 * 1024
+
+    def __init__(self, api: ReliefWebAPI = None, max_concurrency: int = None,
+                 transport: httpx.AsyncBaseTransport = None, per_host_limit: int = None):
+        self.api = api or reliefweb_api
+        self.max_concurrency = max_concurrency or self.MAX_CONCURRENCY
+        self.per_host_limit = per_host_limit or self.PER_HOST_LIMIT
+        self.retries = RetryingAdapter.RETRIES
+        self.backoff_base = RetryingAdapter.BACKOFF_BASE
+        self.backoff_max = RetryingAdapter.BACKOFF_MAX
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+        # Threads take one chunk at a time, so a few serve every download in flight
+        self._file_executor = ThreadPoolExecutor(max_workers=self.FILE_WRITERS, thread_name_prefix='reliefweb-file')
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='reliefweb-db')
+        self._client = httpx.AsyncClient(
+            timeout=self.TIMEOUT,
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+            headers={'User-Agent': f'{self.api.APP_NAME}/1.0'},
+            follow_redirects=True,
+            transport=transport
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close pooled connections and the file and database threads"""
+        await self._client.aclose()
+        self._file_executor.shutdown(wait=False)
+        self._db_executor.shutdown(wait=False)
+
+    async def _acquire_token(self):
+        """Wait for the shared API token bucket without blocking the loop"""
+        while True:
+            delay = self.api.rate_limiter.reserve()
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+    async def _send(self, method: str, url: str, stream: bool = False, rate_limited: bool = True,
+                    **kwargs) -> httpx.Response:
+        """
+        Send one request with retries; the caller closes streamed responses
+
+        The semaphore is held only while a request is on the wire, not during
+        backoff, so sleeping retries don't starve other requests.
+        """
+        for attempt in range(self.retries + 1):
+            if rate_limited:
+                await self._acquire_token()
+
+            try:
+                async with self._semaphore:
+                    request = self._client.build_request(method, url, **kwargs)
+                    response = await self._client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                logger.warning(f"🔁 {method} {url} failed ({e.__class__.__name__}), retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+            else:
+                if response.status_code not in RetryingAdapter.RETRY_STATUSES:
+                    return response
+
+                retry_after = RetryingAdapter.retry_after(response)
+                if attempt == self.retries or (retry_after or 0) > RetryingAdapter.RETRY_AFTER_MAX:
+                    return response
+
+                delay = max(retry_after or 0, random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+                if retry_after is not None and rate_limited:
+                    self.api.rate_limiter.pause(delay)
+                await response.aclose()
+                logger.warning(f"🔁 {method} {url} returned HTTP {response.status_code}, retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+
+            await asyncio.sleep(delay)
+
+    async def _post_reports(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._send('POST', f"{self.api.BASE_URL}/reports", json=payload,
+                                    params={"appname": self.api.APP_NAME})
+        if response.status_code != 200:
+            logger.error(f"API Error ({response.status_code}). Response: {response.text}")
+            raise Exception(f"Failed to fetch data from ReliefWeb API: HTTP {response.status_code}")
+        return response.json()
+
+    async def fetch_reports(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Async ReliefWebAPI.fetch_reports: one page of reports for the filters"""
+        return await self._post_reports(self.api._build_payload(filters))
+
+    async def iter_report_pages(self, filters: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async ReliefWebAPI.iter_report_pages: every page of a query
+
+        All remaining offsets are requested at once and bounded by the
+        semaphore; pages after the first arrive in completion order. As in
+        the sync client, harvest_limit is rounded up to whole pages. A page
+        that fails is retried once after the others; if it fails again
+        HarvestError is raised once every other page has been yielded.
+        """
+        page_filters = dict(filters, limit=self.api.MAX_LIMIT, offset=0)
+        if not page_filters.get('sort'):
+            page_filters['sort'] = ['date.created:desc', 'id:desc']
+
+        try:
+            first_page = await self.fetch_reports(page_filters)
+        except Exception as e:
+            raise HarvestError(f"Harvest failed on the first page: {e}", [0])
+        yield first_page
+
+        total_count = int(first_page.get('totalCount', 0))
+        if filters.get('harvest_limit'):
+            total_count = min(total_count, int(filters['harvest_limit']))
+
+        offsets = range(self.api.MAX_LIMIT, total_count, self.api.MAX_LIMIT)
+        if not offsets:
+            return
+
+        async def fetch_page(offset):
+            try:
+                return offset, await self.fetch_reports(dict(page_filters, offset=offset)), None
+            except Exception as e:
+                return offset, None, e
+
+        logger.info(f"🌾 Harvesting {total_count} records: {len(offsets)} more pages, up to {self.max_concurrency} in flight")
+        tasks = [asyncio.ensure_future(fetch_page(offset)) for offset in offsets]
+        failed_offsets = []
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                offset, page, error = await next_page
+                if error:
+                    logger.warning(f"⚠️ Page at offset {offset} failed, will retry: {error}")
+                    failed_offsets.append(offset)
+                    continue
+                yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        still_failed = []
+        for offset in sorted(failed_offsets):
+            offset, page, error = await fetch_page(offset)
+            if error:
+                logger.error(f"❌ Page at offset {offset} failed again: {error}")
+                still_failed.append(offset)
+                continue
+            logger.info(f"📄 Received retried page at offset {offset} ({len(page.get('data', []))} records)")
+            yield page
+
+        if still_failed:
+            raise HarvestError(f"Harvest incomplete: {len(still_failed)} of {len(offsets) + 1} pages failed "
+                               f"(offsets {still_failed})", still_failed)
+
+    async def fetch_assessments(self, params: Dict[str, Any]) -> List[Dict]:
+        """
+        Async harvest of every page, parsed, country-filtered and de-duplicated
+
+        Raises:
+            HarvestError: If pages failed; its assessments attribute holds
+                the records from the pages that were fetched
+        """
+        seen_ids = set()
+        assessments = []
+        try:
+            async for page in self.iter_report_pages(params):
+                for metadata in _parse_and_filter_page(page, params):
+                    if metadata['report_id'] not in seen_ids:
+                        seen_ids.add(metadata['report_id'])
+                        assessments.append(metadata)
+        except HarvestError as e:
+            e.assessments = assessments
+            logger.error(f"❌ {e}; keeping {len(assessments)} records from the pages that arrived")
+            raise
+        logger.info(f"🎯 Harvested {len(assessments)} records")
+        return assessments
+
+    async def _get_facet(self, field: str, limit: int, fallback) -> List[str]:
+        """Facet values via the shared cache; stale or missing entries are refetched inline"""
+        entry = self.api._cached_facet(field)
+        if entry and time.time() - entry[1] < self.api.facet_ttl:
+            return list(entry[0])
+
+        try:
+            values = self.api._facet_values(await self._post_reports(self.api._facet_payload(field, limit)), field)
+        except Exception as e:
+            logger.error(f"Error fetching {field} via facets: {e}")
+            values = None
+
+        if values:
+            self.api._store_facet(field, values)
+            return values
+        return list(entry[0]) if entry else fallback()
+
+    async def get_available_countries(self) -> List[str]:
+        return await self._get_facet('primary_country.name', 500, self.api._get_verified_countries)
+
+    async def get_available_formats(self) -> List[str]:
+        return await self._get_facet('format.name', 100, self.api._get_verified_formats)
+
+    async def download(self, job: Dict[str, Any], documents_dir: str) -> Dict[str, Any]:
+        """
+        Stream one file to disk and hash it
+
+        The body is read on the loop and each chunk is written and hashed on
+        a file thread, while a per-host slot is held for the whole transfer.
+
+        Returns:
+            dict: The job plus status, file_path, file_size, mime_type, checksum and error
+        """
+        result = dict(job, status='failed', file_path=None, file_size=None,
+                      mime_type=None, checksum=None, error=None)
+        file_path = os.path.join(documents_dir, job['filename'])
+        loop = asyncio.get_running_loop()
+
+        try:
+            async with self._host_slots[urlparse(job['url']).netloc]:
+                response = await self._send('GET', job['url'], stream=True, rate_limited=False)
+                try:
+                    if response.status_code != 200:
+                        result['error'] = f"HTTP {response.status_code}"
+                        logger.error(f"Failed to download {job['url']}: HTTP {response.status_code}")
+                        return result
+
+                    writer = await loop.run_in_executor(self._file_executor, HashingFileWriter, file_path)
+                    try:
+                        async for chunk in response.aiter_bytes(self.CHUNK_SIZE):
+                            await loop.run_in_executor(self._file_executor, writer.write, chunk)
+                        written = await loop.run_in_executor(self._file_executor, writer.commit)
+                    except BaseException:
+                        # Shielded, so the temp file is removed even when cancelled
+                        await asyncio.shield(loop.run_in_executor(self._file_executor, writer.discard))
+                        raise
+                finally:
+                    await response.aclose()
+
+            result.update(written, status='downloaded', file_path=file_path,
+                          mime_type=response.headers.get('content-type', 'application/octet-stream'))
+            logger.info(f"Downloaded successfully: {job['filename']} ({result['file_size']} bytes)")
+            return result
+
+        except Exception as e:
+            logger.error(f"Exception downloading {job['url']}: {e}")
+            result['error'] = str(e)
+            return result
+
+    async def download_all(self, jobs: List[Dict[str, Any]], documents_dir: str, db_path: str = None,
+                           progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+                           ) -> List[Dict[str, Any]]:
+        """
+        Download a batch and record each success
+
+        Downloads are recorded through record_document_download on a single
+        database thread as they finish, so the database sees one writer.
+
+        Args:
+            progress_callback: Called as (completed, total, result) after each
+                file, in completion order, on the database thread
+
+        Returns:
+            list: One result dict per job, in job order
+        """
+        if not jobs:
+            return []
+
+        logger.info(f"📥 Downloading {len(jobs)} files, up to {self.max_concurrency} in flight "
+                    f"(max {self.per_host_limit} per host)")
+        loop = asyncio.get_running_loop()
+
+        async def run(index, job):
+            return index, await self.download(job, documents_dir)
+
+        results = [None] * len(jobs)
+        completed = 0
+        for next_result in asyncio.as_completed([run(index, job) for index, job in enumerate(jobs)]):
+            index, result = await next_result
+            results[index] = result
+            completed += 1
+            if result['status'] == 'downloaded' and db_path:
+                result['download_id'] = await loop.run_in_executor(
+                    self._db_executor, record_document_download,
+                    db_path, result['assessment_id'], result['filename'], result['url'],
+                    result['file_path'], result['file_size'], result['mime_type'], result['checksum']
+                )
+            logger.info(f"📊 Download progress: {completed}/{len(jobs)} ({result['status']}: {result['filename']})")
+            if progress_callback:
+                await loop.run_in_executor(self._db_executor, progress_callback, completed, len(jobs), result)
+
+        downloaded = sum(1 for r in results if r['status'] == 'downloaded')
+        logger.info(f"✅ Downloads complete: {downloaded} succeeded, {len(jobs) - downloaded} failed")
+        return results
+
+class SyncReliefWebClient:
+    """Blocking facade over AsyncReliefWebClient for Flask views and other threads
+
+    Every call is scheduled on one background event loop, so many threads
+    share a single connection pool and concurrency limit while their
+    requests are multiplexed on one loop thread.
+    """
+
+    def __init__(self, client_factory=None):
+        self._client_factory = client_factory or AsyncReliefWebClient
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='reliefweb-async', daemon=True)
+        self._thread.start()
+        self.client = self._run(self._create_client())
+
+    async def _create_client(self) -> AsyncReliefWebClient:
+        return self._client_factory()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def fetch_reports(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        return self._run(self.client.fetch_reports(filters))
+
+    def fetch_assessments(self, params: Dict[str, Any]) -> List[Dict]:
+        return self._run(self.client.fetch_assessments(params))
+
+    def get_available_countries(self) -> List[str]:
+        return self._run(self.client.get_available_countries())
+
+    def get_available_formats(self) -> List[str]:
+        return self._run(self.client.get_available_formats())
+
+    def download_all(self, jobs: List[Dict[str, Any]], documents_dir: str, db_path: str = None,
+                     progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+                     ) -> List[Dict[str, Any]]:
+        return self._run(self.client.download_all(jobs, documents_dir, db_path, progress_callback))
+
+    def close(self):
+        """Close the client and stop the loop thread"""
+        self._run(self.client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+_sync_client: Optional[SyncReliefWebClient] = None
+_sync_client_lock = threading.Lock()
+
+def get_sync_client() -> SyncReliefWebClient:
+    """Get the process-wide sync facade over the async client"""
+    global _sync_client
+    with _sync_client_lock:
+        if _sync_client is None:
+            _sync_client = SyncReliefWebClient()
+        return _sync_client
@@ -0,0 +1,180 @@
+"""
+Incremental ReliefWeb sync using a persisted high-water mark per query
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from utils.reliefweb_api import fetch_assessments, get_field_profile, HarvestError
+from utils.db_utils import get_sync_state, update_sync_state, bulk_upsert_metadata, get_report_ids_needing_backfill
+
+logger = logging.getLogger(__name__)
+
+# Run a full reconciliation pass at least this often, even in delta mode
+FULL_SYNC_INTERVAL_DAYS = 7
+
+# Report ids per back-fill request
+BACKFILL_BATCH_SIZE = 200
+
+# Filters beyond country/format/type that narrow the result set, with the
+# spellings callers use for them; each combination gets its own mark
+SYNC_KEY_FILTERS = {
+    'theme': ('theme',),
+    'source': ('source',),
+    'language': ('language',),
+    'date_from': ('date_from', 'date.from'),
+    'date_to': ('date_to', 'date.to')
+}
+
+def _normalise_key_value(value: Any) -> str:
+    if isinstance(value, (list, tuple, set)):
+        return ','.join(sorted(str(v).strip().lower() for v in value if v))
+    return str(value).strip().lower()
+
+def build_sync_key(filters: Dict[str, Any]) -> str:
+    """
+    Build the sync_state key from every filter that narrows the query
+
+    A filtered sync must not advance the mark of a broader query, or the
+    broader query's next delta would skip the records the filter left out.
+    Queries using only country, format and filter type keep the short key.
+    """
+    country = (filters.get('country') or '').strip().lower()
+    format_type = (filters.get('format') or '').strip().lower()
+    filter_type = (filters.get('country_filter_type') or 'primary').strip().lower()
+    key = f"{country}|{format_type}|{filter_type}"
+
+    for name, aliases in SYNC_KEY_FILTERS.items():
+        value = next((filters[alias] for alias in aliases if filters.get(alias)), None)
+        if value:
+            key += f"|{name}={_normalise_key_value(value)}"
+    return key
+
+def needs_full_sync(state: Optional[Dict[str, Any]], full_sync_interval_days: int = FULL_SYNC_INTERVAL_DAYS) -> bool:
+    """Check whether a query has no usable mark or is due for reconciliation"""
+    if not state or not state.get('last_changed') or not state.get('last_full_sync'):
+        return True
+
+    try:
+        last_full_sync = datetime.fromisoformat(state['last_full_sync'])
+    except (ValueError, TypeError):
+        return True
+
+    return datetime.now() - last_full_sync >= timedelta(days=full_sync_interval_days)
+
+def sync_reliefweb(db_path: str, filters: Dict[str, Any], downloads_dir: str = None,
+                   force_full: bool = False,
+                   full_sync_interval_days: int = FULL_SYNC_INTERVAL_DAYS,
+                   backfill: bool = True) -> Dict[str, Any]:
+    """
+    Sync one ReliefWeb query into the database, fetching only changed records
+
+    Args:
+        db_path: Path to database file
+        filters: Extraction filters (country, format, country_filter_type, ...)
+        downloads_dir: Directory for downloading files
+        force_full: Ignore the stored mark and re-pull the full result set
+        full_sync_interval_days: Maximum age of the last full reconciliation pass
+        backfill: After a sync with a lighter field_profile, fetch the full
+            records of the reports it flagged for back-fill
+
+    Returns:
+        dict: Sync summary with mode, fetched/saved counts and the new mark,
+        plus the back-fill summary when one ran
+
+    Raises:
+        HarvestError: If pages failed; the records that arrived are saved
+            and their upsert counts set on the error
+    """
+    field_profile = get_field_profile(filters)
+    query_key = build_sync_key(filters)
+    state = get_sync_state(db_path, query_key)
+    full_sync = force_full or needs_full_sync(state, full_sync_interval_days)
+
+    sync_filters = dict(filters)
+    sync_filters.pop('limit', None)
+    # A capped harvest would record a full pass that skipped records
+    sync_filters.pop('harvest_limit', None)
+    # Deterministic order for offset paging; pages arrive in completion order
+    # and the mark is only written once every page has been fetched
+    sync_filters['sort'] = ['date.changed:asc', 'id:asc']
+    if not full_sync:
+        sync_filters['changed_since'] = state['last_changed']
+
+    logger.info(f"🔄 {'Full' if full_sync else 'Delta'} sync for '{query_key}'"
+                + ('' if full_sync else f" since {state['last_changed']}"))
+
+    try:
+        assessments = fetch_assessments(sync_filters, downloads_dir, harvest=True)
+    except HarvestError as e:
+        # Records from a missing page may be older than the newest one seen,
+        # so keep what arrived but leave the mark where it was
+        e.counts = bulk_upsert_metadata(db_path, e.assessments) if e.assessments else {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        logger.error(f"❌ Sync for '{query_key}' incomplete, mark not advanced: {e}")
+        raise
+    counts = bulk_upsert_metadata(db_path, assessments) if assessments else {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    # Advance the mark to the newest change seen in this run
+    last_changed = state.get('last_changed') if state else None
+    last_report_id = state.get('last_report_id') if state else None
+    for assessment in assessments:
+        changed = assessment.get('date_changed') or assessment.get('date_created')
+        if changed and (not last_changed or changed >= last_changed):
+            last_changed = changed
+            last_report_id = int(assessment['report_id']) if assessment.get('report_id') else last_report_id
+
+    update_sync_state(
+        db_path, query_key,
+        filters.get('country'), filters.get('format'), filters.get('country_filter_type', 'primary'),
+        last_changed, last_report_id,
+        records_seen=len(assessments),
+        # An empty full pass usually means the fetch failed; don't count it as reconciled
+        full_sync=full_sync and bool(assessments)
+    )
+
+    logger.info(f"✅ Sync complete for '{query_key}': {len(assessments)} fetched, {counts['inserted']} new, {counts['updated']} updated, mark={last_changed}")
+
+    result = {
+        'mode': 'full' if full_sync else 'delta',
+        'query_key': query_key,
+        'total_fetched': len(assessments),
+        'new_saved': counts['inserted'],
+        'updated': counts['updated'],
+        'unchanged': counts['unchanged'],
+        'last_changed': last_changed,
+        'last_report_id': last_report_id
+    }
+    if backfill and field_profile != 'full':
+        result['backfill'] = backfill_assessments(db_path)
+    return result
+
+def backfill_assessments(db_path: str, limit: int = None, batch_size: int = BACKFILL_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Fetch the full record for assessments ingested with a lighter field profile
+
+    Only reports flagged needs_backfill are requested, by id, so a
+    metadata-only sync can be followed by one targeted body download.
+
+    Args:
+        db_path: Path to database file
+        limit: Maximum number of reports to back-fill in this run
+        batch_size: Report ids per API request
+
+    Returns:
+        dict: Counts of requested, fetched and updated reports
+    """
+    report_ids = get_report_ids_needing_backfill(db_path, limit)
+    summary = {'requested': len(report_ids), 'fetched': 0, 'updated': 0}
+
+    for start in range(0, len(report_ids), batch_size):
+        batch = report_ids[start:start + batch_size]
+        assessments = fetch_assessments({'report_ids': batch, 'limit': len(batch), 'field_profile': 'full'}, None)
+        if not assessments:
+            logger.warning(f"⚠️ Back-fill batch of {len(batch)} reports returned nothing")
+            continue
+        counts = bulk_upsert_metadata(db_path, assessments)
+        summary['fetched'] += len(assessments)
+        summary['updated'] += counts['updated']
+
+    logger.info(f"🧩 Back-filled {summary['fetched']} of {summary['requested']} partial assessments")
+    return summary
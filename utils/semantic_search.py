@@ -0,0 +1,139 @@
+"""
+Semantic search over extracted document chunks, grouped into ranked documents
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from utils.db_connection import DB_PATH
+from utils.db_utils import get_documents_with_assessments
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_SIZE = 256
+CHUNKS_PER_RESULT = 5   # chunk hits fetched per requested document
+SNIPPETS_PER_RESULT = 3
+SNIPPET_LENGTH = 300
+
+class SearchResultCache:
+    """Thread-safe LRU of search responses keyed by (query, limit, index file and version)"""
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[List[Dict]]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, results: List[Dict]):
+        with self._lock:
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_result_cache = SearchResultCache()
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so repeated queries share cache entries
+
+    The default MiniLM model is uncased, so this doesn't change the embedding.
+    """
+    return ' '.join(query.split()).lower()
+
+def group_hits_by_document(hits: List[Dict], documents: Dict[int, Dict], limit: int) -> List[Dict]:
+    """
+    Fold chunk hits into one result per document, best-scoring documents first
+
+    Hits for documents missing from document_downloads are dropped.
+    """
+    grouped = OrderedDict()
+    for hit in sorted(hits, key=lambda h: h['score'], reverse=True):
+        document = documents.get(hit['document_id'])
+        if not document:
+            continue
+
+        result = grouped.get(hit['document_id'])
+        if result is None:
+            result = grouped[hit['document_id']] = {
+                'document_id': hit['document_id'],
+                'score': round(hit['score'], 4),
+                'matching_chunks': 0,
+                'snippets': [],
+                'filename': document.get('filename'),
+                'assessment_id': document.get('assessment_id'),
+                'report_id': document.get('report_id'),
+                'title': document.get('title'),
+                'url': document.get('url') or document.get('original_url'),
+                'country': document.get('primary_country') or document.get('country'),
+                'source': document.get('source'),
+                'format': document.get('format'),
+                'date_created': document.get('date_created')
+            }
+
+        result['matching_chunks'] += 1
+        if len(result['snippets']) < SNIPPETS_PER_RESULT:
+            result['snippets'].append({
+                'chunk_index': hit['chunk_index'],
+                'score': round(hit['score'], 4),
+                'text': hit['text'][:SNIPPET_LENGTH]
+            })
+
+    results = list(grouped.values())[:limit]
+    for rank, result in enumerate(results, 1):
+        result['rank'] = rank
+    return results
+
+def semantic_search(query: str, limit: int = 10, db_path: str = None, vector_db=None) -> Dict[str, Any]:
+    """
+    Rank documents by similarity of their chunks to the query
+
+    Query embeddings are memoised by the embedding service and full result
+    lists by a module-level LRU keyed on the index file, its mtime and the
+    in-process version, so repeated queries skip both the model and the
+    index until vectors change here or the file is rebuilt elsewhere.
+
+    Returns:
+        dict: query, results, total_results and whether the results were cached;
+        an 'error' key if the query could not be embedded
+    """
+    from utils.embedding_service import get_embedding_service
+    from utils.vector_db_utils import get_vector_db
+
+    db_path = db_path or DB_PATH
+    vector_db = vector_db or get_vector_db()
+    normalized = normalize_query(query)
+    response = {'query': query, 'results': [], 'total_results': 0, 'cached': False}
+
+    if not vector_db.get_total_embeddings():
+        response['message'] = 'No documents have been indexed for semantic search yet'
+        return response
+
+    cache_key = (normalized, limit, vector_db.index_path, vector_db.index_mtime, vector_db.version)
+    results = _result_cache.get(cache_key)
+    if results is not None:
+        logger.info(f"♻️ Semantic search cache hit for '{normalized}'")
+        return dict(response, results=results, total_results=len(results), cached=True)
+
+    query_vector = get_embedding_service().embed_query(normalized)
+    if query_vector is None:
+        return dict(response, error='Embedding model not available')
+
+    top_k = min(limit * CHUNKS_PER_RESULT, vector_db.get_total_embeddings())
+    hits = vector_db.search_vector(query_vector, top_k)
+    documents = get_documents_with_assessments(db_path, {hit['document_id'] for hit in hits})
+    results = group_hits_by_document(hits, documents, limit)
+
+    _result_cache.put(cache_key, results)
+    logger.info(f"🔎 Semantic search '{normalized}': {len(hits)} chunks across {len(results)} documents")
+    return dict(response, results=results, total_results=len(results))
@@ -6,18 +6,69 @@ import numpy as np
 import json
 import os
 import pickle
+import time
 import logging
+import threading
+from collections import defaultdict
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 
+from utils.db_connection import DB_PATH
+
 logger = logging.getLogger(__name__)
 
+VECTOR_DB_DIR = os.path.join(os.path.dirname(DB_PATH), 'vector_db')
+
+# index_type is one of INDEX_TYPES; the other keys tune the approximate indexes
+DEFAULT_VECTOR_DB_CONFIG = {
+    'dimension': 384,
+    'index_path': os.path.join(VECTOR_DB_DIR, 'faiss.index'),
+    'metadata_path': os.path.join(VECTOR_DB_DIR, 'metadata.jsonl'),
+    'index_type': 'flat',
+    'nlist': 256,           # IVF: number of clusters
+    'nprobe': 16,           # IVF: clusters visited per query
+    'pq_m': 48,             # IVF-PQ: sub-quantizers (must divide dimension)
+    'pq_nbits': 8,          # IVF-PQ: bits per sub-quantizer code
+    'hnsw_m': 32,           # HNSW: graph neighbours per node
+    'ef_construction': 200, # HNSW: build-time search depth
+    'ef_search': 64         # HNSW: query-time search depth
+}
+
+INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw')
+
 class VectorDatabaseManager:
-    """Manages FAISS vector database for document embeddings"""
+    """Manages FAISS vector database for document embeddings
+    
+    Vectors are keyed by stable ids (normally document_embeddings.id), so
+    deleting or replacing a document touches only its own vectors and
+    metadata keys never shift. The index is chosen by config['index_type']:
+    exact 'flat' search, or approximate 'ivf_flat', 'ivf_pq' and 'hnsw'
+    indexes, which are trained by build_index() / build_from_database()
+    before vectors can be added. Flat and HNSW indexes sit in an
+    IndexIDMap2; IVF indexes store the ids themselves, with a hashtable
+    direct map for reconstruct() and removal.
+    
+    Once ids come from document_embeddings (build_index() or an add with
+    explicit ids), every later add must pass its ids too, so locally
+    allocated ids can't collide with future database rows.
+    
+    Adds are buffered in memory until flush(): the index is written to a temp
+    file and renamed into place, and metadata is kept as JSON lines so new
+    entries (and delete tombstones) are appended rather than rewriting the
+    whole file. Use the manager as a context manager (or call flush()) to
+    persist a batch.
+    
+    version is bumped on every add, delete and rebuild so callers can key
+    cached search results by it; index_mtime identifies the file it was
+    loaded from or last wrote, so changes by other processes are noticed.
+    """
     
     def __init__(self, config: Dict):
-        self.config = config
+        self.config = dict(DEFAULT_VECTOR_DB_CONFIG, **config)
         self.dimension = config['dimension']
+        self.index_type = self.config['index_type']
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index_type: {self.index_type}")
         self.index_path = config['index_path']
         self.metadata_path = config['metadata_path']
         
@@ -27,76 +78,274 @@ class VectorDatabaseManager:
         # Initialize FAISS index
         self.index = None
         self.metadata = {}
+        self._document_ids = defaultdict(set)  # document_id -> vector ids
+        self._next_id = 0
+        self._external_ids = False  # ids are owned by document_embeddings
+        self._pending_metadata = []  # JSON-lines records written since the last flush
+        self._index_dirty = False
+        self._rewrite_metadata = False
+        self.version = 0
+        self.index_mtime = None
         self._load_or_create_index()
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+    
     def _load_or_create_index(self):
         """Load existing index or create new one"""
         try:
             if os.path.exists(self.index_path):
                 # Load existing index
+                self.index_mtime = self._file_mtime()
                 self.index = faiss.read_index(self.index_path)
+                if isinstance(self.index, faiss.IndexIDMap2):
+                    if faiss.try_extract_index_ivf(self.index) is not None:
+                        self.index = self._unwrap_ivf(self.index)
+                elif faiss.try_extract_index_ivf(self.index) is None:
+                    self.index = self._wrap_positional_index(self.index)
                 logger.info(f"Loaded FAISS index with {self.index.ntotal} vectors")
                 
                 # Load metadata
-                if os.path.exists(self.metadata_path):
-                    with open(self.metadata_path, 'r', encoding='utf-8') as f:
-                        self.metadata = json.load(f)
-                else:
-                    self.metadata = {}
+                self.metadata = self._load_metadata()
             else:
                 # Create new index - using IndexFlatIP for cosine similarity
-                self.index = faiss.IndexFlatIP(self.dimension)
+                self.index = self._create_index()
                 self.metadata = {}
+                # Don't append to metadata left behind without an index
+                self._rewrite_metadata = os.path.exists(self.metadata_path)
                 logger.info(f"Created new FAISS index with dimension {self.dimension}")
                 
         except Exception as e:
             logger.error(f"Error loading/creating FAISS index: {e}")
             # Fallback to new index
-            self.index = faiss.IndexFlatIP(self.dimension)
+            self.index = self._create_index()
             self.metadata = {}
+            self._rewrite_metadata = True
+        
+        for idx, meta in self.metadata.items():
+            self._document_ids[meta.get('document_id')].add(int(idx))
+        self._next_id = max(map(int, self.metadata), default=-1) + 1
+        self._external_ids = any(meta.get('external_id') for meta in self.metadata.values())
+    
+        self.set_search_params()
+    
+    def _file_mtime(self) -> Optional[int]:
+        """Modification time of the index file in ns, None if there isn't one"""
+        try:
+            return os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return None
+    
+    def changed_on_disk(self) -> bool:
+        """Whether another process replaced the index file since it was loaded or written here"""
+        return self._file_mtime() != self.index_mtime
+    
+    def _create_index(self, nlist: int = None):
+        """Empty inner-product index of the configured type, addressed by explicit int64 ids"""
+        nlist = nlist or self.config['nlist']
+        description = {
+            'flat': 'Flat',
+            'ivf_flat': f"IVF{nlist},Flat",
+            'ivf_pq': f"IVF{nlist},PQ{self.config['pq_m']}x{self.config['pq_nbits']}",
+            'hnsw': f"HNSW{self.config['hnsw_m']},Flat"
+        }[self.index_type]
+        if self.index_type.startswith('ivf'):
+            # IndexIDMap2 removal desyncs its id map from IVF lists, so IVF keeps the ids itself
+            index = faiss.index_factory(self.dimension, description, faiss.METRIC_INNER_PRODUCT)
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return index
+        index = faiss.index_factory(self.dimension, f"IDMap2,{description}", faiss.METRIC_INNER_PRODUCT)
+        if self.index_type == 'hnsw':
+            faiss.downcast_index(index.index).hnsw.efConstruction = self.config['ef_construction']
+        return index
+    
+    def _hnsw(self):
+        """The HNSW graph of the loaded index, or None for other index types"""
+        if not isinstance(self.index, faiss.IndexIDMap2):
+            return None
+        base = faiss.downcast_index(self.index.index)
+        return base.hnsw if isinstance(base, faiss.IndexHNSW) else None
+    
+    def set_search_params(self, nprobe: int = None, ef_search: int = None):
+        """Apply search-time knobs (IVF nprobe, HNSW efSearch); defaults come from the config"""
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.nprobe = nprobe or self.config['nprobe']
+        hnsw = self._hnsw()
+        if hnsw is not None:
+            hnsw.efSearch = ef_search or self.config['ef_search']
+    
+    def _wrap_positional_index(self, index):
+        """Move vectors of an older positional index into an ID map, keeping position as id"""
+        wrapped = faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
+        if index.ntotal:
+            wrapped.add_with_ids(index.reconstruct_n(0, index.ntotal), np.arange(index.ntotal, dtype=np.int64))
+        self._index_dirty = True
+        logger.info(f"Converted positional FAISS index with {index.ntotal} vectors to an ID map")
+        return wrapped
+    
+    def _unwrap_ivf(self, wrapped):
+        """Move an IDMap2-wrapped IVF index to native ids by rewriting the ids in its inverted lists"""
+        id_map = faiss.vector_to_array(wrapped.id_map)
+        ivf = faiss.clone_index(faiss.downcast_index(wrapped.index))
+        for list_no in range(ivf.nlist):
+            size = ivf.invlists.list_size(list_no)
+            if size:
+                list_ids = faiss.rev_swig_ptr(ivf.invlists.get_ids(list_no), size)
+                list_ids[:] = id_map[list_ids]
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        self._index_dirty = True
+        logger.info(f"Converted ID-mapped IVF index with {ivf.ntotal} vectors to native ids")
+        return ivf
+    
+    def _stored_ids(self) -> np.ndarray:
+        """Ids of every vector in the index"""
+        if isinstance(self.index, faiss.IndexIDMap2):
+            return faiss.vector_to_array(self.index.id_map)
+        invlists = self.index.invlists
+        return np.concatenate([faiss.rev_swig_ptr(invlists.get_ids(list_no), invlists.list_size(list_no))
+                               for list_no in range(self.index.nlist) if invlists.list_size(list_no)]
+                              or [np.empty(0, dtype=np.int64)])
+    
+    def _load_metadata(self) -> Dict:
+        """Read JSON-lines metadata, accepting the older single JSON dict format"""
+        if not os.path.exists(self.metadata_path):
+            return {}
+        
+        with open(self.metadata_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        try:
+            legacy = json.loads(content)
+            if isinstance(legacy, dict) and 'idx' not in legacy:
+                self._rewrite_metadata = True
+                return legacy
+        except json.JSONDecodeError:
+            pass
+        
+        metadata = {}
+        tombstones = 0
+        for line in content.splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                idx = str(entry.pop('idx'))
+                if entry.get('deleted'):
+                    metadata.pop(idx, None)
+                    tombstones += 1
+                else:
+                    metadata[idx] = entry
+        
+        # Compact once deletes outweigh live entries
+        if tombstones > len(metadata):
+            self._rewrite_metadata = True
+        
+        # Entries appended by a flush that crashed before the index was written
+        index_ids = set(self._stored_ids().tolist())
+        stale = [idx for idx in metadata if int(idx) not in index_ids]
+        if stale:
+            logger.warning(f"Dropping {len(stale)} metadata entries with no vector in the index")
+            for idx in stale:
+                del metadata[idx]
+            self._rewrite_metadata = True
+        return metadata
     
-    def add_embedding(self, document_id: int, chunk_index: int, text: str, embedding: List[float]) -> str:
+    def add_embedding(self, document_id: int, chunk_index: int, text: str, embedding: List[float],
+                      flush: bool = True) -> str:
         """Add embedding to the vector database"""
+        vector_ids = self.add_embeddings(document_id, [{'chunk_id': chunk_index, 'text': text}],
+                                         np.array(embedding, dtype=np.float32).reshape(1, -1), flush=flush)
+        return vector_ids[0] if vector_ids else None
+    
+    def add_embeddings(self, document_id: int, chunks: List[Dict], matrix: np.ndarray, flush: bool = True,
+                       ids: Optional[List[int]] = None) -> List[str]:
+        """
+        Add all chunk embeddings of a document in one call
+        
+        Args:
+            document_id: Document the chunks belong to
+            chunks: Chunk dicts with 'text' and optionally 'chunk_id'
+            matrix: One embedding row per chunk
+            flush: Persist straight away; pass False when adding many
+                documents and call flush() once at the end
+            ids: Stable int64 ids for the rows (normally document_embeddings.id);
+                allocated sequentially when omitted, which is refused once the
+                index holds database ids. Existing ids are replaced.
+        
+        Returns:
+            list: Vector ids of the added embeddings (empty on failure)
+        """
         try:
-            # Convert embedding to numpy array and normalize for cosine similarity
-            vector = np.array(embedding, dtype=np.float32).reshape(1, -1)
-            faiss.normalize_L2(vector)
-            
-            # Generate unique ID for this embedding
-            vector_id = f"doc_{document_id}_chunk_{chunk_index}_{int(datetime.now().timestamp())}"
-            
-            # Add to FAISS index
-            current_id = self.index.ntotal
-            self.index.add(vector)
-            
-            # Store metadata
-            self.metadata[str(current_id)] = {
-                'vector_id': vector_id,
-                'document_id': document_id,
-                'chunk_index': chunk_index,
-                'text': text,
-                'created_date': datetime.now().isoformat()
-            }
+            if not self.index.is_trained:
+                logger.error(f"The {self.index_type} index is not trained yet; run build_index() first")
+                return []
             
-            # Save index and metadata
-            self._save_index()
+            # Copy to float32 and normalize for cosine similarity
+            vectors = np.array(matrix, dtype=np.float32).reshape(len(chunks), self.dimension)
+            faiss.normalize_L2(vectors)
             
-            logger.info(f"Added embedding {vector_id} to vector database")
-            return vector_id
+            external = ids is not None
+            if not external and self._external_ids:
+                logger.error("The index holds document_embeddings ids; pass explicit ids to add_embeddings()")
+                return []
+            
+            if ids is None:
+                ids = np.arange(self._next_id, self._next_id + len(chunks), dtype=np.int64)
+            else:
+                ids = np.asarray(ids, dtype=np.int64)
+                self._remove_ids([int(i) for i in ids if str(int(i)) in self.metadata])
+            
+            created_date = datetime.now().isoformat()
+            timestamp = int(datetime.now().timestamp())
+            self.index.add_with_ids(vectors, ids)
+            self._next_id = max(self._next_id, int(ids.max()) + 1) if len(ids) else self._next_id
+            
+            vector_ids = []
+            for idx, (offset, chunk) in zip(ids.tolist(), enumerate(chunks)):
+                chunk_index = chunk.get('chunk_id', offset)
+                vector_id = f"doc_{document_id}_chunk_{chunk_index}_{timestamp}"
+                self.metadata[str(idx)] = {
+                    'vector_id': vector_id,
+                    'document_id': document_id,
+                    'chunk_index': chunk_index,
+                    'text': chunk.get('text', ''),
+                    'created_date': created_date
+                }
+                if external:
+                    self.metadata[str(idx)]['external_id'] = True
+                self._document_ids[document_id].add(idx)
+                self._pending_metadata.append(dict(self.metadata[str(idx)], idx=idx))
+                vector_ids.append(vector_id)
+            self._external_ids = self._external_ids or external
+            self._index_dirty = True
+            self.version += 1
+            
+            if flush:
+                self.flush()
+            
+            logger.info(f"Added {len(vector_ids)} embeddings for document {document_id} to vector database")
+            return vector_ids
             
         except Exception as e:
-            logger.error(f"Error adding embedding: {e}")
-            return None
+            logger.error(f"Error adding embeddings: {e}")
+            return []
     
     def search(self, query_text: str, top_k: int = 10) -> List[Dict]:
         """Search for similar embeddings using query text"""
+        query_embedding = self._generate_query_embedding(query_text)
+        if query_embedding is None:
+            return []
+        return self.search_vector(query_embedding, top_k)
+    
+    def search_vector(self, query_embedding: np.ndarray, top_k: int = 10) -> List[Dict]:
+        """Search for the chunks closest to an already embedded query"""
         try:
-            # Generate embedding for query (you'll need to implement this)
-            query_embedding = self._generate_query_embedding(query_text)
-            if not query_embedding:
+            if not self.index.ntotal:
                 return []
             
-            # Convert to numpy array and normalize
+            # Copy to float32 and normalize
             query_vector = np.array(query_embedding, dtype=np.float32).reshape(1, -1)
             faiss.normalize_L2(query_vector)
             
@@ -116,7 +365,7 @@ class VectorDatabaseManager:
                     'vector_id': metadata.get('vector_id'),
                     'document_id': metadata.get('document_id'),
                     'chunk_index': metadata.get('chunk_index'),
-                    'text': metadata.get('text', '')[:200],  # Truncate for display
+                    'text': metadata.get('text', ''),
                     'created_date': metadata.get('created_date')
                 })
             
@@ -130,10 +379,7 @@ class VectorDatabaseManager:
         """Find documents similar to the given document"""
         try:
             # Get all embeddings for the document
-            doc_embeddings = []
-            for idx, meta in self.metadata.items():
-                if meta.get('document_id') == document_id:
-                    doc_embeddings.append(int(idx))
+            doc_embeddings = sorted(self._document_ids.get(document_id, ()))
             
             if not doc_embeddings:
                 return []
@@ -178,67 +424,298 @@ class VectorDatabaseManager:
         """Get total number of embeddings in the database"""
         return self.index.ntotal if self.index else 0
     
-    def _save_index(self):
-        """Save FAISS index and metadata to disk"""
+    def flush(self) -> bool:
+        """
+        Persist pending changes: append new metadata lines, then atomically
+        replace the index file
+        
+        Metadata goes first so a crash never leaves index vectors without
+        metadata; lines for vectors that never reached the index are dropped
+        on the next load.
+        """
+        if not (self._index_dirty or self._pending_metadata or self._rewrite_metadata):
+            return True
+        
         try:
-            faiss.write_index(self.index, self.index_path)
+            if self._rewrite_metadata:
+                temp_path = f"{self.metadata_path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    for idx, meta in self.metadata.items():
+                        f.write(json.dumps(dict(meta, idx=int(idx)), ensure_ascii=False) + '\n')
+                os.replace(temp_path, self.metadata_path)
+            elif self._pending_metadata:
+                with open(self.metadata_path, 'a', encoding='utf-8') as f:
+                    for record in self._pending_metadata:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
             
-            with open(self.metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+            if self._index_dirty:
+                temp_path = f"{self.index_path}.tmp"
+                faiss.write_index(self.index, temp_path)
+                os.replace(temp_path, self.index_path)
+                self.index_mtime = self._file_mtime()
+            
+            self._pending_metadata = []
+            self._index_dirty = False
+            self._rewrite_metadata = False
+            return True
                 
         except Exception as e:
             logger.error(f"Error saving index: {e}")
+            return False
     
-    def _generate_query_embedding(self, text: str) -> Optional[List[float]]:
-        """Generate embedding for search query - implement based on your embedding model"""
-        # TODO: Implement with your chosen embedding model (OpenAI, sentence-transformers, etc.)
-        # For now, return None to indicate not implemented
-        logger.warning("Query embedding generation not implemented yet")
-        return None
+    def _generate_query_embedding(self, text: str) -> Optional[np.ndarray]:
+        """Embed a search query with the model used for chunk embeddings"""
+        from utils.embedding_service import get_embedding_service
+        
+        try:
+            return get_embedding_service().embed_query(text)
+        except Exception as e:
+            logger.error(f"Error generating query embedding: {e}")
+            return None
+    
+    def _remove_ids(self, ids: List[int]):
+        """Drop vectors and their metadata by id, recording delete tombstones"""
+        if not ids:
+            return
+        remove = np.array(ids, dtype=np.int64)
+        if self._hnsw() is not None:
+            self._rebuild_without(ids)
+        elif isinstance(self.index, faiss.IndexIDMap2):
+            self.index.remove_ids(remove)
+        else:
+            # A hashtable direct map only removes by an explicit id array
+            self.index.remove_ids(faiss.IDSelectorArray(len(remove), faiss.swig_ptr(remove)))
+        for idx in ids:
+            meta = self.metadata.pop(str(idx), {})
+            self._document_ids.get(meta.get('document_id'), set()).discard(idx)
+            self._pending_metadata.append({'idx': idx, 'deleted': True})
+        self._index_dirty = True
+        self.version += 1
+    
+    def _rebuild_without(self, ids: List[int]):
+        """HNSW graphs don't support removal: re-add every other stored vector"""
+        all_ids = faiss.vector_to_array(self.index.id_map)
+        keep = ~np.isin(all_ids, np.array(ids, dtype=np.int64))
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)[keep]
+        self.index = self._create_index()
+        self.index.add_with_ids(vectors, all_ids[keep])
+        self.set_search_params()
     
-    def delete_document_embeddings(self, document_id: int):
-        """Delete all embeddings for a document (requires rebuilding index)"""
+    def build_index(self, ids: np.ndarray, matrix: np.ndarray, entries: List[Dict]) -> bool:
+        """
+        Replace the index with a freshly trained one holding exactly these vectors
+        
+        Args:
+            ids: Stable id per row (normally document_embeddings.id)
+            matrix: One embedding per row
+            entries: Per-row metadata with document_id, chunk_index and text
+        
+        Returns:
+            bool: True if the index was built and saved
+        """
         try:
-            # Find indices to remove
-            indices_to_remove = []
-            for idx, meta in self.metadata.items():
-                if meta.get('document_id') == document_id:
-                    indices_to_remove.append(int(idx))
+            ids = np.asarray(ids, dtype=np.int64)
+            vectors = np.array(matrix, dtype=np.float32).reshape(len(ids), self.dimension)
+            faiss.normalize_L2(vectors)
             
-            if not indices_to_remove:
-                return True
+            nlist = self.config['nlist']
+            if self.index_type.startswith('ivf') and len(vectors) < nlist * 39:
+                # faiss wants ~39 training points per cluster
+                nlist = max(1, len(vectors) // 39)
+                logger.warning(f"Only {len(vectors)} vectors: training IVF with nlist={nlist}")
             
-            # FAISS doesn't support deletion, so we need to rebuild the index
-            # Get all vectors except the ones to delete
-            remaining_vectors = []
-            remaining_metadata = {}
-            new_idx = 0
+            started = time.time()
+            index = self._create_index(nlist)
+            if not index.is_trained:
+                index.train(vectors)
+            index.add_with_ids(vectors, ids)
+            self.index = index
+            self.set_search_params()
             
-            for old_idx in range(self.index.ntotal):
-                if old_idx not in indices_to_remove:
-                    vector = self.index.reconstruct(old_idx)
-                    remaining_vectors.append(vector)
-                    
-                    # Update metadata with new index
-                    old_meta = self.metadata.get(str(old_idx))
-                    if old_meta:
-                        remaining_metadata[str(new_idx)] = old_meta
-                        new_idx += 1
-            
-            # Create new index
-            if remaining_vectors:
-                vectors_array = np.vstack(remaining_vectors)
-                self.index = faiss.IndexFlatIP(self.dimension)
-                self.index.add(vectors_array)
-            else:
-                self.index = faiss.IndexFlatIP(self.dimension)
+            created_date = datetime.now().isoformat()
+            self.metadata = {
+                str(idx): {
+                    'vector_id': f"doc_{entry['document_id']}_chunk_{entry['chunk_index']}_{int(started)}",
+                    'document_id': entry['document_id'],
+                    'chunk_index': entry['chunk_index'],
+                    'text': entry.get('text', ''),
+                    'created_date': created_date,
+                    'external_id': True
+                }
+                for idx, entry in zip(ids.tolist(), entries)
+            }
+            self._document_ids = defaultdict(set)
+            for idx, meta in self.metadata.items():
+                self._document_ids[meta['document_id']].add(int(idx))
+            self._next_id = int(ids.max()) + 1 if len(ids) else 0
+            self._external_ids = True
+            
+            self._pending_metadata = []
+            self._index_dirty = True
+            self._rewrite_metadata = True
+            self.version += 1
+            logger.info(f"Built {self.index_type} index with {len(ids)} vectors in {time.time() - started:.1f}s")
+            return self.flush()
+            
+        except Exception as e:
+            logger.error(f"Error building {self.index_type} index: {e}")
+            return False
+    
+    def build_from_database(self, db_path: str = None, model: str = None) -> bool:
+        """Train and fill the index from the chunk embeddings stored in document_embeddings"""
+        from utils.db_utils import load_embedding_matrix, get_embedding_entries
+        
+        db_path = db_path or DB_PATH
+        ids, matrix = load_embedding_matrix(db_path, model=model)
+        if not len(ids):
+            logger.warning("No stored embeddings to build the index from")
+            return False
+        
+        entries = get_embedding_entries(db_path, ids.tolist())
+        return self.build_index(ids, matrix, [entries[idx] for idx in ids.tolist()])
+    
+    def recall_report(self, ids: np.ndarray, matrix: np.ndarray, k: int = 10, num_queries: int = 100,
+                      nprobe_values: Tuple[int, ...] = (1, 4, 16, 64),
+                      ef_search_values: Tuple[int, ...] = (16, 64, 256)) -> List[Dict]:
+        """
+        Measure recall@k and per-query latency against an exact flat baseline
+        
+        The baseline is an exact index over ids/matrix (normally the stored
+        embeddings the index was built from). Queries are sampled from matrix
+        and searched one at a time, at each nprobe (IVF) or efSearch (HNSW)
+        value.
+        
+        Returns:
+            list: One dict per setting with index_type, setting, recall,
+            latency_ms_p50 and latency_ms_p95; the first row is the baseline
+        """
+        vectors = np.array(matrix, dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        baseline = faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
+        baseline.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+        
+        rng = np.random.default_rng(0)
+        queries = vectors[rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)]
+        
+        def measure(index, label, setting):
+            latencies = []
+            found = []
+            for query in queries:
+                started = time.perf_counter()
+                _, result_ids = index.search(query.reshape(1, -1), k)
+                latencies.append((time.perf_counter() - started) * 1000)
+                found.append(result_ids[0])
+            return {'index_type': label, 'setting': setting, 'results': found,
+                    'latency_ms_p50': float(np.percentile(latencies, 50)),
+                    'latency_ms_p95': float(np.percentile(latencies, 95))}
+        
+        rows = [measure(baseline, 'flat', None)]
+        truth = [set(result_ids.tolist()) - {-1} for result_ids in rows[0]['results']]
+        
+        if faiss.try_extract_index_ivf(self.index) is not None:
+            settings = [('nprobe', value) for value in nprobe_values]
+        elif self._hnsw() is not None:
+            settings = [('ef_search', value) for value in ef_search_values]
+        else:
+            settings = [(None, None)]
+        
+        try:
+            for name, value in settings:
+                if name:
+                    self.set_search_params(**{name: value})
+                rows.append(measure(self.index, self.index_type, f"{name}={value}" if name else None))
+        finally:
+            self.set_search_params()
+        
+        for row in rows:
+            results = row.pop('results')
+            row['recall'] = float(np.mean([len(truth_ids & set(result_ids.tolist())) / max(1, len(truth_ids))
+                                           for truth_ids, result_ids in zip(truth, results)]))
+        return rows
+    
+    def delete_document_embeddings(self, document_id: int, flush: bool = True):
+        """Delete all embeddings for a document"""
+        try:
+            ids = sorted(self._document_ids.pop(document_id, ()))
+            if not ids:
+                return True
             
-            self.metadata = remaining_metadata
-            self._save_index()
+            self._remove_ids(ids)
+            if flush:
+                self.flush()
             
-            logger.info(f"Removed {len(indices_to_remove)} embeddings for document {document_id}")
+            logger.info(f"Removed {len(ids)} embeddings for document {document_id}")
             return True
             
         except Exception as e:
             logger.error(f"Error deleting document embeddings: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def replace_document_embeddings(self, document_id: int, chunks: List[Dict], matrix: np.ndarray,
+                                    flush: bool = True, ids: Optional[List[int]] = None) -> List[str]:
+        """Swap a re-embedded document's vectors for new ones"""
+        if not self.delete_document_embeddings(document_id, flush=False):
+            return []
+        return self.add_embeddings(document_id, chunks, matrix, flush=flush, ids=ids)
+
+_vector_db: Optional[VectorDatabaseManager] = None
+_vector_db_lock = threading.RLock()  # also serialises writes to the shared index
+
+def get_vector_db() -> VectorDatabaseManager:
+    """
+    Get the process-wide vector database with the default config
+    
+    The index is reloaded when another process (e.g. a CLI build) has
+    replaced the file, unless this process has changes of its own to save.
+    """
+    global _vector_db
+    with _vector_db_lock:
+        if _vector_db is not None and _vector_db.changed_on_disk() and not _vector_db._index_dirty:
+            logger.info("🔄 Vector index changed on disk, reloading")
+            _vector_db = None
+        if _vector_db is None:
+            _vector_db = VectorDatabaseManager(DEFAULT_VECTOR_DB_CONFIG)
+        return _vector_db
+
+def index_document_embeddings(db_path: str, document_id: int, content_id: int) -> int:
+    """
+    Replace a processed document's vectors in the shared index with its stored chunk embeddings
+    
+    Returns:
+        int: Number of vectors indexed
+    """
+    from utils.db_utils import load_embedding_matrix, get_embedding_entries
+    
+    ids, matrix = load_embedding_matrix(db_path, content_ids=[content_id])
+    entries = get_embedding_entries(db_path, ids.tolist())
+    chunks = [{'chunk_id': entries[idx]['chunk_index'], 'text': entries[idx]['text']} for idx in ids.tolist()]
+    
+    with _vector_db_lock:
+        vector_db = get_vector_db()
+        if not vector_db.index.is_trained:
+            logger.warning(f"⚠️ The {vector_db.index_type} index isn't built yet; document {document_id} not indexed")
+            return 0
+        return len(vector_db.replace_document_embeddings(document_id, chunks, matrix, ids=ids.tolist()))
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Build or benchmark the FAISS index from stored embeddings")
+    parser.add_argument('command', choices=['build', 'report'])
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default=DEFAULT_VECTOR_DB_CONFIG['index_type'])
+    parser.add_argument('--nlist', type=int, default=DEFAULT_VECTOR_DB_CONFIG['nlist'])
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    manager = VectorDatabaseManager(dict(DEFAULT_VECTOR_DB_CONFIG, index_type=args.index_type, nlist=args.nlist))
+    
+    if args.command == 'build':
+        print("✅ Index built" if manager.build_from_database() else "❌ Index build failed")
+    else:
+        from utils.db_utils import load_embedding_matrix
+        stored_ids, stored = load_embedding_matrix(DB_PATH)
+        print(f"📊 Recall@{args.k} vs flat baseline ({manager.get_total_embeddings()} vectors)")
+        for row in manager.recall_report(stored_ids, stored, k=args.k):
+            print(f"  {row['index_type']:<9} {str(row['setting'] or ''):<14} recall={row['recall']:.3f} "
+                  f"p50={row['latency_ms_p50']:.2f}ms p95={row['latency_ms_p95']:.2f}ms")